@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+""" Tests for processing a corpus of prompts and resuming from the
+    manifest...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import io
+import os
+import codecs
+import shutil
+import tempfile
+import unittest
+
+import ttslab
+from ttslab import corpus
+from ttslab.hrg import Utterance
+
+class StubVoice(object):
+    """ Returns a one line label per prompt, prompts starting with
+        "fail" raise an exception with the rest of the prompt as
+        message...
+    """
+    def synthesize(self, inputstring, processname):
+        if inputstring.startswith("fail"):
+            raise ValueError(inputstring[4:])
+        utt = Utterance(self)
+        utt["text"] = inputstring
+        utt["hts_label"] = [inputstring.upper()]
+        return utt
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.voicefile = os.path.join(self.tempdir, "voice.pickle")
+        ttslab.tofile(StubVoice(), self.voicefile)
+        self.outdir = os.path.join(self.tempdir, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def run_corpus(self, prompts, **kwargs):
+        return corpus.run(self.voicefile, prompts, self.outdir, saveutts=False, logfh=io.StringIO(), **kwargs)
+
+    def manifest(self):
+        with codecs.open(os.path.join(self.outdir, corpus.MANIFEST_FILE), encoding="utf-8") as infh:
+            return infh.read().splitlines()
+
+    def test_resume(self):
+        prompts = [("u1", "one"), ("u2", "fail\tline\nbreak \\n"), ("u3", "three")]
+        stats = self.run_corpus(prompts[:2])
+        self.assertEqual((stats["ok"], stats["errors"], stats["skipped"]), (1, 1, 0))
+        manifest = self.manifest()
+        self.assertEqual(len(manifest), 2)
+        self.assertEqual(manifest[1].split("\t"), ["u2", corpus.STATUS_ERROR, "ValueError: \\tline\\nbreak \\\\n"])
+        self.assertEqual(corpus.unescape_field(manifest[1].split("\t")[2]), "ValueError: \tline\nbreak \\n")
+        self.assertEqual(corpus.read_manifest(self.outdir), {"u1": corpus.STATUS_OK, "u2": corpus.STATUS_ERROR})
+
+        stats = self.run_corpus(prompts)
+        self.assertEqual((stats["ok"], stats["errors"], stats["skipped"]), (1, 0, 2))
+        stats = self.run_corpus(prompts, retryerrors=True)
+        self.assertEqual((stats["ok"], stats["errors"], stats["skipped"]), (0, 1, 2))
+        self.assertEqual(len(self.manifest()), 4)
+        with codecs.open(os.path.join(self.outdir, corpus.LAB_DIR, "u3" + corpus.LAB_EXT), encoding="utf-8") as infh:
+            self.assertEqual(infh.read(), "THREE\n")
+
+    def test_escape(self):
+        for field in ["", "a\tb", "\\t", "a\\\nb\r", "\\\\"]:
+            escaped = corpus.escape_field(field)
+            self.assertFalse(set("\t\n\r") & set(escaped))
+            self.assertEqual(corpus.unescape_field(escaped), field)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+""" Tests for loading pronunciation dictionaries from text and
+    compiled files...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import codecs
+import shutil
+import tempfile
+import unittest
+
+from ttslab.pronundict import PronunciationDictionary, CompiledPronunciationDictionary, PronunLookupError
+
+LEXICON = ["aba None None 12 a b a",
+           "bab n 01 21 b a b",
+           "bab v 10 12 b a b",
+           "ŋwɛ None 1 2 ŋ wɛ",
+           "x None None 0"]
+
+class TestCompiledPronunciationDictionary(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.textfn = os.path.join(self.tempdir, "lexicon.txt")
+        with codecs.open(self.textfn, "w", encoding="utf-8") as outfh:
+            outfh.write("\n".join(LEXICON) + "\n")
+        self.compiledfn = os.path.join(self.tempdir, "lexicon.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def compiled(self, pronundict):
+        pronundict.tocompiledfile(self.compiledfn)
+        return CompiledPronunciationDictionary(self.compiledfn)
+
+    def assertSameWord(self, word, compiledword):
+        self.assertEqual(dict([(k, word[k]) for k in word]),
+                         dict([(k, compiledword[k]) for k in compiledword]))
+
+    def test_roundtrip(self):
+        pronundict = PronunciationDictionary().fromtextfile(self.textfn)
+        compiled = self.compiled(pronundict)
+        self.assertEqual(sorted(compiled), sorted(pronundict))
+        for k in pronundict:
+            self.assertSameWord(pronundict.lookup(k), compiled.lookup(k))
+            for word in compiled[k] if isinstance(compiled[k], list) else [compiled[k]]:
+                self.assertSameWord(pronundict.lookup(k, word["pos"]), compiled.lookup(k, word["pos"]))
+        self.assertEqual(compiled.lookup("bab", "v")["syllables"], [["b"], ["a", "b"]])
+        self.assertEqual(compiled.lookup("ŋwɛ")["syltones"], "1")
+        with self.assertRaises(PronunLookupError):
+            compiled.lookup("abab")
+        with self.assertRaises(PronunLookupError):
+            compiled.lookup("bab", "adj")
+
+    def test_extras(self):
+        pronundict = PronunciationDictionary().fromtextfile(self.textfn)
+        pronundict["aba"]["origin"] = "loan"
+        pronundict["aba"]["freq"] = 12
+        compiled = self.compiled(pronundict)
+        word = compiled.lookup("aba")
+        self.assertEqual((word["origin"], word["freq"]), ("loan", 12))
+        self.assertSameWord(pronundict.lookup("aba"), word)
+        self.assertNotIn("origin", compiled.lookup("x"))
+
+    def test_unserialisable_extras(self):
+        pronundict = PronunciationDictionary().fromtextfile(self.textfn)
+        pronundict["aba"]["origin"] = object()
+        with self.assertRaises(ValueError):
+            pronundict.tocompiledfile(self.compiledfn)
+
+    def test_limits(self):
+        pronundict = PronunciationDictionary()
+        for i in range(70000): #more distinct pos than uint16
+            pronundict.add_word("w%s" % i, [["a"]], pos="p%s" % i)
+        compiled = self.compiled(pronundict)
+        self.assertEqual(compiled.lookup("w69999")["pos"], "p69999")
+        pronundict.add_word("long", [["a"] * 256])
+        with self.assertRaises(ValueError):
+            pronundict.tocompiledfile(self.compiledfn)
+
+
+if __name__ == "__main__":
+    unittest.main()
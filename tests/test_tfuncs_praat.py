@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+""" Tests for Praat feature extraction (tfuncs_praat and praat_batch)
+    using a stub "praat" executable...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import sys
+import stat
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ttslab.trackfile import Track
+from ttslab.trackfile.funcs import tfuncs_praat, praat_batch
+
+#Prints what the PRAAT_GET_* scripts would for each wavefile (one
+#frame per byte in the file, value 100 + byte value) including an
+#undefined value, a stray line and an unparseable value:
+STUB_PRAAT = """#!%(python)s
+import sys
+def output(wavfilelocation):
+    data = bytearray(open(wavfilelocation, "rb").read())
+    print("0")
+    print("%%s" %% (len(data) * 0.01))
+    print("0.01")
+    for i, b in enumerate(data):
+        if i == 1:
+            print("%%s --undefined--" %% (i * 0.01))
+            print("stray")
+        elif i == 2:
+            print("%%s garbled" %% (i * 0.01))
+        else:
+            print("%%s %%s" %% (i * 0.01, 100 + b))
+script = open(sys.argv[1]).read()
+with open(sys.argv[0] + ".log", "a") as logfh:
+    logfh.write(" ".join(sys.argv[2:]) + "\\n")
+if "input_list_file_name" in script:
+    for i, line in enumerate(open(sys.argv[2])):
+        print("FILE %%s" %% (i + 1))
+        output(line.strip())
+else:
+    output(sys.argv[2])
+"""
+
+EXPECTED_TIMES = [0.0, 0.01, 0.02, 0.03]
+
+def expected_values(data):
+    return [100.0 + data[0], 0.0, 0.0, 100.0 + data[3]]
+
+
+class TestPraat(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.praatbin = os.path.join(self.tempdir, "praat")
+        with open(self.praatbin, "w") as outfh:
+            outfh.write(STUB_PRAAT % {"python": sys.executable})
+        os.chmod(self.praatbin, stat.S_IRWXU)
+        self.savedpraatbin = tfuncs_praat.PRAAT_BIN
+        tfuncs_praat.PRAAT_BIN = self.praatbin
+        self.wavfiles = {}
+        for i, data in enumerate([[50, 60, 70, 80], [10, 20, 30, 40], [1, 2, 3, 4]]):
+            fn = os.path.join(self.tempdir, "file%s.wav" % i)
+            with open(fn, "wb") as outfh:
+                outfh.write(bytes(bytearray(data)))
+            self.wavfiles[fn] = data
+
+    def tearDown(self):
+        tfuncs_praat.PRAAT_BIN = self.savedpraatbin
+        shutil.rmtree(self.tempdir)
+
+    def numcalls(self):
+        try:
+            with open(self.praatbin + ".log") as infh:
+                return len(infh.readlines())
+        except IOError:
+            return 0
+
+    def check_f0(self, t, fn):
+        self.assertEqual(t.name, os.path.splitext(os.path.basename(fn))[0])
+        self.assertEqual(t.praattype, "PitchTier")
+        np.testing.assert_allclose(t.times, EXPECTED_TIMES)
+        np.testing.assert_allclose(t.values[:, 0], expected_values(self.wavfiles[fn]))
+
+    def test_get_f0(self):
+        for fn in self.wavfiles:
+            t = Track()
+            tfuncs_praat.get_f0(t, fn)
+            self.check_f0(t, fn)
+            self.assertEqual(t.minpitch, float(tfuncs_praat.DEF_MINPITCH))
+
+    def test_get_intensity(self):
+        for fn in self.wavfiles:
+            t = Track()
+            tfuncs_praat.get_intensity(t, fn)
+            self.assertEqual(t.praattype, "IntensityTier")
+            self.assertEqual(t.values.shape, (4, 1))
+            np.testing.assert_allclose(t.values[:, 0], expected_values(self.wavfiles[fn]))
+            self.assertEqual(t._endtime, 0.04)
+
+    def test_get_f0s_cached(self):
+        cachedir = os.path.join(self.tempdir, "cache")
+        fns = sorted(self.wavfiles)
+        tracks = praat_batch.get_f0s(fns, workers=2, cachedir=cachedir)
+        self.assertEqual(sorted(tracks), fns)
+        for fn in fns:
+            self.check_f0(tracks[fn], fn)
+        self.assertEqual(self.numcalls(), 2) #one per worker
+        #all from cache:
+        tracks = praat_batch.get_f0s(fns, workers=2, cachedir=cachedir)
+        for fn in fns:
+            self.check_f0(tracks[fn], fn)
+        self.assertEqual(self.numcalls(), 2)
+        #different parameters are not cached:
+        praat_batch.get_f0s(fns[:1], maxpitch=400, cachedir=cachedir)
+        self.assertEqual(self.numcalls(), 3)
+        #corrupt cache entries are recomputed:
+        for cachefn in os.listdir(cachedir):
+            with open(os.path.join(cachedir, cachefn), "wb") as outfh:
+                outfh.write(b"PK\x03\x04truncated")
+        tracks = praat_batch.get_f0s(fns, cachedir=cachedir)
+        for fn in fns:
+            self.check_f0(tracks[fn], fn)
+        self.assertEqual(self.numcalls(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
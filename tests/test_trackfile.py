@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+""" Tests for reading and writing EST Track files...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ttslab.trackfile import Track
+from ttslab.trackfile.trackfile import FileFormatError
+
+def make_track(numframes=50, numchannels=3):
+    t = Track()
+    t.times = np.arange(numframes) * 0.005
+    t.values = np.random.RandomState(1).uniform(-100.0, 100.0, (numframes, numchannels))
+    return t
+
+
+def write_est(filepath, header, data):
+    with open(filepath, "wb") as outfh:
+        outfh.write(("EST_File Track\n" + "\n".join(header) + "\nEST_Header_End\n").encode("ascii"))
+        if isinstance(data, bytes):
+            outfh.write(data)
+        else:
+            data.tofile(outfh)
+
+
+class TestESTTrack(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def roundtrip(self, track, **kwargs):
+        filepath = os.path.join(self.tempdir, "test.est")
+        track.save_track(filepath, **kwargs)
+        t = Track()
+        t.load_track(filepath)
+        return t
+
+    def test_ascii_roundtrip(self):
+        track = make_track()
+        t = self.roundtrip(track)
+        self.assertEqual(t.values.shape, track.values.shape)
+        np.testing.assert_allclose(t.times, track.times, atol=1e-6)
+        np.testing.assert_allclose(t.values, track.values, rtol=1e-8) #fmt="%.9g"
+
+    def test_binary_roundtrip(self):
+        track = make_track()
+        t = self.roundtrip(track, binary=True)
+        self.assertEqual(t.values.dtype, np.float64)
+        np.testing.assert_array_equal(t.times, track.times.astype(np.float32))
+        np.testing.assert_array_equal(t.values, track.values.astype(np.float32))
+
+    def test_binary_byteorders(self):
+        track = make_track()
+        for byteorder, dtype in [("10", ">f4"), ("01", "<f4")]:
+            filepath = os.path.join(self.tempdir, "test_%s.est" % byteorder)
+            data = np.hstack((track.times.reshape((-1, 1)), np.ones((len(track), 1)), track.values))
+            write_est(filepath, ["DataType binary",
+                                 "ByteOrder %s" % byteorder,
+                                 "NumFrames %s" % len(track),
+                                 "NumChannels 3",
+                                 "BreaksPresent true"], data.astype(dtype))
+            t = Track()
+            t.load_track(filepath)
+            np.testing.assert_array_equal(t.times, track.times.astype(np.float32))
+            np.testing.assert_array_equal(t.values, track.values.astype(np.float32))
+
+    def test_unknown_byteorder(self):
+        filepath = os.path.join(self.tempdir, "test.est")
+        write_est(filepath, ["DataType binary", "ByteOrder 11", "NumFrames 1", "NumChannels 1"],
+                  np.zeros(2, dtype="<f4"))
+        self.assertRaises(FileFormatError, Track().load_track, filepath)
+
+    def test_breaks(self):
+        #break column (second column) is not part of values:
+        filepath = os.path.join(self.tempdir, "test.est")
+        write_est(filepath, ["DataType ascii", "NumFrames 3", "NumChannels 2", "BreaksPresent true"],
+                  b"0.0 1 10.0 11.0\n0.5 0 20.0 21.0\n1.0 1 30.0 31.0\n")
+        t = Track()
+        t.load_track(filepath)
+        np.testing.assert_array_equal(t.times, [0.0, 0.5, 1.0])
+        np.testing.assert_array_equal(t.values, [[10.0, 11.0], [20.0, 21.0], [30.0, 31.0]])
+        #no break column:
+        write_est(filepath, ["DataType ascii", "NumFrames 2", "NumChannels 2"],
+                  b"0.0 10.0 11.0\n0.5 20.0 21.0\n")
+        t.load_track(filepath)
+        np.testing.assert_array_equal(t.values, [[10.0, 11.0], [20.0, 21.0]])
+        #writer always includes break column (all 1):
+        make_track(5, 1).save_track(filepath)
+        with open(filepath, "rb") as infh:
+            lines = infh.read().decode("ascii").split("EST_Header_End\n")[1].splitlines()
+        self.assertEqual([line.split()[1] for line in lines], ["1"] * 5)
+
+    def test_size_mismatch(self):
+        filepath = os.path.join(self.tempdir, "test.est")
+        write_est(filepath, ["DataType ascii", "NumFrames 3", "NumChannels 1"], b"0.0 1.0\n")
+        self.assertRaises(FileFormatError, Track().load_track, filepath)
+
+
+
+class TestSplineCache(unittest.TestCase):
+
+    def test_cached(self):
+        t = make_track()
+        self.assertIs(t.spline(1), t.spline(1))
+
+    def test_replaced_values(self):
+        t = make_track()
+        spline = t.spline(0)
+        t.values = t.values * 2.0
+        self.assertIsNot(t.spline(0), spline)
+        np.testing.assert_allclose(t.spline(0)(t.times), t.values[:, 0])
+
+    def test_zero_starttime(self):
+        t = make_track()
+        t.times += 1.0
+        t.starttime = 1.0
+        t.clear_splines()
+        spline = t.spline(0)
+        self.assertAlmostEqual(float(spline(1.0)), t.values[0, 0])
+        t.zero_starttime()
+        self.assertIsNot(t.spline(0), spline)
+        self.assertAlmostEqual(float(t.spline(0)(0.0)), t.values[0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+""" Tests for parsing (riffinfo/mmapread) and writing
+    (riffstring/writeriff) RIFF wave files...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from ttslab.waveform import Waveform, riffinfo, mmapread, RIFF_PCM, RIFF_FLOAT, RIFF_EXTENSIBLE
+from ttslab.funcs import wfuncs_proc
+
+SAMPLES = np.array([0, 1000, -1000, 32767, -32768, 5], dtype="<i2")
+
+def chunk(chunkid, data, size=None):
+    if size is None:
+        size = len(data)
+    return struct.pack(str("<4sI"), chunkid, size) + data + b"\0" * (len(data) % 2)
+
+
+def fmtchunk(formattag=RIFF_PCM, channels=1, samplerate=16000, bitspersample=16, extra=b""):
+    blockalign = channels * bitspersample // 8
+    return chunk(b"fmt ", struct.pack(str("<HHIIHH"), formattag, channels, samplerate,
+                                      samplerate * blockalign, blockalign, bitspersample) + extra)
+
+
+def riff(chunks, size=None):
+    body = b"WAVE" + b"".join(chunks)
+    if size is None:
+        size = len(body)
+    return b"RIFF" + struct.pack(str("<I"), size) + body
+
+
+class TestRiffInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def parse(self, data):
+        filepath = os.path.join(self.tempdir, "test.wav")
+        with open(filepath, "wb") as outfh:
+            outfh.write(data)
+        return riffinfo(filepath), mmapread(filepath)
+
+    def test_canonical(self):
+        (samplerate, channels, dtype, dataoffset, numframes), (sr, samples) = self.parse(
+            riff([fmtchunk(), chunk(b"data", SAMPLES.tobytes())]))
+        self.assertEqual((samplerate, channels, dtype, dataoffset, numframes),
+                         (16000, 1, np.dtype("<i2"), 44, len(SAMPLES)))
+        np.testing.assert_array_equal(samples, SAMPLES)
+
+    def test_stereo_float(self):
+        samples = np.arange(8, dtype="<f4").reshape(4, 2) / 8.0
+        info, (sr, s) = self.parse(riff([fmtchunk(RIFF_FLOAT, 2, 8000, 32), chunk(b"data", samples.tobytes())]))
+        self.assertEqual(info[:3], (8000, 2, np.dtype("<f4")))
+        np.testing.assert_array_equal(s, samples)
+
+    def test_skipped_chunks(self):
+        info, (sr, samples) = self.parse(
+            riff([chunk(b"LIST", b"INFOabc"), fmtchunk(), chunk(b"fact", b"\1\0\0\0"),
+                  chunk(b"junk", b"x" * 5), chunk(b"data", SAMPLES.tobytes())]))
+        self.assertEqual(info[4], len(SAMPLES))
+        np.testing.assert_array_equal(samples, SAMPLES)
+
+    def test_odd_fmt(self):
+        info, (sr, samples) = self.parse(riff([fmtchunk(extra=b"\0"), chunk(b"data", SAMPLES.tobytes())]))
+        self.assertEqual(info[:3], (16000, 1, np.dtype("<i2")))
+        np.testing.assert_array_equal(samples, SAMPLES)
+
+    def test_extensible_fmt(self):
+        #cbSize, validbits, channelmask, subformat GUID (PCM):
+        extra = struct.pack(str("<HHI"), 22, 16, 4) + struct.pack(str("<H"), RIFF_PCM) + b"\0\0\0\0\x10\0\x80\0\0\xaa\0\x38\x9b\x71"
+        info, (sr, samples) = self.parse(riff([fmtchunk(RIFF_EXTENSIBLE, extra=extra), chunk(b"data", SAMPLES.tobytes())]))
+        self.assertEqual(info[:3], (16000, 1, np.dtype("<i2")))
+        np.testing.assert_array_equal(samples, SAMPLES)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.parse(riff([fmtchunk(bitspersample=24), chunk(b"data", b"\0" * 6)]))
+
+    def test_no_data(self):
+        with self.assertRaises(ValueError):
+            self.parse(riff([fmtchunk()]))
+
+    def test_empty_with_trailing_chunk(self):
+        info, (sr, samples) = self.parse(riff([fmtchunk(), chunk(b"data", b""), chunk(b"LIST", b"INFOabcd")]))
+        self.assertEqual(info[4], 0)
+        self.assertEqual(len(samples), 0)
+
+    def test_streamed(self):
+        for riffsize in [0, 0xFFFFFFFF, 36]:
+            for datasize in [0, 0xFFFFFFFF]:
+                info, (sr, samples) = self.parse(riff([fmtchunk(), chunk(b"data", SAMPLES.tobytes(), datasize)], riffsize))
+                self.assertEqual(info[4], len(SAMPLES))
+                np.testing.assert_array_equal(samples, SAMPLES)
+
+    def test_truncated(self):
+        info, (sr, samples) = self.parse(riff([fmtchunk(), chunk(b"data", SAMPLES.tobytes(), 1000)]))
+        self.assertEqual(info[4], len(SAMPLES))
+
+
+
+class TestRiffWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def make_waveform(self, samples):
+        w = Waveform()
+        w.samplerate = 16000
+        w.samples = samples
+        w.channels = 1 if samples.ndim == 1 else samples.shape[1]
+        return w
+
+    def read(self, data):
+        filepath = os.path.join(self.tempdir, "test.wav")
+        with open(filepath, "wb") as outfh:
+            outfh.write(data)
+        return Waveform(filepath)
+
+    def test_int16(self):
+        samples = np.arange(-6, 6, dtype=np.int16).reshape(6, 2) * 1000
+        w = self.make_waveform(samples)
+        riffwave = bytes(w.riffstring())
+        outfh = io.BytesIO()
+        w.writeriff(outfh, blocksize=4)
+        self.assertEqual(outfh.getvalue(), riffwave)
+        r = self.read(riffwave)
+        self.assertEqual((r.samplerate, r.channels), (16000, 2))
+        np.testing.assert_array_equal(r.samples, samples)
+
+    def test_float(self):
+        """ Same conversion as wfuncs_proc.to_int16...
+        """
+        for samples in [np.array([1.0, -1.0, 0.5, 2e-5, -3e-5, 1.5, -0.99999]),
+                        np.array([0, 64, 128, 255], dtype=np.uint8)]:
+            w = self.make_waveform(samples)
+            riffwave = bytes(w.riffstring())
+            outfh = io.BytesIO()
+            w.writeriff(outfh, blocksize=3)
+            self.assertEqual(outfh.getvalue(), riffwave)
+            wfuncs_proc.to_int16(w)
+            np.testing.assert_array_equal(self.read(riffwave).samples, w.samples)
+        np.testing.assert_array_equal(w.samples, [-32768, -16384, 0, 32512])
+
+
+if __name__ == "__main__":
+    unittest.main()
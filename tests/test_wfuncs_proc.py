@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+""" Tests for the in-place Waveform processing functions...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import unittest
+
+import numpy as np
+
+import ttslab
+from ttslab.waveform import Waveform
+from ttslab.funcs import wfuncs_proc
+
+def make_waveform(samples, samplerate=16000):
+    w = Waveform()
+    w.samplerate = samplerate
+    w.samples = np.array(samples)
+    w.channels = 1 if w.samples.ndim == 1 else w.samples.shape[1]
+    return w
+
+
+class TestWfuncsProc(unittest.TestCase):
+
+    def test_extend(self):
+        class W(Waveform):
+            pass
+        ttslab.extend(W, "ttslab.funcs.wfuncs_proc")
+        methods = set([name for name in dir(W) if not hasattr(Waveform, name)])
+        self.assertEqual(methods, set(["peak", "rms", "gain", "gain_db", "normalise_peak", "normalise_rms",
+                                       "remove_dc", "to_float", "to_int16", "fade_in", "fade_out"]))
+
+    def test_peak_rms(self):
+        w = make_waveform(np.array([[0, 100], [-300, 50]], dtype=np.int16))
+        self.assertEqual(wfuncs_proc.peak(w), 300)
+        np.testing.assert_array_equal(wfuncs_proc.peak(w, axis=0), [300, 100])
+        np.testing.assert_allclose(wfuncs_proc.rms(w, axis=0), [np.sqrt(300 ** 2 / 2), np.sqrt((100 ** 2 + 50 ** 2) / 2)])
+
+    def test_unsigned(self):
+        w = make_waveform(np.array([0, 128, 255], dtype=np.uint8))
+        self.assertEqual(wfuncs_proc.peak(w), 128)
+        np.testing.assert_allclose(wfuncs_proc.rms(w), np.sqrt((128 ** 2 + 127 ** 2) / 3))
+        wfuncs_proc.remove_dc(w)
+        np.testing.assert_array_equal(w.samples, [0, 128, 255])
+        w = make_waveform(np.array([138, 148, 158], dtype=np.uint8))
+        wfuncs_proc.remove_dc(w)
+        np.testing.assert_array_equal(w.samples, [118, 128, 138])
+        wfuncs_proc.gain(w, 2.0)
+        np.testing.assert_array_equal(w.samples, [108, 128, 148])
+        wfuncs_proc.normalise_peak(w)
+        np.testing.assert_array_equal(w.samples, [1, 128, 255])
+
+    def test_remove_dc(self):
+        w = make_waveform(np.array([[10, -5], [30, -15]], dtype=np.int16))
+        wfuncs_proc.remove_dc(w)
+        np.testing.assert_array_equal(w.samples, [[-10, 5], [10, -5]])
+        w = make_waveform(np.array([0.5, 0.7]))
+        wfuncs_proc.remove_dc(w)
+        np.testing.assert_allclose(w.samples, [-0.1, 0.1])
+
+    def test_normalise(self):
+        w = make_waveform(np.array([0.25, -0.5, 0.1]))
+        wfuncs_proc.normalise_peak(w, 0.25)
+        np.testing.assert_allclose(w.samples, [0.125, -0.25, 0.05])
+        w = make_waveform(np.array([1000, -2000], dtype=np.int16))
+        wfuncs_proc.normalise_peak(w)
+        np.testing.assert_array_equal(w.samples, [16384, -32767])
+        wfuncs_proc.normalise_rms(w, 1.0) #clipped
+        self.assertEqual(list(w.samples), [20724, -32768])
+
+    def test_conversion(self):
+        w = make_waveform(np.array([0, 64, 128, 255], dtype=np.uint8))
+        wfuncs_proc.to_float(w)
+        np.testing.assert_allclose(w.samples, [-1.0, -0.5, 0.0, 127 / 128])
+        wfuncs_proc.to_int16(w)
+        np.testing.assert_array_equal(w.samples, [-32768, -16384, 0, 32512])
+        w = make_waveform(np.array([1.0, -1.0, 0.5, 2e-5, -3e-5]))
+        wfuncs_proc.to_int16(w)
+        np.testing.assert_array_equal(w.samples, [32767, -32768, 16384, 1, -1])
+
+    def test_fades(self):
+        w = make_waveform(np.full(10, 1000, dtype=np.int16), samplerate=10)
+        wfuncs_proc.fade_in(w, 0.4)
+        wfuncs_proc.fade_out(w, 0.4)
+        np.testing.assert_array_equal(w.samples, w.samples[::-1])
+        self.assertTrue(np.all(np.diff(w.samples[:5]) >= 0))
+        self.assertTrue(0 < w.samples[0] < 1000 and w.samples[5] == 1000)
+        w = make_waveform(np.full(4, 200, dtype=np.uint8), samplerate=4)
+        wfuncs_proc.fade_in(w, 1.0)
+        self.assertTrue(128 < w.samples[0] < w.samples[3] < 200)
+
+    def test_readonly(self):
+        samples = np.array([1, 2, 3], dtype=np.int16)
+        samples.flags.writeable = False
+        w = make_waveform(samples)
+        w.samples = samples
+        wfuncs_proc.gain(w, 2)
+        np.testing.assert_array_equal(w.samples, [2, 4, 6])
+        np.testing.assert_array_equal(samples, [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
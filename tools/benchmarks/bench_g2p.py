@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Benchmark G2P_Rewrites.predict_word (compiled rules) against the
+    reference implementation (linear scan over rules) on a word list
+    and check that the outputs are identical...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import sys
+import time
+import codecs
+
+from ttslab.g2p import G2P_Rewrites_Semicolon, GraphemeNotDefined, NoRuleFound
+
+def predict_word_linear(rs, word):
+    """ Predict phone sequence given word by trying each rule in
+        turn (the original implementation of predict_word)...
+    """
+    phones = []
+    #append and prepend whitespace_char
+    word = word.join([rs.WHITESPACE_CHAR, rs.WHITESPACE_CHAR])
+    #apply gnulls
+    word = rs.apply_gnulls(word)
+    #find matching rule and thus phoneme for each grapheme..
+    for i in list(range(len(word)))[1:-1]: #excluding whitespace..
+        lc, g, rc = [word[:i], word[i], word[i+1:]]
+        try:
+            rulelist = rs.ruleset[g]
+        except KeyError:
+            raise GraphemeNotDefined("Word: " + word + " Grapheme: " + g)
+        for rule in rulelist:
+            if rule.match(lc, rc):
+                if rule.phoneme:                 #phoneme can be "" meaning no phone (pnull)
+                    phones.append(rule.phoneme)  #only add if not empty string
+                break
+        else:
+            raise NoRuleFound
+    return phones
+
+def predict_all(predict, words):
+    results = []
+    for word in words:
+        try:
+            results.append(predict(word))
+        except (GraphemeNotDefined, NoRuleFound) as e:
+            results.append(e.__class__.__name__)
+    return results
+
+def timeit(predict, words):
+    starttime = time.time()
+    results = predict_all(predict, words)
+    return time.time() - starttime, results
+
+
+if __name__ == "__main__":
+    try:
+        rulesfn, gnullsfn, wordsfn = sys.argv[1:4]
+    except ValueError:
+        print("USAGE: bench_g2p.py RULESFN GNULLSFN WORDLISTFN")
+        sys.exit(1)
+
+    rs = G2P_Rewrites_Semicolon()
+    rs.load_ruleset_semicolon(rulesfn)
+    rs.load_gnulls(gnullsfn)
+    with codecs.open(wordsfn, encoding="utf-8") as infh:
+        words = [line.split()[0] for line in infh if line.strip()]
+
+    starttime = time.time()
+    rs.compile_rules()
+    compiletime = time.time() - starttime
+    lineartime, linearresults = timeit(lambda word: predict_word_linear(rs, word), words)
+    compiledtime, compiledresults = timeit(rs.predict_word, words)
+
+    mismatches = [w for w, a, b in zip(words, linearresults, compiledresults) if a != b]
+    print("words:          %s" % len(words))
+    print("compile (s):    %.3f" % compiletime)
+    print("linear (s):     %.3f (%.1f words/s)" % (lineartime, len(words) / lineartime))
+    print("compiled (s):   %.3f (%.1f words/s)" % (compiledtime, len(words) / compiledtime))
+    print("speedup:        %.1fx" % (lineartime / compiledtime))
+    print("mismatches:     %s" % len(mismatches))
+    for w in mismatches[:10]:
+        print("\t" + w)
+    if mismatches:
+        sys.exit(1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Benchmark PronunciationDictionary.fromtextfile (chunked/parallel
+    bulk loader) against the reference implementation on a lexicon
+    file, reporting load time and memory and checking that the loaded
+    entries are identical...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import sys
+import time
+import codecs
+import resource
+
+from ttslab.pronundict import PronunciationDictionary
+
+def maxrss():
+    """ Peak resident memory of this process in MB (Linux reports kB)...
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def fromtextfile_linear(pronundict, fn, phonemap=None, nonestring="None"):
+    """ Reference implementation of fromtextfile (one entry at a
+        time)...
+    """
+    with codecs.open(fn, encoding="utf-8") as infh:
+        for line in infh:
+            elems = line.split()
+            word = elems[0]
+            if elems[1] != nonestring:
+                pos = elems[1]
+            else:
+                pos = None
+            if elems[2] != nonestring:
+                syltones = elems[2]
+            else:
+                syltones = None
+            if phonemap:
+                try:
+                    phones = [phonemap[ph] for ph in elems[4:]]
+                except KeyError:
+                    print(line)
+                    raise
+            else:
+                phones = elems[4:]
+            syllables = []
+            for s in elems[3]:
+                syllables.append(phones[:int(s)])
+                for i in range(int(s)):
+                    try:
+                        phones.pop(0)
+                    except IndexError:
+                        print(line)
+                        raise
+            pronundict.add_word(word, syllables, syltones, pos)
+    return pronundict
+
+def entries(pronundict):
+    d = {}
+    for k in pronundict:
+        entry = pronundict[k]
+        if not isinstance(entry, list):
+            entry = [entry]
+        d[k] = [word.features for word in entry]
+    return d
+
+def timeit(load, fn, **kwargs):
+    startmem = maxrss()
+    starttime = time.time()
+    pronundict = load(PronunciationDictionary(), fn, **kwargs)
+    return time.time() - starttime, maxrss() - startmem, pronundict
+
+
+if __name__ == "__main__":
+    try:
+        lexiconfn = sys.argv[1]
+    except IndexError:
+        print("USAGE: bench_lexicon.py LEXICONFN [WORKERS]")
+        sys.exit(1)
+    try:
+        workers = int(sys.argv[2])
+    except IndexError:
+        workers = 1
+
+    #peak memory only grows, so measure the new loader first
+    bulktime, bulkmem, bulk = timeit(PronunciationDictionary.fromtextfile, lexiconfn, workers=workers)
+    lineartime, linearmem, linear = timeit(fromtextfile_linear, lexiconfn)
+
+    identical = entries(linear) == entries(bulk)
+    print("entries:        %s" % len(bulk.entries))
+    print("linear (s):     %.3f" % lineartime)
+    print("bulk (s):       %.3f (%s workers)" % (bulktime, workers))
+    print("speedup:        %.1fx" % (lineartime / bulktime))
+    print("bulk peak mem increase (MB): %.1f" % bulkmem)
+    print("identical:      %s" % identical)
+    if not identical:
+        sys.exit(1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Compare F0 and intensity extraction by tfuncs_numpy against
+    tfuncs_praat on a set of wavefiles: timing and agreement (voicing
+    decisions, gross pitch errors and deviation on frames voiced in
+    both, intensity difference)...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import sys
+import time
+
+import numpy as np
+
+from ttslab.trackfile import Track
+from ttslab.trackfile.funcs import tfuncs_praat, tfuncs_numpy
+
+GROSS_ERROR = 0.2 #relative F0 deviation
+
+def extract(module, funcname, wavfilelocation, **kwargs):
+    t = Track()
+    starttime = time.time()
+    getattr(module, funcname)(t, wavfilelocation, **kwargs)
+    return time.time() - starttime, t
+
+
+def aligned(reference, test):
+    """ Values of test at the times of reference (nearest frame)...
+    """
+    return test.values[test.index_at(reference.times), 0]
+
+
+def compare_f0(praattrack, nptrack):
+    ref = praattrack.values[:, 0]
+    hyp = aligned(praattrack, nptrack)
+    refvoiced = ref > 0.0
+    hypvoiced = hyp > 0.0
+    both = refvoiced & hypvoiced
+    deviation = np.abs(hyp[both] - ref[both]) / ref[both]
+    semitones = np.abs(12.0 * np.log2(hyp[both] / ref[both]))
+    return {"frames": len(ref),
+            "voicing_agreement": np.mean(refvoiced == hypvoiced) if len(ref) else None,
+            "gross_errors": np.mean(deviation > GROSS_ERROR) if both.any() else None,
+            "st_mean": np.mean(semitones[deviation <= GROSS_ERROR]) if (deviation <= GROSS_ERROR).any() else None}
+
+
+def compare_intensity(praattrack, nptrack):
+    ref = praattrack.values[:, 0]
+    hyp = aligned(praattrack, nptrack)
+    valid = (ref > 0.0) & (hyp > 0.0)
+    return {"db_mean": np.mean(np.abs(hyp[valid] - ref[valid])) if valid.any() else None}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("USAGE: bench_pitch.py WAVFILE [WAVFILE ...]")
+        sys.exit()
+
+    times = {"praat": 0.0, "numpy": 0.0}
+    print("%-30s %7s %9s %9s %9s %9s" % ("file", "frames", "voicing", "gross", "st_mean", "db_mean"))
+    for fn in sys.argv[1:]:
+        ptime, pf0 = extract(tfuncs_praat, "get_f0", fn)
+        ntime, nf0 = extract(tfuncs_numpy, "get_f0", fn)
+        times["praat"] += ptime
+        times["numpy"] += ntime
+        ptime, pint = extract(tfuncs_praat, "get_intensity", fn)
+        ntime, nint = extract(tfuncs_numpy, "get_intensity", fn)
+        times["praat"] += ptime
+        times["numpy"] += ntime
+        f0stats = compare_f0(pf0, nf0)
+        intstats = compare_intensity(pint, nint)
+        print("%-30s %7s %9s %9s %9s %9s" % (pf0.name[:30], f0stats["frames"],
+                                             "%.3f" % f0stats["voicing_agreement"] if f0stats["voicing_agreement"] is not None else "-",
+                                             "%.3f" % f0stats["gross_errors"] if f0stats["gross_errors"] is not None else "-",
+                                             "%.3f" % f0stats["st_mean"] if f0stats["st_mean"] is not None else "-",
+                                             "%.2f" % intstats["db_mean"] if intstats["db_mean"] is not None else "-"))
+    print("total time: praat %.2fs numpy %.2fs" % (times["praat"], times["numpy"]))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Benchmark Phoneset.syllabify for the phonesets of all voices in
+    ttslab/voices on random phone sequences against a reference
+    implementation (reference_syllabify: the original, uncached
+    implementations): uncached (first pass) and cached (second pass),
+    checking that all results agree...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import sys
+import time
+import random
+import inspect
+import importlib
+import re
+
+import ttslab.voices
+from ttslab.phoneset import Phoneset
+
+#Rule used for syllabic consonants by the original (Barnard)
+#implementations, default "always" (Nguni):
+SYLLABICCONSONANT_RULES = {"LwaziSothoPhoneset": "before_consonant",
+                           "BambaraPhoneset": "before_consonant_in_cluster",
+                           "BomuPhoneset": "before_consonant_in_cluster",
+                           "YorubaPhoneset": "before_consonant_in_cluster"}
+
+def reference_syllabify(phoneset, phonelist):
+    """ The original syllabify implementations of the voices in
+        ttslab/voices...
+    """
+    if "syllable_clusters" in phoneset.features:
+        return _reference_syllabify_clusters(phoneset, phonelist)
+    return _reference_syllabify_barnard(phoneset, phonelist,
+                                        SYLLABICCONSONANT_RULES.get(phoneset.__class__.__name__, "always"))
+
+def _reference_syllabify_barnard(phoneset, phonelist, scrule):
+    """ Syllabification scheme by Etienne Barnard for isiZulu (Nguni
+        language) and its variants...
+    """
+    sylls = [[]]
+    phlist = list(phonelist)
+    while phlist:
+        phone = phlist[0]
+        if phoneset.is_syllabicconsonant(phone):
+            if (scrule == "always" or
+                (scrule == "before_consonant" and len(phlist) > 1 and phoneset.is_consonant(phlist[1])) or
+                (scrule == "before_consonant_in_cluster" and len(phlist) > 2 and phoneset.is_consonant(phlist[1]))):
+                #sC.Any or sC.C
+                sylls[-1].append(phlist.pop(0))
+                if phlist: sylls.append([])
+                continue
+        try:
+            nphone = phlist[1]
+            nnphone = phlist[2]
+            #If there is a three phone cluster:
+            if (phoneset.is_vowel(phone) and
+                not phoneset.is_vowel(nphone) and
+                not phoneset.is_vowel(nnphone)):
+                #VC.C
+                sylls[-1].append(phlist.pop(0))#phone
+                sylls[-1].append(phlist.pop(0))#nphone
+                if phlist: sylls.append([])
+                continue
+        except IndexError:
+            pass
+        if phoneset.is_vowel(phone):
+            #V.Any
+            sylls[-1].append(phlist.pop(0))
+            if phlist: sylls.append([])
+            continue
+        #anything not caught above is added to current syl...
+        sylls[-1].append(phlist.pop(0))
+    return sylls
+
+def _reference_syllabify_clusters(phoneset, phonelist):
+    """ Syllabification by applying features["syllable_clusters"] in
+        order to a string of phone classes (English and Afrikaans)...
+    """
+    plist = list(phonelist)
+    classstr = ""
+    for phone in plist:
+        if phoneset.is_vowel(phone):
+            classstr += "V"
+        elif phoneset.is_glide(phone):
+            classstr += "G"
+        else:
+            classstr += "C"
+    try:
+        if (phoneset.is_syllabicconsonant(plist[-1]) and
+            phoneset.is_obstruent(plist[-2])):
+            classstr = classstr[:-1] + "V"
+        if (phoneset.is_syllabicconsonant(plist[-1]) and
+            phoneset.is_nasal(plist[-2])):
+            classstr = classstr[:-1] + "V"
+    except IndexError:
+        pass
+    for cluster in phoneset.features["syllable_clusters"]:
+        match = re.search(cluster, classstr)
+        while match:
+            clustersylstr = phoneset._process_cluster(cluster, plist, match)
+            start, end = match.span()
+            classstr = clustersylstr.join([classstr[:start], classstr[end:]])
+            plist = (plist[:match.start() + clustersylstr.index(".")] +
+                     [""] + plist[match.start() + clustersylstr.index("."):])
+            match = re.search(cluster, classstr)
+    sylls = [[]]
+    index = 0
+    for char in classstr:
+        if char != ".":
+            sylls[-1].append(phonelist[index])
+            index += 1
+        else:
+            sylls.append([])
+    return sylls
+
+
+def phonesets():
+    voicesdir = os.path.dirname(ttslab.voices.__file__)
+    for fn in sorted(os.listdir(voicesdir)):
+        if not fn.endswith("_default.py"):
+            continue
+        modname = "ttslab.voices." + fn[:-len(".py")]
+        try:
+            module = importlib.import_module(modname)
+        except ImportError as e:
+            print("Skipping %s (%s)" % (modname, e), file=sys.stderr)
+            continue
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, Phoneset) and cls.__module__ == modname and "syllabify" in cls.__dict__:
+                yield name, cls()
+
+def timeit(syllabify, words):
+    starttime = time.time()
+    results = [syllabify(word) for word in words]
+    return time.time() - starttime, results
+
+
+if __name__ == "__main__":
+    try:
+        numwords = int(sys.argv[1])
+    except IndexError:
+        numwords = 50000
+    random.seed(1)
+
+    mismatches = 0
+    print("%-30s %12s %12s %12s %10s" % ("phoneset", "ref (s)", "uncached (s)", "cached (s)", "mismatches"))
+    for name, phoneset in phonesets():
+        phones = sorted([ph for ph in phoneset if ph != phoneset.features.get("silence_phone")])
+        words = [[random.choice(phones) for i in range(random.randint(1, 12))] for j in range(numwords)]
+        phoneset.clear_caches()
+        reftime, reference = timeit(lambda word: reference_syllabify(phoneset, word), words)
+        uncachedtime, uncached = timeit(phoneset.syllabify, words)
+        cachedtime, cached = timeit(phoneset.syllabify, words)
+        wrong = [word for word, a, b, c in zip(words, reference, uncached, cached) if not a == b == c]
+        mismatches += len(wrong)
+        print("%-30s %12.3f %12.3f %12.3f %10s" % (name, reftime, uncachedtime, cachedtime, len(wrong)))
+        for word in wrong[:5]:
+            print("\t" + " ".join(word))
+    if mismatches:
+        sys.exit(1)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Load generator to measure latency and throughput of the TTS
+    server by replaying a text corpus (one utterance per line) at a
+    given concurrency and request rate...
+
+    Can either target a running server or start one in-process with
+    a stub voice (to measure the server overhead itself) or with a
+    pickled voice.
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import sys
+import time
+import json
+import socket
+import codecs
+import threading
+from optparse import OptionParser
+try:
+    import Queue as queue #Py2
+except ImportError:
+    import queue
+
+from client import TTSClient, TTSRequestError, DEF_HOST, DEF_PORT
+
+NAME = "benchmark.py"
+STUB_VOICENAME = "stub"
+STUB_SECSPERCHAR = 0.06 #length of stub audio relative to text
+
+class StubVoice(object):
+    """ Stands in for a real voice: returns silence with duration
+        proportional to the length of the input text...
+    """
+    def __init__(self, samplerate=16000, secsperchar=STUB_SECSPERCHAR):
+        self.samplerate = samplerate
+        self.secsperchar = secsperchar
+
+    def synthesize(self, inputstring, processname="text-to-wave", deadline=None):
+        import numpy as np
+        from ttslab.hrg import Utterance
+        from ttslab.waveform import Waveform
+        utt = Utterance(self)
+        utt["text"] = inputstring
+        w = Waveform()
+        w.samplerate = self.samplerate
+        w.samples = np.zeros(int(len(inputstring) * self.secsperchar * self.samplerate), dtype=np.int16)
+        w.channels = 1
+        utt["waveform"] = w
+        return utt
+
+
+class BenchmarkClient(TTSClient):
+    """ TTSClient that also records the time-to-first-byte of the
+        last reply...
+    """
+    def send(self, message):
+        self.last_ttfb = None
+        self.starttime = time.time()
+        return TTSClient.send(self, message)
+
+    def firstbyte(self):
+        self.last_ttfb = time.time() - self.starttime
+
+
+def start_local_server(port, voice_location=None):
+    """ Start a TTSServer in a daemon thread serving either the stub
+        voice or the voice pickled at voice_location...
+    """
+    import server
+    tts_server = server.TTSServer(lport=port)
+    if voice_location is None:
+        with tts_server.voiceslock:
+            tts_server.voices[STUB_VOICENAME] = StubVoice()
+    else:
+        tts_server.loadvoice(STUB_VOICENAME, voice_location)
+    t = threading.Thread(target=tts_server.run)
+    t.daemon = True
+    t.start()
+    return tts_server
+
+
+def percentile(values, p):
+    """ Nearest-rank percentile of a list of values...
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(round(p / 100.0 * len(values) + 0.5)) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+def summarise(results, walltime):
+    latencies = [r["latency"] for r in results if r["error"] is None]
+    ttfbs = [r["ttfb"] for r in results if r["error"] is None]
+    numerrors = len([r for r in results if r["error"] is not None])
+    summary = {"requests": len(results),
+               "errors": numerrors,
+               "error_rate": numerrors / len(results) if results else None,
+               "walltime": walltime,
+               "throughput": len(latencies) / walltime if walltime else None,
+               "latency_mean": sum(latencies) / len(latencies) if latencies else None}
+    for p in [50, 95, 99]:
+        summary["latency_p%s" % p] = percentile(latencies, p)
+        summary["ttfb_p%s" % p] = percentile(ttfbs, p)
+    return summary
+
+
+def run(texts, voicename, host, port, concurrency, rate, timeout=None):
+    """ Replays 'texts' against the server. If 'rate' (requests per
+        second) is given, requests are scheduled at fixed intervals
+        and latency is measured from the scheduled time (so that
+        queueing delay is included), else each worker sends its next
+        request as soon as the previous one completes...
+    """
+    jobs = queue.Queue()
+    results = []
+    resultslock = threading.Lock()
+
+    def worker():
+        client = BenchmarkClient(host, port)
+        while True:
+            try:
+                i, text, scheduled = jobs.get_nowait()
+            except queue.Empty:
+                return
+            if scheduled is not None:
+                time.sleep(max(0.0, scheduled - time.time()))
+            starttime = time.time()
+            error = None
+            try:
+                riffwavestr = client.synth(voicename, text, timeout=timeout)
+                if not riffwavestr:
+                    error = "failed"
+            except TTSRequestError as e:
+                error = unicode(e) #Py2
+            except socket.error as e:
+                error = "socket: %s" % e
+            endtime = time.time()
+            result = {"index": i,
+                      "chars": len(text),
+                      "latency": endtime - (scheduled or starttime),
+                      "ttfb": client.last_ttfb if error is None else None,
+                      "error": error}
+            with resultslock:
+                results.append(result)
+
+    starttime = time.time()
+    for i, text in enumerate(texts):
+        if rate:
+            jobs.put((i, text, starttime + i / rate))
+        else:
+            jobs.put((i, text, None))
+    threads = [threading.Thread(target=worker) for j in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    walltime = time.time() - starttime
+    results.sort(key=lambda r: r["index"])
+    return results, walltime
+
+
+def print_summary(summary, previous=None):
+    keys = ["requests", "errors", "error_rate", "walltime", "throughput", "latency_mean",
+            "latency_p50", "latency_p95", "latency_p99", "ttfb_p50", "ttfb_p95", "ttfb_p99"]
+    for k in keys:
+        line = "%-14s %s" % (k + ":", summary[k])
+        if previous is not None and k in previous:
+            line += "\t(previous: %s)" % previous[k]
+        print(line)
+
+
+def setopts():
+    """ Setup all possible command line options....
+    """
+    usage = 'USAGE: %s [options] CORPUSFILE' % (NAME)
+    parser = OptionParser(usage=usage)
+    parser.add_option("-v",
+                      "--voicename",
+                      dest="voicename",
+                      default=STUB_VOICENAME,
+                      help="Voice to request from the server. [%default]",
+                      metavar="VOICENAME")
+    parser.add_option("-p",
+                      "--port",
+                      type="int",
+                      dest="port",
+                      default=DEF_PORT,
+                      help="Specify the port number to connect to. [%default]",
+                      metavar="PORTNUM")
+    parser.add_option("-a",
+                      "--address",
+                      dest="host",
+                      default=DEF_HOST,
+                      help="Specify the host address to connect to. [%default]",
+                      metavar="HOSTADDRESS")
+    parser.add_option("-c",
+                      "--concurrency",
+                      type="int",
+                      dest="concurrency",
+                      default=4,
+                      help="Number of concurrent connections. [%default]",
+                      metavar="NUM")
+    parser.add_option("-r",
+                      "--rate",
+                      type="float",
+                      dest="rate",
+                      default=None,
+                      help="Request rate per second (default: as fast as possible).",
+                      metavar="RPS")
+    parser.add_option("-n",
+                      "--numrequests",
+                      type="int",
+                      dest="numrequests",
+                      default=None,
+                      help="Number of requests (corpus is cycled), default: one pass over corpus.",
+                      metavar="NUM")
+    parser.add_option("-t",
+                      "--timeout",
+                      type="float",
+                      dest="timeout",
+                      default=None,
+                      help="Synthesis timeout requested from the server.",
+                      metavar="SECONDS")
+    parser.add_option("-s",
+                      "--startserver",
+                      action="store_true",
+                      dest="startserver",
+                      help="Start a local server with the stub voice (or VOICELOCATION if given).")
+    parser.add_option("-l",
+                      "--voicelocation",
+                      dest="voice_location",
+                      default=None,
+                      help="Voice pickle to load in the local server.",
+                      metavar="VOICELOCATION")
+    parser.add_option("-o",
+                      "--output",
+                      dest="outputfilename",
+                      default=None,
+                      help="Save results to JSON file.",
+                      metavar="JSONFILE")
+    parser.add_option("-L",
+                      "--label",
+                      dest="label",
+                      default="",
+                      help="Label stored with results (e.g. version).",
+                      metavar="LABEL")
+    parser.add_option("-C",
+                      "--compare",
+                      dest="comparefilename",
+                      default=None,
+                      help="Print summary alongside results from a previous run.",
+                      metavar="JSONFILE")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = setopts()
+    opts, args = parser.parse_args()
+
+    if len(args) != 1:
+        parser.print_usage()
+        sys.exit()
+
+    with codecs.open(args[0], encoding="utf-8") as infh:
+        corpus = [line.strip() for line in infh if line.strip()]
+    numrequests = opts.numrequests or len(corpus)
+    texts = [corpus[i % len(corpus)] for i in range(numrequests)]
+
+    if opts.startserver:
+        start_local_server(opts.port, opts.voice_location)
+        time.sleep(0.5) #allow server to start listening
+
+    results, walltime = run(texts, opts.voicename, opts.host, opts.port,
+                            opts.concurrency, opts.rate, opts.timeout)
+    summary = summarise(results, walltime)
+
+    previous = None
+    if opts.comparefilename:
+        with open(opts.comparefilename) as infh:
+            previous = json.load(infh)["summary"]
+    print_summary(summary, previous)
+
+    if opts.outputfilename:
+        output = {"label": opts.label,
+                  "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "options": {"voicename": opts.voicename,
+                              "concurrency": opts.concurrency,
+                              "rate": opts.rate,
+                              "numrequests": numrequests,
+                              "corpus": args[0],
+                              "localserver": bool(opts.startserver)},
+                  "summary": summary,
+                  "results": results}
+        with open(opts.outputfilename, "w") as outfh:
+            json.dump(output, outfh, indent=1)
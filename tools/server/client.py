@@ -22,6 +22,9 @@ NAME = "client.py"
 DEF_HOST = "localhost"
 DEF_PORT = 22223
 
+class TTSRequestError(Exception):
+    pass
+
 class TTSClient(object):
     END_OF_MESSAGE_STRING = b"<EoM>"
 
@@ -30,11 +33,23 @@ class TTSClient(object):
         self.port = port
         self.recv_size = recv_size
 
-    def request(self, requesttype, voicename=None, text=None):
+    def request(self, requesttype, voicename=None, text=None, **kwargs):
         #create message
         message = {"type": requesttype,
                    "voicename": voicename,
                    "text": text}
+        message.update(kwargs)
+        s = self.send(message)
+        msgfull = self.receive(s)
+        #close connection..
+        s.close()
+        #recover reply..
+        reply = json.loads(msgfull)
+        return reply
+
+    def send(self, message):
+        """ Connect and send request message, returns the socket...
+        """
         fulls = json.dumps(message)
         #create a socket
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -43,26 +58,53 @@ class TTSClient(object):
         #send..
         s.sendall(fulls)
         s.sendall(TTSClient.END_OF_MESSAGE_STRING)
-        #read confirmation..
+        return s
+
+    def receive(self, s):
+        """ Read the full reply (until the server closes the
+            connection), calling firstbyte() on arrival of the first
+            part...
+        """
         msgfull = b""
         while True:
             msgpart = s.recv(self.recv_size)
             if msgpart:
+                if not msgfull:
+                    self.firstbyte()
                 msgfull += msgpart
             else:
                 break
-        #close connection..
-        s.close()
-        #recover reply..
-        reply = json.loads(msgfull)
-        return reply
+        return msgfull
 
-    def synth(self, voicename, text):
-        return b64decode(self.request("synth", voicename, text))
+    def firstbyte(self):
+        """ Hook called when the first part of a reply arrives...
+        """
+        pass
+
+    def synth(self, voicename, text, timeout=None):
+        """ Raises TTSRequestError if the server reports an error
+            (e.g. "timeout")...
+        """
+        reply = self.request("synth", voicename, text, timeout=timeout)
+        if isinstance(reply, dict):
+            raise TTSRequestError(reply["error"])
+        return b64decode(reply)
 
     def listvoices(self):
         return self.request("listvoices")
 
+    def loadvoice(self, voicename, voice_location):
+        """ voice_location is the path to the voice pickle on the
+            server's filesystem...
+        """
+        return self.request("loadvoice", voicename, voice_location=voice_location)
+
+    def reloadvoice(self, voicename):
+        return self.request("reloadvoice", voicename)
+
+    def unloadvoice(self, voicename):
+        return self.request("unloadvoice", voicename)
+
 
 def setopts():
     """ Setup all possible command line options....
@@ -94,11 +136,34 @@ def setopts():
                       default=DEF_HOST,
                       help="Specify the host address to connect to. [%default]",
                       metavar="HOSTADDRESS")
+    parser.add_option("-t",
+                      "--timeout",
+                      type="float",
+                      dest="timeout",
+                      default=None,
+                      help="Maximum time in seconds the server may spend on synthesis.",
+                      metavar="SECONDS")
     parser.add_option("-l",
                       "--listvoices",
                       action="store_true",
                       dest="listvoices",
                       help="Request a list of loaded voices from the server.")
+    parser.add_option("-L",
+                      "--loadvoice",
+                      dest="voice_location",
+                      default=None,
+                      help="Load voice VOICENAME from pickle on the server (replaces existing voice).",
+                      metavar="VOICELOCATION")
+    parser.add_option("-R",
+                      "--reloadvoice",
+                      action="store_true",
+                      dest="reloadvoice",
+                      help="Reload voice VOICENAME from its original location on the server.")
+    parser.add_option("-U",
+                      "--unloadvoice",
+                      action="store_true",
+                      dest="unloadvoice",
+                      help="Unload voice VOICENAME from the server.")
     return parser
 
 
@@ -107,7 +172,14 @@ if __name__ == "__main__":
     parser = setopts()
     opts, args = parser.parse_args()
 
-    if not opts.listvoices:
+    adminrequest = opts.voice_location or opts.reloadvoice or opts.unloadvoice
+    if adminrequest:
+        if len(args) == 1:
+            voicename = args[0]
+        else:
+            parser.print_usage()
+            sys.exit()
+    elif not opts.listvoices:
         if len(args) == 1 and opts.textfilename:
             voicename = args[0]
             with codecs.open(opts.textfilename, "r", encoding="utf-8") as infh:
@@ -123,11 +195,24 @@ if __name__ == "__main__":
     
     client = TTSClient(host, port)
     
-    if opts.listvoices:
+    if adminrequest:
+        if opts.voice_location:
+            success = client.loadvoice(voicename, opts.voice_location)
+        elif opts.reloadvoice:
+            success = client.reloadvoice(voicename)
+        else:
+            success = client.unloadvoice(voicename)
+        if not success:
+            print("Request failed...")
+    elif opts.listvoices:
         voicelist = client.listvoices()
         print("\n".join(voicelist))
     else:
-        riffwavestr = client.synth(voicename, text)
+        try:
+            riffwavestr = client.synth(voicename, text, timeout=opts.timeout)
+        except TTSRequestError as e:
+            print("Synthesis failed: %s" % e)
+            sys.exit(1)
         if riffwavestr:
             if opts.audiofilename:
                 with open(opts.audiofilename, "wb") as outfh:
@@ -14,8 +14,10 @@ import json
 from base64 import b64encode
 import threading
 import logging
+import time
 
 import ttslab
+from ttslab.uttprocessor import DeadlineExceeded
 
 NAME = "server.py"
 DEF_LOG = os.path.join(os.environ.get("HOME"), ".ttslab/server.log")
@@ -23,12 +25,22 @@ DEF_LOGLEVEL = 20
 
 END_OF_MESSAGE_STRING = b"<EoM>"
 DEFAULT_PORT = 22223
+DEF_SYNTH_TIMEOUT = 60.0 #seconds, requests may ask for less
+#admin requests (loading/unloading voices) are only accepted from these:
+DEF_ADMIN_HOSTS = ("127.0.0.1",)
+
+log = logging.getLogger(NAME)
 
 class TTSServer(object):
     
-    def __init__(self, voicename=None, lport=DEFAULT_PORT):
+    def __init__(self, voicename=None, lport=DEFAULT_PORT, adminhosts=DEF_ADMIN_HOSTS):
 
         self.voices = {}
+        self.voicelocations = {}
+        #guards swapping of entries in self.voices, voices themselves
+        #are never modified once loaded:
+        self.voiceslock = threading.Lock()
+        self.adminhosts = adminhosts
         if voicename is not None:
             self.loadvoice(voicename)
         self._socksetup(lport)
@@ -36,12 +48,62 @@ class TTSServer(object):
         log.info("Server initialised.")
 
     def loadvoice(self, name, voice_location):
+        """ Load voice from pickle and (atomically) make it available
+            as 'name', replacing any voice currently loaded under that
+            name. Requests already being processed keep a reference to
+            the voice they started with and finish on it...
+        """
         log.info("Loading voice from file '%s'" % (voice_location))
-        self.voices[name] = ttslab.fromfile(voice_location)
-        log.info("Voice '%s' loaded." % (name))
+        voice = ttslab.fromfile(voice_location) #slow: do this outside the lock
+        with self.voiceslock:
+            replaced = name in self.voices
+            self.voices[name] = voice
+            self.voicelocations[name] = voice_location
+        if replaced:
+            log.info("Voice '%s' replaced." % (name))
+        else:
+            log.info("Voice '%s' loaded." % (name))
+
+    def reloadvoice(self, name):
+        """ Load voice 'name' again from its original location...
+        """
+        with self.voiceslock:
+            voice_location = self.voicelocations[name]
+        self.loadvoice(name, voice_location)
+
+    def unloadvoice(self, name):
+        """ Remove voice from the server, memory is released once the
+            last request using it has completed...
+        """
+        with self.voiceslock:
+            del self.voices[name]
+            del self.voicelocations[name]
+        log.info("Voice '%s' unloaded." % (name))
+
+    def getvoice(self, name):
+        with self.voiceslock:
+            return self.voices[name]
 
     def getvoicelist(self):
-        return self.voices.keys()
+        with self.voiceslock:
+            return list(self.voices.keys())
+
+    def admin(self, requestmsg):
+        """ Handle requests to load, reload or unload voices while
+            running. Returns True if successful...
+        """
+        log.info("Admin request: %s" % requestmsg)
+        try:
+            if requestmsg["type"] == "loadvoice":
+                self.loadvoice(requestmsg["voicename"], requestmsg["voice_location"])
+            elif requestmsg["type"] == "reloadvoice":
+                self.reloadvoice(requestmsg["voicename"])
+            elif requestmsg["type"] == "unloadvoice":
+                self.unloadvoice(requestmsg["voicename"])
+        except Exception as e:
+            log.error("Admin request failed: %s" % e)
+            return False
+        return True
 
     def _socksetup(self, lport):
         self.lsocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -65,18 +127,26 @@ class TTSServer(object):
             c.join()
         
     def synth(self, requestmsg):
+        """ Raises DeadlineExceeded if synthesis takes longer than the
+            requested (or default) timeout...
+        """
         log.info("Synthesis request: %s" % requestmsg)
+        timeout = min(requestmsg.get("timeout") or DEF_SYNTH_TIMEOUT, DEF_SYNTH_TIMEOUT)
         try:
-            utt = self.voices[requestmsg["voicename"]].synthesize(requestmsg["text"], "text-to-wave")
+            voice = self.getvoice(requestmsg["voicename"])
+            utt = voice.synthesize(requestmsg["text"], "text-to-wave", deadline=time.time() + timeout)
+        except DeadlineExceeded:
+            log.error("Synthesis timed out after %s seconds." % timeout)
+            raise
         except:
             log.error("Synthesis failed.")
             return b""
         log.info("Synthesis successful.")
-        with open("stest.wav", "wb") as outfh:
-            outfh.write(utt["waveform"].riffstring())
         return utt["waveform"].riffstring()
 
 class TTSHandler(threading.Thread): 
+    ADMIN_REQUESTS = ("loadvoice", "reloadvoice", "unloadvoice")
+
     def __init__(self, sock_addr, tts_server): 
         threading.Thread.__init__(self) 
         self.csocket, self.address = sock_addr
@@ -88,10 +158,22 @@ class TTSHandler(threading.Thread):
         request = self.rx_req()
         if request["type"] == "synth":
             log.info("Synthesis request received successfully.")
-            reply = b64encode(self.tts_server.synth(request))
+            try:
+                reply = b64encode(self.tts_server.synth(request))
+            except DeadlineExceeded:
+                reply = {"error": "timeout"}
         elif request["type"] == "listvoices":
             log.info("Listvoices request received successfully.")
             reply = self.tts_server.getvoicelist()
+        elif request["type"] in TTSHandler.ADMIN_REQUESTS:
+            if self.address[0] in self.tts_server.adminhosts:
+                reply = self.tts_server.admin(request)
+            else:
+                log.warning("Admin request from %s refused." % (self.address[0]))
+                reply = False
+        else:
+            log.error("Unknown request type: %s" % request["type"])
+            reply = None
         self.tx_reply(reply)
         log.info("Reply sent successfully.")
         #remove self from tts_server thread list...                 
@@ -132,7 +214,6 @@ if __name__ == "__main__":
     #setup logging...
     try:
         fmt = "%(asctime)s [%(levelname)s] %(message)s"
-        log = logging.getLogger(NAME)
         formatter = logging.Formatter(fmt)
         ofstream = logging.FileHandler(DEF_LOG, "a")
         ofstream.setFormatter(formatter)
@@ -146,7 +227,8 @@ if __name__ == "__main__":
         print("ERROR: Could not create logging instance.\n\tReason: %s" %e)
         sys.exit(1)
 
-    #start server
+    #start server (all voices in the config are loaded before
+    #serving, further voices can be loaded using admin requests):
     tts_server = TTSServer()
     for voicename in config.sections():
         # print("Loading: " + voicename, end='')
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Run a voice process (e.g. "text-to-segments" or "text-to-label")
+    over a corpus of prompts in a pool of worker processes, writing
+    utterances (pickles) and HTS labels to an output directory...
+
+    Progress is kept in a manifest in the output directory so that an
+    interrupted run can be resumed by running the same command again.
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import re
+import sys
+import time
+import codecs
+import multiprocessing
+from optparse import OptionParser
+
+import ttslab
+
+NAME = "corpus.py"
+DEF_PROCESSNAME = "text-to-label"
+DEF_CHUNKSIZE = 20 #prompts
+UTT_DIR = "utts"
+UTT_EXT = ".utt.pickle"
+LAB_DIR = "labs"
+LAB_EXT = ".lab"
+MANIFEST_FILE = "manifest.txt"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+FESTIVAL_PROMPT_PAT = re.compile(r'^\(\s*(?P<uttid>\S+)\s+"(?P<text>.*)"\s*\)\s*$', re.UNICODE)
+
+def load_prompts(location, ext=".txt"):
+    """ Returns a list of (uttid, text) from either a directory
+        (one prompt per file, uttid is the basename) or a text file
+        with lines in Festival prompt format ( uttid "text" ) or
+        simply "uttid text" (raises ValueError on lines without
+        text)...
+    """
+    prompts = []
+    if os.path.isdir(location):
+        for fn in sorted(os.listdir(location)):
+            if fn.endswith(ext):
+                with codecs.open(os.path.join(location, fn), encoding="utf-8") as infh:
+                    prompts.append((fn[:-len(ext)], infh.read().strip()))
+        return prompts
+    with codecs.open(location, encoding="utf-8") as infh:
+        for lineno, line in enumerate(infh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            m = FESTIVAL_PROMPT_PAT.match(line)
+            if m:
+                prompts.append((m.group("uttid"), m.group("text")))
+            else:
+                try:
+                    uttid, text = line.split(None, 1)
+                except ValueError:
+                    raise ValueError("%s:%s: prompt has no text: %s" % (location, lineno, line))
+                prompts.append((uttid, text))
+    return prompts
+
+
+MANIFEST_ESCAPES = [("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")]
+MANIFEST_UNESCAPE_PAT = re.compile(r"\\(.)", re.UNICODE)
+
+def escape_field(field):
+    """ Escape backslashes, tabs and newlines in a manifest field
+        (e.g. exception messages)...
+    """
+    for c, escaped in MANIFEST_ESCAPES:
+        field = field.replace(c, escaped)
+    return field
+
+
+def unescape_field(field):
+    unescapes = dict([(escaped[1], c) for c, escaped in MANIFEST_ESCAPES])
+    return MANIFEST_UNESCAPE_PAT.sub(lambda m: unescapes.get(m.group(1), m.group(0)), field)
+
+
+def read_manifest(outdir):
+    """ Returns dict: uttid -> status of previously processed prompts...
+    """
+    done = {}
+    try:
+        with codecs.open(os.path.join(outdir, MANIFEST_FILE), encoding="utf-8") as infh:
+            for line in infh:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    done[unescape_field(fields[0])] = fields[1]
+    except IOError:
+        pass
+    return done
+
+
+_worker_voice = None
+
+def _init_worker(voicefile):
+    global _worker_voice
+    _worker_voice = ttslab.fromfile(voicefile)
+
+def _process_chunk(args):
+    """ Synthesize a chunk of prompts and write outputs, returns
+        [(uttid, status, message), ...]...
+    """
+    prompts, processname, outdir, saveutts = args
+    results = []
+    for uttid, text in prompts:
+        try:
+            utt = _worker_voice.synthesize(text, processname)
+            utt["file_id"] = uttid
+            if saveutts:
+                ttslab.tofile(utt, os.path.join(outdir, UTT_DIR, uttid + UTT_EXT))
+            if utt["hts_label"] is not None:
+                with codecs.open(os.path.join(outdir, LAB_DIR, uttid + LAB_EXT), "w", encoding="utf-8") as outfh:
+                    outfh.write("\n".join(utt["hts_label"]) + "\n")
+            results.append((uttid, STATUS_OK, ""))
+        except Exception as e:
+            results.append((uttid, STATUS_ERROR, "%s: %s" % (e.__class__.__name__, e)))
+    return results
+
+
+def run(voicefile, prompts, outdir, processname=DEF_PROCESSNAME, workers=1,
+        chunksize=DEF_CHUNKSIZE, saveutts=True, retryerrors=False, logfh=sys.stderr):
+    """ Process all prompts not already done according to the manifest
+        in 'outdir', returns dict with counts and timing...
+    """
+    for dirname in [outdir, os.path.join(outdir, UTT_DIR), os.path.join(outdir, LAB_DIR)]:
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+    done = read_manifest(outdir)
+    todo = [(uttid, text) for uttid, text in prompts
+            if done.get(uttid) != STATUS_OK and (retryerrors or uttid not in done)]
+    chunks = [(todo[i:i+chunksize], processname, outdir, saveutts) for i in range(0, len(todo), chunksize)]
+    print("%s prompts, %s already processed, %s to do" % (len(prompts), len(prompts) - len(todo), len(todo)), file=logfh)
+
+    counts = {STATUS_OK: 0, STATUS_ERROR: 0}
+    starttime = time.time()
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(voicefile,))
+        chunkresults = pool.imap_unordered(_process_chunk, chunks)
+    else:
+        pool = None
+        _init_worker(voicefile)
+        chunkresults = (_process_chunk(chunk) for chunk in chunks)
+    try:
+        with codecs.open(os.path.join(outdir, MANIFEST_FILE), "a", encoding="utf-8") as manifestfh:
+            for results in chunkresults:
+                for uttid, status, message in results:
+                    counts[status] += 1
+                    manifestfh.write("\t".join([escape_field(uttid), status, escape_field(message)]) + "\n")
+                    if status != STATUS_OK:
+                        print("ERROR: %s: %s" % (uttid, message), file=logfh)
+                manifestfh.flush()
+                elapsed = time.time() - starttime
+                numdone = counts[STATUS_OK] + counts[STATUS_ERROR]
+                rate = numdone / elapsed if elapsed else 0.0
+                eta = (len(todo) - numdone) / rate if rate else 0.0
+                print("%s/%s done (%s errors), %.2f utts/s, ETA %.0fs" % (numdone, len(todo), counts[STATUS_ERROR], rate, eta), file=logfh)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    elapsed = time.time() - starttime
+    return {"total": len(prompts),
+            "skipped": len(prompts) - len(todo),
+            "ok": counts[STATUS_OK],
+            "errors": counts[STATUS_ERROR],
+            "walltime": elapsed,
+            "throughput": (counts[STATUS_OK] + counts[STATUS_ERROR]) / elapsed if elapsed else None}
+
+
+def setopts():
+    """ Setup all possible command line options....
+    """
+    usage = 'USAGE: %s [options] VOICEFILE PROMPTS OUTDIR\n\n\tPROMPTS is a text file or directory of *.txt files' % (NAME)
+    parser = OptionParser(usage=usage)
+    parser.add_option("-p",
+                      "--process",
+                      dest="processname",
+                      default=DEF_PROCESSNAME,
+                      help="Voice process to run. [%default]",
+                      metavar="PROCESSNAME")
+    parser.add_option("-w",
+                      "--workers",
+                      type="int",
+                      dest="workers",
+                      default=multiprocessing.cpu_count(),
+                      help="Number of worker processes. [%default]",
+                      metavar="NUM")
+    parser.add_option("-c",
+                      "--chunksize",
+                      type="int",
+                      dest="chunksize",
+                      default=DEF_CHUNKSIZE,
+                      help="Prompts per work unit. [%default]",
+                      metavar="NUM")
+    parser.add_option("-n",
+                      "--noutts",
+                      action="store_false",
+                      dest="saveutts",
+                      default=True,
+                      help="Don't save utterances (only labels).")
+    parser.add_option("-r",
+                      "--retryerrors",
+                      action="store_true",
+                      dest="retryerrors",
+                      default=False,
+                      help="Also redo prompts that failed in a previous run.")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = setopts()
+    opts, args = parser.parse_args()
+
+    if len(args) != 3:
+        parser.print_usage()
+        sys.exit()
+    voicefile, promptslocation, outdir = args
+
+    summary = run(voicefile, load_prompts(promptslocation), outdir,
+                  opts.processname, opts.workers, opts.chunksize,
+                  opts.saveutts, opts.retryerrors)
+    for k in ["total", "skipped", "ok", "errors", "walltime", "throughput"]:
+        print("%-11s %s" % (k + ":", summary[k]))
+    if summary["errors"]:
+        sys.exit(1)
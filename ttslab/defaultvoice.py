@@ -24,8 +24,9 @@ import unicodedata
 import ttslab
 from . g2p import G2P_Rewrites_Semicolon, GraphemeNotDefined, NoRuleFound
 from . pronundict import PronunLookupError
+from . pronuncache import PronunciationCache, resourcestamp
 from . voice import *
-from . tokenizers import DefaultTokenizer
+from . tokenizers import DefaultTokenizer, anycharsin, sentences, DEF_MAXTOKENS
 
 class DefaultVoice(Voice):
     """ Creating this to implement some of the more generic
@@ -58,6 +59,26 @@ class DefaultVoice(Voice):
         self.g2p = None
         self.pronundict = None
         self.pronunaddendum = None
+        self.pronuncache = PronunciationCache()
+
+    def _pronunresources(self):
+        """ Resources which determine word pronunciations (the
+            pronunciation cache is cleared when any of these change)...
+        """
+        return (self.pronundict, self.pronunaddendum, self.g2p, self.phoneset)
+
+    def get_pronuncache(self):
+        """ Returns the pronunciation cache after making sure that it
+            is still valid. Note: in-place edits to existing entries of
+            pronunciation resources are not detected, call
+            self.pronuncache.clear() after doing this...
+        """
+        try:
+            pronuncache = self.pronuncache
+        except AttributeError: #voice pickled before caching was added
+            pronuncache = self.pronuncache = PronunciationCache()
+        pronuncache.validate(tuple([resourcestamp(r) for r in self._pronunresources()]))
+        return pronuncache
     
     #################### Lower level methods...
     def normalizer(self, utt, processname):
@@ -84,12 +105,6 @@ class DefaultVoice(Voice):
     def phrasifier(self, utt, processname):
         """ Determine phrases/phrase breaks in the utterance...
         """
-        def anycharsin(s, stemplate):
-            for c in s:
-                if c in stemplate:
-                    return True
-            return False
-
         word_rel = utt.get_relation("Word")
         punctuation = self.PHRASING_PUNCTUATION
         phrase_rel = utt.new_relation("Phrase")
@@ -107,58 +122,70 @@ class DefaultVoice(Voice):
         return utt
 
 
-    def phonetizer(self, utt, processname):
-        """ Applies G2P and Syllabification from 'Word' relation...
+    def pronounce(self, wordname, pos=None):
+        """ Determine syllables and syllable tones/stress of a word
+            from the addendum, pronunciation dictionary or G2P...
             DEMITASSE: REWRITE!
         """
-        word_rel = utt.get_relation("Word")
-        syl_rel = utt.new_relation("Syllable")
-        sylstruct_rel = utt.new_relation("SylStructure")
-        seg_rel = utt.new_relation("Segment")
-        for word_item in word_rel:
-            try:
-                if word_item["name"] in self.pronunaddendum: raise AttributeError # bad hack - need to rewrite phonetizer
-                word = self.pronundict.lookup(word_item["name"], word_item["pos"]) #pos will be None if nonexistant
-            except PronunLookupError as e:
-                if e.value == "no_pos":
-                    word = self.pronundict.lookup(word_item["name"])
-                else:
-                    word = None
-            except AttributeError:
+        try:
+            if wordname in self.pronunaddendum: raise AttributeError # bad hack - need to rewrite phonetizer
+            word = self.pronundict.lookup(wordname, pos, frozen=True) #pos will be None if nonexistant
+        except PronunLookupError as e:
+            if e.value == "no_pos":
+                word = self.pronundict.lookup(wordname, frozen=True)
+            else:
                 word = None
-            if word:
-                if "syllables" in word:
-                    syllables = word["syllables"]
-                    syltones = word["syltones"]
-                    if not syltones:
-                        try:
-                            syltones = self.phoneset.guess_sylstress(syllables)
-                        except AttributeError:
-                            syltones = "0" * len(syllables)
-                else:
-                    phones = word["phones"]
-                    syllables = self.phoneset.syllabify(phones)
+        except AttributeError:
+            word = None
+        if word:
+            if "syllables" in word:
+                syllables = word["syllables"]
+                syltones = word["syltones"]
+                if not syltones:
                     try:
                         syltones = self.phoneset.guess_sylstress(syllables)
                     except AttributeError:
                         syltones = "0" * len(syllables)
             else:
-                try:
-                    phones = self.pronunaddendum[word_item["name"]] #try addendum
-                except KeyError:
-                    try:
-                        phones = self.pronundict[word_item["name"]] #try old-style dictionary...
-                    except:
-                        try:
-                            phones = self.g2p.predict_word(word_item["name"])
-                        except (GraphemeNotDefined, NoRuleFound):
-                            print("WARNING: No pronunciation found for '%s'" % word_item["name"])
-                            phones = [self.phoneset.features["silence_phone"]]
+                phones = list(word["phones"])
                 syllables = self.phoneset.syllabify(phones)
                 try:
                     syltones = self.phoneset.guess_sylstress(syllables)
                 except AttributeError:
                     syltones = "0" * len(syllables)
+        else:
+            try:
+                phones = self.pronunaddendum[wordname] #try addendum
+            except KeyError:
+                try:
+                    phones = self.pronundict[wordname] #try old-style dictionary...
+                except:
+                    try:
+                        phones = self.g2p.predict_word(wordname)
+                    except (GraphemeNotDefined, NoRuleFound):
+                        print("WARNING: No pronunciation found for '%s'" % wordname)
+                        phones = [self.phoneset.features["silence_phone"]]
+            syllables = self.phoneset.syllabify(phones)
+            try:
+                syltones = self.phoneset.guess_sylstress(syllables)
+            except AttributeError:
+                syltones = "0" * len(syllables)
+        return syllables, syltones
+
+    def phonetizer(self, utt, processname):
+        """ Applies G2P and Syllabification from 'Word' relation...
+        """
+        pronuncache = self.get_pronuncache()
+        word_rel = utt.get_relation("Word")
+        syl_rel = utt.new_relation("Syllable")
+        sylstruct_rel = utt.new_relation("SylStructure")
+        seg_rel = utt.new_relation("Segment")
+        for word_item in word_rel:
+            key = (word_item["name"], word_item["pos"])
+            try:
+                syllables, syltones = pronuncache[key]
+            except KeyError:
+                syllables, syltones = pronuncache.add(key, *self.pronounce(word_item["name"], word_item["pos"]))
 
             word_item_in_sylstruct = sylstruct_rel.append_item(word_item)
             for syl, syltone in zip(syllables, syltones):
@@ -208,18 +235,41 @@ class DefaultVoice(Voice):
             
 
     #################### Higher level methods...
-    def synthesize(self, inputstring, processname="text-to-segments"):
-        """ Render the inputstring...
+    def synthesize(self, inputstring, processname="text-to-segments", deadline=None):
+        """ Render the inputstring... If a deadline (time.time() value)
+            is given, synthesis is aborted with DeadlineExceeded when
+            it passes.
         """
         utt = self.create_utterance()
         utt["text"] = inputstring
-        utt = self(utt, processname)
+        utt = self.process_before_deadline(utt, processname, deadline)
         return utt
 
-    def resynthesize(self, utt, processname="utt-to-wave"):
+    def resynthesize(self, utt, processname="utt-to-wave", deadline=None):
         """ Apply synth pipeline to existing utt...
         """
-        return self(utt, processname)
+        return self.process_before_deadline(utt, processname, deadline)
+
+    def process_before_deadline(self, utt, processname, deadline=None):
+        """ Apply pipeline with utt["deadline"] set to 'deadline' (None
+            for no deadline) while processing only, the feature is
+            removed again when done...
+        """
+        utt["deadline"] = deadline
+        try:
+            return self(utt, processname)
+        finally:
+            del utt["deadline"]
+
+    def synthesize_stream(self, source, processname="text-to-segments", maxtokens=DEF_MAXTOKENS, **kwargs):
+        """ Render text from 'source' (a string, file handle or
+            iterable of strings) one sentence at a time, generating an
+            utterance per sentence (of at most 'maxtokens' tokens) as
+            soon as it has been read. Further keyword arguments are
+            passed on to synthesize()...
+        """
+        for text in sentences(source, self.tokenizer.punctuation, self.PHRASING_PUNCTUATION, maxtokens):
+            yield self.synthesize(text, processname, **kwargs)
 
 
 class LwaziVoice(DefaultVoice):
@@ -405,19 +455,19 @@ class LwaziHTSVoice(LwaziVoice):
 
 
     #################### Higher level methods...
-    def synthesize(self, inputstring, processname="text-to-segments", htsparms={}):
+    def synthesize(self, inputstring, processname="text-to-segments", htsparms={}, deadline=None):
         """ Render the inputstring...
         """
         utt = self.create_utterance()
         utt["text"] = inputstring
         utt["htsparms"] = htsparms
-        utt = self(utt, processname)
+        utt = self.process_before_deadline(utt, processname, deadline)
         return utt
 
 
-    def resynthesize(self, utt, processname="utt-to-wave", htsparms=None):
+    def resynthesize(self, utt, processname="utt-to-wave", htsparms=None, deadline=None):
         utt["htsparms"] = htsparms
-        return self(utt, processname)
+        return self.process_before_deadline(utt, processname, deadline)
 
 
     def say(self, inputstring, htsparms={}):
@@ -449,6 +499,10 @@ class LwaziMultiHTSVoice(LwaziHTSVoice):
         self.phones = dict(self.phoneset.phones)
         self.phones.update([("eng_" + k, v) for k, v in self.engphoneset.map.iteritems()])
 
+    def _pronunresources(self):
+        return (LwaziHTSVoice._pronunresources(self) +
+                (self.engpronundict, self.engpronunaddendum, self.engg2p, self.engphoneset))
+
 
     def normalizer(self, utt, processname):
         """ words marked with a prepended pipe character "|" will be
@@ -484,10 +538,10 @@ class LwaziMultiHTSVoice(LwaziHTSVoice):
                     syllables = phoneset.syllabify(phones)
             else:
                 try:
-                    wordpronun = pronundict.lookup(word["name"], word["pos"])
+                    wordpronun = pronundict.lookup(word["name"], word["pos"], frozen=True)
                 except PronunLookupError as e:
                     if e.value == "no_pos":
-                        wordpronun = self.pronundict.lookup(word_item["name"])
+                        wordpronun = self.pronundict.lookup(word_item["name"], frozen=True)
                     else:
                         wordpronun = None
                 except AttributeError:
@@ -497,7 +551,7 @@ class LwaziMultiHTSVoice(LwaziHTSVoice):
                         syllables = wordpronun["syllables"]
                         syltones = wordpronun["syltones"] #None if doesn't exist
                     else:
-                        phones = wordpronun["phones"]
+                        phones = list(wordpronun["phones"])
                         syllables = phoneset.syllabify(phones)
                 else:
                     try:
@@ -516,19 +570,23 @@ class LwaziMultiHTSVoice(LwaziHTSVoice):
                     syltones = "0" * len(syllables)
             return syllables, syltones
 
+        pronuncache = self.get_pronuncache()
         word_rel = utt.get_relation("Word")
         syl_rel = utt.new_relation("Syllable")
         sylstruct_rel = utt.new_relation("SylStructure")
         seg_rel = utt.new_relation("Segment")
         for word_item in word_rel:
-            if word_item["lang"] == "eng":
-                syllables, syltones = g2p(word_item, self.engphoneset, self.engpronundict, self.engpronunaddendum, self.engg2p)
-                #rename phones:
-                for syl in syllables:
-                    for i in range(len(syl)):
-                        syl[i] = "eng_" + syl[i]
-            else:
-                syllables, syltones = g2p(word_item, self.phoneset, self.pronundict, self.pronunaddendum, self.g2p)
+            key = (word_item["lang"], word_item["name"], word_item["pos"])
+            try:
+                syllables, syltones = pronuncache[key]
+            except KeyError:
+                if word_item["lang"] == "eng":
+                    syllables, syltones = g2p(word_item, self.engphoneset, self.engpronundict, self.engpronunaddendum, self.engg2p)
+                    #rename phones:
+                    syllables = [["eng_" + phone for phone in syl] for syl in syllables]
+                else:
+                    syllables, syltones = g2p(word_item, self.phoneset, self.pronundict, self.pronunaddendum, self.g2p)
+                syllables, syltones = pronuncache.add(key, syllables, syltones)
 
             word_item_in_sylstruct = sylstruct_rel.append_item(word_item)
             for syl, syltone in zip(syllables, syltones):
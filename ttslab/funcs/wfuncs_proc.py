@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+""" Implements in-place processing of Waveform samples (level
+    normalisation, gain, DC removal, sample format conversion and
+    fades), to be attached to Waveform with ttslab.extend (helpers
+    are in ttslab.waveform, so that only these functions become
+    methods)...
+
+    Samples are either float (full scale 1.0) or integers (e.g. int16
+    or uint8, relative to the offset given by
+    ttslab.waveform.intscale), with shape (frames,) or (frames,
+    channels): 'axis=0' computes statistics per channel, 'axis=None'
+    over all channels. Integer samples are processed in blocks (with
+    rounding and clipping) to limit temporaries. Read-only samples
+    (e.g. from Waveform(..., mmap=True)) are copied into memory when
+    first modified. to_float/to_int16 also convert other integer
+    formats (e.g. uint8 or int32 from mmapread).
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import numpy as np
+
+import ttslab.waveform
+
+DEF_BLOCKSIZE = 65536 #frames
+
+def peak(waveform, axis=None):
+    """ Maximum absolute sample value (relative to the offset of
+        unsigned samples)...
+    """
+    samples = waveform.samples
+    if len(samples) == 0:
+        return 0
+    offset, scale = ttslab.waveform.intscale(samples.dtype)
+    return np.maximum(samples.max(axis=axis).astype(np.float64) - offset,
+                      offset - samples.min(axis=axis).astype(np.float64))
+
+
+def rms(waveform, axis=None):
+    """ Root mean square sample value (relative to the offset of
+        unsigned samples)...
+    """
+    samples = waveform.samples
+    if len(samples) == 0:
+        return 0.0
+    offset, scale = ttslab.waveform.intscale(samples.dtype)
+    sumsquares = 0.0
+    for block in ttslab.waveform.iterblocks(samples, DEF_BLOCKSIZE):
+        block = block.astype(np.float64) - offset
+        sumsquares = sumsquares + np.einsum("i...,i...->...", block, block)
+    if axis is None:
+        return np.sqrt(np.sum(sumsquares) / samples.size)
+    return np.sqrt(sumsquares / len(samples))
+
+
+def gain(waveform, factor):
+    """ Multiply samples by 'factor' (scalar or per channel), integer
+        samples are clipped...
+    """
+    samples = ttslab.waveform.writable_samples(waveform)
+    if not np.issubdtype(samples.dtype, np.integer):
+        np.multiply(samples, factor, out=samples, casting="unsafe")
+        return
+    offset, scale = ttslab.waveform.intscale(samples.dtype)
+    info = np.iinfo(samples.dtype)
+    for block in ttslab.waveform.iterblocks(samples, DEF_BLOCKSIZE):
+        scaled = (block - float(offset)) * np.asarray(factor, dtype=np.float64)
+        scaled += offset
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, info.min, info.max, out=scaled)
+        block[...] = scaled
+
+
+def gain_db(waveform, db):
+    gain(waveform, 10.0 ** (np.asarray(db, dtype=np.float64) / 20.0))
+
+
+def normalise_peak(waveform, level=1.0, axis=None):
+    """ Scale so that the peak is at 'level' relative to full scale...
+    """
+    p = peak(waveform, axis)
+    if axis is not None and waveform.samples.ndim == 2:
+        p = np.asarray(p).reshape(1, -1) #per channel
+    factor = level * ttslab.waveform.fullscale(waveform.samples.dtype) / np.where(p == 0, 1, p)
+    gain(waveform, factor)
+
+
+def normalise_rms(waveform, level=0.1, axis=None):
+    """ Scale so that the RMS is at 'level' relative to full scale
+        (integer samples are clipped)...
+    """
+    r = rms(waveform, axis)
+    if axis is not None and waveform.samples.ndim == 2:
+        r = np.asarray(r).reshape(1, -1) #per channel
+    factor = level * ttslab.waveform.fullscale(waveform.samples.dtype) / np.where(r == 0, 1, r)
+    gain(waveform, factor)
+
+
+def remove_dc(waveform, axis=0):
+    """ Subtract the mean (per channel by default), integer samples
+        are shifted to the offset of their format (e.g. 128 for
+        uint8)...
+    """
+    samples = waveform.samples
+    if len(samples) == 0:
+        return
+    total = 0.0
+    for block in ttslab.waveform.iterblocks(samples, DEF_BLOCKSIZE):
+        total = total + block.sum(axis=axis, dtype=np.float64)
+    offset, scale = ttslab.waveform.intscale(samples.dtype)
+    dc = total / (len(samples) if axis == 0 else samples.size) - offset
+    if axis is not None and samples.ndim == 2:
+        dc = np.asarray(dc).reshape(1, -1) #per channel
+    samples = ttslab.waveform.writable_samples(waveform)
+    if not np.issubdtype(samples.dtype, np.integer):
+        np.subtract(samples, dc, out=samples, casting="unsafe")
+        return
+    info = np.iinfo(samples.dtype)
+    for block in ttslab.waveform.iterblocks(samples, DEF_BLOCKSIZE):
+        shifted = block - np.rint(dc)
+        np.clip(shifted, info.min, info.max, out=shifted)
+        block[...] = shifted
+
+
+def to_float(waveform, dtype=np.float64):
+    """ Convert integer samples to float (full scale 1.0, see
+        ttslab.waveform.intscale)...
+    """
+    samples = waveform.samples
+    if not np.issubdtype(samples.dtype, np.integer):
+        waveform.samples = samples.astype(dtype, copy=False)
+        return
+    offset, scale = ttslab.waveform.intscale(samples.dtype)
+    newsamples = np.empty(samples.shape, dtype=dtype)
+    newsamples[...] = samples
+    newsamples -= offset
+    newsamples *= 1.0 / scale
+    waveform.samples = newsamples
+
+
+def to_int16(waveform):
+    """ Convert float (full scale 1.0) or other integer samples to
+        int16, clipping values outside [-1.0, 1.0) (as when writing
+        RIFF, see ttslab.waveform.topcm16)...
+    """
+    samples = waveform.samples
+    if samples.dtype == np.int16:
+        return
+    newsamples = np.empty(samples.shape, dtype=np.int16)
+    ttslab.waveform.topcm16(samples, newsamples, DEF_BLOCKSIZE)
+    waveform.samples = newsamples
+
+
+def fade_in(waveform, duration):
+    """ Raised cosine fade over the first 'duration' seconds (e.g. at
+        concatenation joins)...
+    """
+    numsamples = min(int(round(duration * waveform.samplerate)), len(waveform.samples))
+    if numsamples > 0:
+        head = ttslab.waveform.writable_samples(waveform)[:numsamples]
+        offset, scale = ttslab.waveform.intscale(head.dtype)
+        ramp = 0.5 - 0.5 * np.cos(np.pi * (np.arange(numsamples) + 0.5) / numsamples)
+        faded = (head - float(offset)) * ramp.reshape((-1,) + (1,) * (head.ndim - 1)) + offset
+        if np.issubdtype(head.dtype, np.integer):
+            np.rint(faded, out=faded)
+        head[...] = faded
+
+
+def fade_out(waveform, duration):
+    """ Raised cosine fade over the last 'duration' seconds...
+    """
+    numsamples = min(int(round(duration * waveform.samplerate)), len(waveform.samples))
+    if numsamples > 0:
+        tail = ttslab.waveform.writable_samples(waveform)[len(waveform.samples) - numsamples:]
+        offset, scale = ttslab.waveform.intscale(tail.dtype)
+        ramp = 0.5 + 0.5 * np.cos(np.pi * (np.arange(numsamples) + 0.5) / numsamples)
+        faded = (tail - float(offset)) * ramp.reshape((-1,) + (1,) * (tail.ndim - 1)) + offset
+        if np.issubdtype(tail.dtype, np.integer):
+            np.rint(faded, out=faded)
+        tail[...] = faded
@@ -13,6 +13,9 @@ __email__ = "dvn.demitasse@gmail.com"
 
 import codecs
 import re
+import multiprocessing
+
+REGEX_METACHARS = set(".^$*+?{}[]\\|()")
 
 class NoRuleFound(Exception):
     pass
@@ -20,6 +23,20 @@ class NoRuleFound(Exception):
 class GraphemeNotDefined(Exception):
     pass
 
+_worker_g2p = None
+
+def _init_worker(g2p):
+    global _worker_g2p
+    _worker_g2p = g2p
+
+def _predict_worker(word, g2p=None):
+    """ Returns (phones, None) or (None, exception)...
+    """
+    try:
+        return (g2p or _worker_g2p).predict_word(word), None
+    except (GraphemeNotDefined, NoRuleFound) as e:
+        return None, e
+
 class RewriteRule(object):
     """ Simply keeps rule info together...
     """
@@ -54,6 +71,18 @@ class RewriteRule(object):
         return True
         
 
+def _overlap(s1, s2):
+    """ Returns True if occurrences of s1 and s2 in a string can share
+        characters...
+    """
+    if s1 in s2 or s2 in s1:
+        return True
+    for i in range(1, min(len(s1), len(s2))):
+        if s1.endswith(s2[:i]) or s2.endswith(s1[:i]):
+            return True
+    return False
+
+
 class G2P_Rewrites(object):
     """ Class to contain and implement the application of rewrite
         rules to predict pronunciations of isolated words...
@@ -68,6 +97,17 @@ class G2P_Rewrites(object):
         self.features = {}
         self.ruleset = {}
         self.gnulls = {}
+        self._compiledrules = None
+        self._compiledgnulls = None
+
+    def __getstate__(self):
+        """ Compiled rules and gnulls are rebuilt when needed, no need
+            to pickle...
+        """
+        state = self.__dict__.copy()
+        state.pop("_compiledrules", None)
+        state.pop("_compiledgnulls", None)
+        return state
 
     def sort_rules(self):
         """ Make sure that all rulelists associated with each grapheme
@@ -77,43 +117,174 @@ class G2P_Rewrites(object):
         """
         for g in self.ruleset:
             self.ruleset[g].sort(key=lambda x: x.ordinal, reverse=True)
+        self._compiledrules = None
+
+    def compile_rules(self):
+        """ Index the (sorted) rulelist of each grapheme in a dict
+            keyed by (leftcontext, rightcontext) so that the first
+            matching rule can be found with a few lookups instead of
+            trying each rule in turn.
+
+            RewriteRule.match only compares contexts up to the length
+            of the shorter string, so a rule context matches if it is
+            a suffix (left) or prefix (right) of the word context, or
+            if the word context is a suffix/prefix of it. Keys are
+            thus (context, True) for the complete rule context and
+            (context, False) for each shorter part of it. The value is
+            (rank, rule) for the first rule in the list with that key.
+        """
+        self._compiledrules = {}
+        for g in self.ruleset:
+            table = {}
+            maxleft = 0
+            maxright = 0
+            for rank, rule in enumerate(self.ruleset[g]):
+                lc, rc = rule.leftcontext, rule.rightcontext
+                maxleft = max(maxleft, len(lc))
+                maxright = max(maxright, len(rc))
+                leftkeys = [(lc, True)] + [(lc[len(lc)-k:], False) for k in range(len(lc))]
+                rightkeys = [(rc, True)] + [(rc[:k], False) for k in range(len(rc))]
+                for leftkey in leftkeys:
+                    for rightkey in rightkeys:
+                        if (leftkey, rightkey) not in table:
+                            table[(leftkey, rightkey)] = (rank, rule)
+            self._compiledrules[g] = (maxleft, maxright, table)
+
+    def _find_rule(self, word, i, compiledrule):
+        """ Returns the first rule (in order of application) matching
+            the contexts of the grapheme at word[i] or None...
+        """
+        maxleft, maxright, table = compiledrule
+        leftkeys = [(word[i-k:i], True) for k in range(min(i, maxleft) + 1)]
+        if i < maxleft:
+            leftkeys.append((word[:i], False))
+        rclen = len(word) - i - 1
+        rightkeys = [(word[i+1:i+1+k], True) for k in range(min(rclen, maxright) + 1)]
+        if rclen < maxright:
+            rightkeys.append((word[i+1:], False))
+        best = None
+        for leftkey in leftkeys:
+            for rightkey in rightkeys:
+                try:
+                    candidate = table[(leftkey, rightkey)]
+                except KeyError:
+                    continue
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+        if best is None:
+            return None
+        return best[1]
+
+    def compile_gnulls(self):
+        """ Precompile the gnull patterns (in order of application).
+
+            If all gnulls are plain strings which cannot interact
+            (i.e. no pattern can overlap with another pattern or with
+            any replacement), applying them one after the other gives
+            the same result as a single pass with one alternation
+            pattern, which is then also compiled...
+        """
+        gnulls = list(self.gnulls.items())
+        sequential = [(re.compile(k), v) for k, v in gnulls]
+        singlepass = None
+        if all(k and not REGEX_METACHARS.intersection(k) and "\\" not in v for k, v in gnulls):
+            independent = True
+            for i, (k1, v1) in enumerate(gnulls):
+                for j, (k2, v2) in enumerate(gnulls):
+                    if i != j and (_overlap(k1, k2) or _overlap(k2, v1)):
+                        independent = False
+                        break
+                if not independent:
+                    break
+            if independent:
+                singlepass = re.compile("|".join([re.escape(k) for k, v in gnulls]))
+        self._compiledgnulls = (sequential, singlepass)
 
     def apply_gnulls(self, word):
         """ Apply gnulls to word if applicable...
         """
         if self.gnulls:
-            for gnull in self.gnulls:
-                word = re.sub(gnull, self.gnulls[gnull], word)
+            try:
+                compiledgnulls = self._compiledgnulls
+            except AttributeError: #unpickled or older instance
+                compiledgnulls = None
+            if compiledgnulls is None:
+                self.compile_gnulls()
+                compiledgnulls = self._compiledgnulls
+            sequential, singlepass = compiledgnulls
+            if singlepass is not None:
+                return singlepass.sub(lambda m: self.gnulls[m.group()], word)
+            for pattern, repl in sequential:
+                word = pattern.sub(repl, word)
         return word
     
     def predict_word(self, word):
         """ Predict phone sequence given word...
         """
+        try:
+            compiledrules = self._compiledrules
+        except AttributeError: #unpickled or older instance
+            compiledrules = None
+        if compiledrules is None:
+            self.compile_rules()
+            compiledrules = self._compiledrules
         phones = []
         #append and prepend whitespace_char
         word = word.join([self.WHITESPACE_CHAR, self.WHITESPACE_CHAR])
         #apply gnulls
         word = self.apply_gnulls(word)
         #find matching rule and thus phoneme for each grapheme..
-        for i in list(range(len(word)))[1:-1]: #excluding whitespace..
-            lc, g, rc = [word[:i], word[i], word[i+1:]]
+        for i in range(1, len(word) - 1): #excluding whitespace..
+            g = word[i]
             try:
-                rulelist = self.ruleset[g]
+                compiledrule = compiledrules[g]
             except KeyError:
                 raise GraphemeNotDefined("Word: " + word + " Grapheme: " + g)
-
-            #no need to do the following if stored in the correct order:
-            #rulelist.sort(key=lambda x: x.ordinal, reverse=True)
-
-            for rule in rulelist:
-                if rule.match(lc, rc):
-                    if rule.phoneme:                 #phoneme can be "" meaning no phone (pnull)
-                        phones.append(rule.phoneme)  #only add if not empty string
-                    break
-            else:
-                raise NoRuleFound#(lc + " " + g + " " + rc)
+            rule = self._find_rule(word, i, compiledrule)
+            if rule is None:
+                raise NoRuleFound
+            if rule.phoneme:                 #phoneme can be "" meaning no phone (pnull)
+                phones.append(rule.phoneme)  #only add if not empty string
         return phones
 
+    def predict_words(self, words, workers=1, failures=None, chunksize=100):
+        """ Predict phone sequences for many words, generates (word,
+            phones) in input order. Each distinct word is only
+            predicted once, in a pool of 'workers' processes if > 1.
+            Words that fail have phones None and the exception is
+            stored in 'failures' (a dict) if given...
+        """
+        words = list(words)
+        uniquewords = []
+        seen = set()
+        for word in words:
+            if word not in seen:
+                seen.add(word)
+                uniquewords.append(word)
+        pool = None
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(self,))
+            predictions = pool.imap(_predict_worker, uniquewords, chunksize)
+        else:
+            predictions = (_predict_worker(word, self) for word in uniquewords)
+        try:
+            #uniquewords are in order of first occurrence, so results
+            #are needed in the order they are produced:
+            results = {}
+            uniquewords = iter(uniquewords)
+            for word in words:
+                while word not in results:
+                    uniqueword = next(uniquewords)
+                    phones, error = next(predictions)
+                    results[uniqueword] = phones
+                    if error is not None and failures is not None:
+                        failures[uniqueword] = error
+                phones = results[word]
+                yield word, (list(phones) if phones is not None else None)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
 class G2P_Rewrites_Semicolon(G2P_Rewrites):
     """Includes methods to load rules from "semicolon format" files...
     """
@@ -161,6 +332,7 @@ class G2P_Rewrites_Semicolon(G2P_Rewrites):
                 else:
                     mapping[a] = b
         self.gnulls = mapping
+        self._compiledgnulls = None
 
     def load_ruleset_semicolon(self, filelocation, wchar=G2P_Rewrites.WHITESPACE_CHAR):
         """ Load rules from semicolon delimited format
@@ -197,6 +369,8 @@ class G2P_Rewrites_Semicolon(G2P_Rewrites):
         """Apply self.graphmap to all graphemes in self.ruleset and
            self.gnulls
         """
+        self._compiledrules = None
+        self._compiledgnulls = None
         for k, v in self.graphmap.items():
             if k == v: continue
             self.ruleset[v] = self.ruleset[k]
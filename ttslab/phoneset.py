@@ -8,9 +8,96 @@ from __future__ import unicode_literals, division, print_function #Py2
 __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
+import re
+
+import numpy as np
+
+#phone class codes (bit flags) used for syllabification:
+VOWEL = 1
+CONSONANT = 2
+SYLLABIC_CONSONANT = 4
+GLIDE = 8
+
+SYLCACHE_MAXSIZE = 50000 #phone sequences
+
+def cachedsyllabification(syllabify):
+    """ Decorator for Phoneset.syllabify implementations: memoizes
+        the syllabification of each phone sequence (the phoneset is
+        assumed to remain constant, else call clear_caches()). Fresh
+        lists are returned so that callers may modify them...
+    """
+    def wrapper(self, phonelist):
+        key = tuple(phonelist)
+        try:
+            sylcache = self._sylcache
+        except AttributeError: #unpickled or did not call Phoneset.__init__
+            sylcache = self._sylcache = {}
+        try:
+            sylls = sylcache[key]
+        except KeyError:
+            sylls = syllabify(self, phonelist)
+            if len(sylcache) >= SYLCACHE_MAXSIZE:
+                sylcache.clear()
+            sylcache[key] = tuple([tuple(syl) for syl in sylls])
+            return sylls
+        return [list(syl) for syl in sylls]
+    wrapper.__name__ = syllabify.__name__
+    wrapper.__doc__ = syllabify.__doc__
+    return wrapper
+
+
+class PhonesetTable(object):
+    """ Compiled view of a phoneset: integer phone IDs, a boolean
+        (phones x features) matrix and, if the phoneset implements
+        _sonority_level(), a sonority array. Per-phone dicts are kept
+        for lookups in tight loops and arrays for vectorized
+        operations over phone sequences...
+    """
+    def __init__(self, phoneset):
+        self.phonenames = sorted(phoneset.phones)
+        self.phoneids = dict([(phonename, i) for i, phonename in enumerate(self.phonenames)])
+        featnames = set()
+        for phonename in self.phonenames:
+            featnames.update(phoneset.phones[phonename])
+        self.featnames = sorted(featnames)
+        self.featids = dict([(featname, i) for i, featname in enumerate(self.featnames)])
+        self.features = np.zeros((len(self.phonenames), len(self.featnames)), dtype=bool)
+        for i, phonename in enumerate(self.phonenames):
+            for featname in phoneset.phones[phonename]:
+                self.features[i, self.featids[featname]] = True
+        sonority_level = getattr(phoneset, "_sonority_level", None)
+        if sonority_level is not None:
+            self.sonority_levels = dict([(phonename, sonority_level(phonename)) for phonename in self.phonenames])
+            self.sonority = np.array([self.sonority_levels[phonename] for phonename in self.phonenames], dtype=np.int8)
+        else:
+            self.sonority_levels = None
+            self.sonority = None
+
+    def ids(self, phonelist):
+        """ Array of phone IDs, raises KeyError for unknown phones...
+        """
+        return np.array([self.phoneids[phonename] for phonename in phonelist], dtype=np.int32)
+
+    def has(self, featname, phonelist):
+        """ Boolean array: which phones in phonelist have featname...
+        """
+        try:
+            return self.features[self.ids(phonelist), self.featids[featname]]
+        except KeyError:
+            if featname in self.featids:
+                raise #unknown phone
+            self.ids(phonelist) #raise for unknown phones
+            return np.zeros(len(phonelist), dtype=bool)
+
+    def sonorities(self, phonelist):
+        return self.sonority[self.ids(phonelist)]
+
+
 class Phoneset(object):
     """ Abstract phoneset class
     """
+    CACHES = ["_sylcache", "_phoneclasses", "_compiledclusters", "_table"]
+
     def __init__(self):
         
         self.features = {}
@@ -41,3 +128,67 @@ class Phoneset(object):
         """ Contains phone?
         """
         return phonename in self.phones
+
+    def __getstate__(self):
+        """ Don't pickle caches...
+        """
+        state = self.__dict__.copy()
+        for k in Phoneset.CACHES:
+            state.pop(k, None)
+        return state
+
+    def clear_caches(self):
+        """ Call after modifying the phoneset...
+        """
+        for k in Phoneset.CACHES:
+            self.__dict__.pop(k, None)
+
+    def table(self):
+        """ The PhonesetTable for this phoneset (built once, call
+            clear_caches() after modifying the phoneset)...
+        """
+        try:
+            return self._table
+        except AttributeError:
+            self._table = PhonesetTable(self)
+            return self._table
+
+    def phoneclass(self, phonename):
+        """ Class code (bit flags VOWEL, CONSONANT, SYLLABIC_CONSONANT
+            and GLIDE) of a phone as determined by the is_* methods
+            implemented by the phoneset...
+        """
+        try:
+            phoneclasses = self._phoneclasses
+        except AttributeError:
+            phoneclasses = self._phoneclasses = {}
+        try:
+            return phoneclasses[phonename]
+        except KeyError:
+            pass
+        code = 0
+        for flag, methodname in [(VOWEL, "is_vowel"),
+                                 (CONSONANT, "is_consonant"),
+                                 (SYLLABIC_CONSONANT, "is_syllabicconsonant"),
+                                 (GLIDE, "is_glide")]:
+            method = getattr(self, methodname, None)
+            if method is not None and method(phonename):
+                code |= flag
+        phoneclasses[phonename] = code
+        return code
+
+    def phoneclasses(self, phonelist):
+        return [self.phoneclass(phone) for phone in phonelist]
+
+    def compiled_clusters(self):
+        """ Compiled regexes for features["syllable_clusters"] (if
+            defined), in order...
+        """
+        clusters = tuple(self.features["syllable_clusters"])
+        try:
+            compiledclusters = self._compiledclusters
+        except AttributeError:
+            compiledclusters = None
+        if compiledclusters is None or compiledclusters[0] != clusters:
+            compiledclusters = self._compiledclusters = (clusters, [(cluster, re.compile(cluster)) for cluster in clusters])
+        return compiledclusters[1]
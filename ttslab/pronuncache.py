@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+""" A bounded LRU cache for word pronunciations (syllables and
+    syllable tones/stress) as determined by a voice's phonetizer...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import threading
+from collections import OrderedDict
+
+DEF_MAXSIZE = 20000 #words
+
+def resourcestamp(resource):
+    """ Something that changes when a pronunciation resource (e.g. a
+        PronunciationDictionary or addendum dict) is replaced or
+        entries are added/removed...
+    """
+    try:
+        size = len(resource)
+    except TypeError:
+        size = None
+    return (id(resource), size, getattr(resource, "modcount", None))
+
+
+class PronunciationCache(object):
+    """ Maps a key (e.g. (word, pos)) to (syllables, syltones) where
+        syllables is a tuple of tuples of phones. Entries are
+        immutable and can therefore be shared between utterances.
+
+        Cached entries are only valid for a specific state of the
+        voice's pronunciation resources: see validate().
+    """
+    def __init__(self, maxsize=DEF_MAXSIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock() #voices may be shared between threads
+        self.stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        """ Don't pickle entries or the lock...
+        """
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state["maxsize"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        """ Raises KeyError if not cached...
+        """
+        with self.lock:
+            try:
+                value = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self.entries[key] = value #most recently used at the end
+            self.hits += 1
+            return value
+
+    def add(self, key, syllables, syltones):
+        """ Store a pronunciation and return the immutable version that
+            was cached...
+        """
+        syllables = tuple([tuple(syl) for syl in syllables])
+        if isinstance(syltones, list):
+            syltones = tuple(syltones)
+        value = (syllables, syltones)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def validate(self, stamp):
+        """ Clears the cache if 'stamp' (see resourcestamp) differs
+            from the one previously validated...
+        """
+        if stamp != self.stamp:
+            self.clear()
+            self.stamp = stamp
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitrate": self.hits / lookups if lookups else None}
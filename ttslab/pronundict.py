@@ -12,6 +12,10 @@ __email__ = "dvn.demitasse@gmail.com"
 
 import codecs
 import copy
+import multiprocessing
+import json
+import mmap
+import struct
 
 class PronunLookupError(Exception):
     def __init__(self, value):
@@ -61,6 +65,119 @@ class Word(object):
     def __contains__(self, featname):
         return featname in self.features
 
+    def freeze(self):
+        """ Returns an immutable FrozenWord version of this word...
+        """
+        extras = dict([(k, v) for k, v in self.features.items() if k not in FrozenWord.FEATNAMES])
+        return FrozenWord(self["name"], self["phones"], self["syllables"],
+                          self["syltones"], self["pos"], extras)
+
+
+class FrozenWord(object):
+    """ Immutable Word: syllables and phones are tuples. Can be shared
+        (e.g. returned from PronunciationDictionary.lookup) without
+        copying, use copy() to get a mutable Word...
+    """
+    FEATNAMES = ("name", "phones", "syllables", "syltones", "pos")
+    __slots__ = FEATNAMES + ("_extras",)
+
+    def __init__(self, name, phones, syllables=None, syltones=None, pos=None, extras=None):
+        if syllables is not None:
+            syllables = tuple([tuple(syl) for syl in syllables])
+        for featname, feat in [("name", name),
+                               ("phones", tuple(phones)),
+                               ("syllables", syllables),
+                               ("syltones", syltones or None),
+                               ("pos", pos or None),
+                               ("_extras", extras or None)]:
+            object.__setattr__(self, featname, feat)
+
+    def __setattr__(self, attrname, value):
+        raise AttributeError("FrozenWord is immutable")
+
+    def __delattr__(self, attrname):
+        raise AttributeError("FrozenWord is immutable")
+
+    def __reduce__(self):
+        return (FrozenWord, (self.name, self.phones, self.syllables,
+                             self.syltones, self.pos, self._extras))
+
+    def __getitem__(self, featname):
+        if featname in FrozenWord.FEATNAMES:
+            return getattr(self, featname)
+        try:
+            return self._extras[featname]
+        except (KeyError, TypeError):
+            return None
+
+    def __iter__(self):
+        featnames = [k for k in FrozenWord.FEATNAMES if getattr(self, k) is not None]
+        if self._extras:
+            featnames.extend(self._extras)
+        return iter(featnames)
+
+    def __contains__(self, featname):
+        if featname in FrozenWord.FEATNAMES:
+            return getattr(self, featname) is not None
+        return bool(self._extras) and featname in self._extras
+
+    def copy(self):
+        """ Returns a mutable Word...
+        """
+        if self.syllables is not None:
+            word = Word(self.name, [list(syl) for syl in self.syllables], self.syltones, self.pos)
+        else:
+            word = Word(self.name, self.phones, self.syltones, self.pos)
+            word["phones"] = list(self.phones) #list pronun would be taken as syllables
+        if self._extras:
+            for k, v in self._extras.items():
+                word[k] = copy.deepcopy(v)
+        return word
+
+
+DEF_LOADCHUNKSIZE = 20000 #lines
+
+def _parse_textlines(args):
+    """ Parse lines in the format of PronunciationDictionary.totextfile
+        into (word, syllables, syltones, pos)...
+    """
+    lines, phonemap, nonestring = args
+    parsed = []
+    for line in lines:
+        elems = line.split()
+        word = elems[0]
+        pos = elems[1] if elems[1] != nonestring else None
+        syltones = elems[2] if elems[2] != nonestring else None
+        if phonemap:
+            try:
+                phones = [phonemap[ph] for ph in elems[4:]]
+            except KeyError:
+                print(line)
+                raise
+        else:
+            phones = elems[4:]
+        syllables = []
+        start = 0
+        for s in elems[3]:
+            end = start + int(s)
+            if end > len(phones):
+                print(line)
+                raise IndexError("pop from empty list")
+            syllables.append(phones[start:end])
+            start = end
+        parsed.append((word, syllables, syltones, pos))
+    return parsed
+
+COMPILED_MAGIC = b"TTSLEX02"
+#magic, numkeys, metalen, offsets: meta, keytable, keyblob, records, phoneids, syllens
+COMPILED_HEADER = struct.Struct(str("<8sII6I"))
+#keyoffset, keylen, firstrecord, numrecords
+COMPILED_KEY = struct.Struct(str("<IIII"))
+#phoneoffset, syloffset, numphones, numsyls, syltonesid, posid, extrasid
+COMPILED_RECORD = struct.Struct(str("<IIHHIII"))
+COMPILED_NOSYLS = 0xFFFF
+COMPILED_MAXPHONES = 0xFFFF #per word, also number of distinct phones
+COMPILED_MAXSYLLEN = 0xFF
 
 class PronunciationDictionary(object):
     """ Simple class to contain and provide relevant access to a
@@ -72,6 +189,7 @@ class PronunciationDictionary(object):
         self.entries = {}  #keys are canonical graphemic
                            #representation of words (ttslab convention:
                            #all lowercase) -> Word or [Word, Word, ...]
+        self.modcount = 0
 
 
     def __getitem__(self, word):
@@ -85,9 +203,20 @@ class PronunciationDictionary(object):
                 self.entries[word] = [self.entries[word], entry]
         else:
             self.entries[word] = entry
+        self._modified()
 
     def __delitem__(self, word):
         del self.entries[word]
+        self._modified()
+
+    def _modified(self):
+        """ Keep count of modifications so that users (e.g. caches)
+            can detect changes...
+        """
+        try:
+            self.modcount += 1
+        except AttributeError: #unpickled older instance
+            self.modcount = 1
 
     def __iter__(self):
         return self.entries.__iter__()
@@ -134,52 +263,155 @@ class PronunciationDictionary(object):
                         phones = [phonemap[ph] for ph in phones]
                     outfh.write(" ".join([word["name"], str(word["pos"]), word["syltones"], syllables, " ".join(phones)]) + "\n")
 
-    def fromtextfile(self, fn, phonemap=None, nonestring="None"):
+    def fromtextfile(self, fn, phonemap=None, nonestring="None", workers=1, chunksize=DEF_LOADCHUNKSIZE):
         """ abandon None 010 133 _ b a n d _ n
+
+            Lines are parsed in chunks, in parallel if workers > 1
+            (entries are added in file order so the result is the same)...
         """
         with codecs.open(fn, encoding="utf-8") as infh:
-            for line in infh:
-                elems = line.split()
-                word = elems[0]
-                if elems[1] != nonestring:
-                    pos = elems[1]
-                else:
-                    pos = None
-                if elems[2] != nonestring:
-                    syltones = elems[2]
-                else:
-                    syltones = None
-                if phonemap:
-                    try:
-                        phones = [phonemap[ph] for ph in elems[4:]]
-                    except KeyError:
-                        print(line)
-                        raise
-                else:
-                    phones = elems[4:]
-                syllables = []
-                for s in elems[3]:
-                    syllables.append(phones[:int(s)])
-                    for i in range(int(s)):
-                        try:
-                            phones.pop(0)
-                        except IndexError:
-                            print(line)
-                            raise
-                self.add_word(word, syllables, syltones, pos)
+            lines = infh.readlines()
+        chunks = [(lines[i:i+chunksize], phonemap, nonestring) for i in range(0, len(lines), chunksize)]
+        if workers > 1 and len(chunks) > 1:
+            pool = multiprocessing.Pool(workers)
+            try:
+                parsedchunks = pool.imap(_parse_textlines, chunks)
+                for parsed in parsedchunks:
+                    self._add_parsed(parsed)
+            finally:
+                pool.terminate()
+        else:
+            for chunk in chunks:
+                self._add_parsed(_parse_textlines(chunk))
         return self
 
+    def _add_parsed(self, parsed):
+        entries = self.entries
+        for word, syllables, syltones, pos in parsed:
+            entry = Word(word, syllables, syltones, pos)
+            try:
+                current = entries[word]
+            except KeyError:
+                entries[word] = entry
+                continue
+            if isinstance(current, list):
+                current.append(entry)
+            else:
+                entries[word] = [current, entry]
+        self._modified()
+
     def _checkagainstphoneset(self):
         """check all dictionary entries are compatible with a specific
         phoneset...
         """
         raise NotImplementedError
 
+    def tocompiledfile(self, fn):
+        """ Write the dictionary in the compact binary format that can
+            be loaded with CompiledPronunciationDictionary, extra word
+            features need to be JSON serialisable...
+        """
+        symbols = {"phones": [], "syltones": [None], "pos": [None], "extras": [None]}
+        symbolids = dict([(k, dict([(sym, i) for i, sym in enumerate(v)])) for k, v in symbols.items()])
+        def symbolid(kind, sym, symkey=None):
+            if symkey is None:
+                symkey = sym
+            try:
+                return symbolids[kind][symkey]
+            except KeyError:
+                symbolids[kind][symkey] = len(symbols[kind])
+                symbols[kind].append(sym)
+                return symbolids[kind][symkey]
+        def extrasid(word):
+            extras = dict([(k, word[k]) for k in word if k not in FrozenWord.FEATNAMES])
+            if not extras:
+                return 0
+            try:
+                return symbolid("extras", extras, json.dumps(extras, sort_keys=True))
+            except TypeError as e:
+                raise ValueError("cannot store extra features of '%s' in compiled format: %s" % (word["name"], e))
+
+        keytable = []
+        keyblob = []
+        keyoffset = 0
+        records = []
+        phoneids = []
+        syllens = []
+        for k, bk in sorted([(k, k.encode("utf-8")) for k in self], key=lambda x: x[1]):
+            entry = self[k]
+            if not isinstance(entry, list):
+                entry = [entry]
+            keytable.append((keyoffset, len(bk), len(records), len(entry)))
+            keyblob.append(bk)
+            keyoffset += len(bk)
+            for word in entry:
+                phones = word["phones"]
+                syllables = word["syllables"]
+                if syllables is None:
+                    numsyls = COMPILED_NOSYLS
+                else:
+                    numsyls = len(syllables)
+                if (len(phones) > COMPILED_MAXPHONES or (syllables is not None and numsyls >= COMPILED_NOSYLS) or
+                    max([len(syl) for syl in syllables or []] or [0]) > COMPILED_MAXSYLLEN):
+                    raise ValueError("too many phones or syllables in '%s' for compiled format" % k)
+                records.append((len(phoneids), len(syllens), len(phones), numsyls,
+                                symbolid("syltones", word["syltones"] or None),
+                                symbolid("pos", word["pos"] or None),
+                                extrasid(word)))
+                phoneids.extend([symbolid("phones", ph) for ph in phones])
+                if syllables is not None:
+                    syllens.extend([len(syl) for syl in syllables])
+        if len(symbols["phones"]) > COMPILED_MAXPHONES + 1:
+            raise ValueError("too many distinct phones for compiled format")
+
+        meta = json.dumps({"features": self.features, "symbols": symbols}).encode("utf-8")
+        sections = [meta,
+                    b"".join([COMPILED_KEY.pack(*e) for e in keytable]),
+                    b"".join(keyblob),
+                    b"".join([COMPILED_RECORD.pack(*e) for e in records]),
+                    struct.pack(str("<%dH" % len(phoneids)), *phoneids),
+                    struct.pack(str("<%dB" % len(syllens)), *syllens)]
+        offsets = []
+        offset = COMPILED_HEADER.size
+        for section in sections:
+            offsets.append(offset)
+            offset += len(section)
+        with open(fn, "wb") as outfh:
+            outfh.write(COMPILED_HEADER.pack(COMPILED_MAGIC, len(keytable), len(meta), *offsets))
+            for section in sections:
+                outfh.write(section)
+
     def add_word(self, word, pronun, syltones=None, pos=None):
         entry = Word(word, pronun, syltones, pos)
         self[word] = entry
 
-    def lookup(self, word, pos=None):
+    def freeze(self):
+        """ Replace all entries with FrozenWords, lookups with
+            frozen=True then need not copy or convert entries...
+        """
+        for k in self.entries:
+            entry = self.entries[k]
+            if isinstance(entry, list):
+                self.entries[k] = [w.freeze() if isinstance(w, Word) else w for w in entry]
+            elif isinstance(entry, Word):
+                self.entries[k] = entry.freeze()
+        self._modified()
+        return self
+
+    def _copy(self, word, frozen):
+        if frozen:
+            if isinstance(word, FrozenWord):
+                return word
+            return word.freeze()
+        if isinstance(word, FrozenWord):
+            return word.copy()
+        return copy.deepcopy(word)
+
+    def lookup(self, word, pos=None, frozen=False):
+        """ Returns a copy of the entry (mutable Word) or, if 'frozen'
+            is True, a FrozenWord which is shared (not copied) if the
+            dictionary has been frozen...
+        """
         try:
             entry = self[word]
         except KeyError:
@@ -187,8 +419,114 @@ class PronunciationDictionary(object):
         if not isinstance(entry, list):
             entry = [entry]
         if not pos:
-            return copy.deepcopy(entry[0]) #pos not important: return first word
+            return self._copy(entry[0], frozen) #pos not important: return first word
         for word in entry:
             if pos == word["pos"]:
-                return copy.deepcopy(word) #first matching word
+                return self._copy(word, frozen) #first matching word
         raise PronunLookupError("no_pos")
+
+
+class CompiledPronunciationDictionary(PronunciationDictionary):
+    """ Read-only pronunciation dictionary in the binary format
+        written by PronunciationDictionary.tocompiledfile(). The file
+        is memory mapped (so can be shared between processes) and
+        words are found by binary search over the sorted keys. Entries
+        are returned as FrozenWords.
+
+        Pickles only the filename, so the file needs to be available
+        when loading a voice containing this dictionary...
+    """
+    def __init__(self, fn):
+        self.filename = fn
+        self.modcount = 0
+        self._open()
+
+    def _open(self):
+        with open(self.filename, "rb") as infh:
+            self._mm = mmap.mmap(infh.fileno(), 0, access=mmap.ACCESS_READ)
+        header = COMPILED_HEADER.unpack_from(self._mm, 0)
+        if header[0] != COMPILED_MAGIC:
+            raise ValueError("'%s' is not a compiled pronunciation dictionary" % self.filename)
+        self._numkeys, metalen = header[1:3]
+        (metaoffset, self._keytableoffset, self._keybloboffset,
+         self._recordsoffset, self._phoneidsoffset, self._syllensoffset) = header[3:]
+        meta = json.loads(self._mm[metaoffset:metaoffset + metalen].decode("utf-8"))
+        self.features = meta["features"]
+        self._phones = meta["symbols"]["phones"]
+        self._syltones = meta["symbols"]["syltones"]
+        self._pos = meta["symbols"]["pos"]
+        self._extras = meta["symbols"]["extras"]
+
+    def __getstate__(self):
+        return {"filename": self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state["filename"])
+
+    def _key(self, i):
+        keyoffset, keylen, firstrecord, numrecords = COMPILED_KEY.unpack_from(self._mm, self._keytableoffset + i * COMPILED_KEY.size)
+        start = self._keybloboffset + keyoffset
+        return self._mm[start:start + keylen], firstrecord, numrecords
+
+    def _find(self, word):
+        """ Binary search, returns (firstrecord, numrecords) or None...
+        """
+        bword = word.encode("utf-8")
+        lo = 0
+        hi = self._numkeys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, firstrecord, numrecords = self._key(mid)
+            if key < bword:
+                lo = mid + 1
+            elif key > bword:
+                hi = mid
+            else:
+                return firstrecord, numrecords
+        return None
+
+    def _record(self, word, i):
+        phoneoffset, syloffset, numphones, numsyls, syltonesid, posid, extrasid = COMPILED_RECORD.unpack_from(self._mm, self._recordsoffset + i * COMPILED_RECORD.size)
+        start = self._phoneidsoffset + phoneoffset * 2
+        phones = [self._phones[j] for j in struct.unpack_from(str("<%dH" % numphones), self._mm, start)]
+        if numsyls == COMPILED_NOSYLS:
+            syllables = None
+        else:
+            syllables = []
+            start = 0
+            for syllen in struct.unpack_from(str("<%dB" % numsyls), self._mm, self._syllensoffset + syloffset):
+                syllables.append(phones[start:start + syllen])
+                start += syllen
+        return FrozenWord(word, phones, syllables, self._syltones[syltonesid], self._pos[posid], self._extras[extrasid])
+
+    def __getitem__(self, word):
+        found = self._find(word)
+        if found is None:
+            raise KeyError(word)
+        firstrecord, numrecords = found
+        entry = [self._record(word, i) for i in range(firstrecord, firstrecord + numrecords)]
+        if numrecords == 1:
+            return entry[0]
+        return entry
+
+    def __setitem__(self, word, entry):
+        raise TypeError("CompiledPronunciationDictionary is read-only")
+
+    def __delitem__(self, word):
+        raise TypeError("CompiledPronunciationDictionary is read-only")
+
+    def __len__(self):
+        return self._numkeys
+
+    def __iter__(self):
+        for i in range(self._numkeys):
+            yield self._key(i)[0].decode("utf-8")
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def freeze(self):
+        return self
+
+    def close(self):
+        self._mm.close()
@@ -139,6 +139,7 @@ class SynthesizerHTS(UttProcessor):
 
         starttime = 0
         for phone_item in utt.get_relation("Segment"):
+            check_deadline(utt)
             if "end" in phone_item:
                 endtime = float_to_htk_int(phone_item["end"])
             else:
@@ -170,47 +171,50 @@ class SynthesizerHTS(UttProcessor):
         if "htsparms" in utt:
             htsparms.update(utt["htsparms"])   #parm overrides for this utt...
 
-        #build command string and execute:
-        cmds = self.hts_bin
+        #build command (argument list, a parm value may hold
+        #repeated options e.g. "-dm") and execute:
+        cmds = [self.hts_bin]
         for k in htsparms:
             if htsparms[k]:
                 if htsparms[k] is True:
-                    cmds += " " + k
+                    cmds.append(k)
                 else:
-                    cmds += " " + k + " " + str(htsparms[k])
-        cmds += " %(tempilab_file)s"
+                    cmds.extend([k] + str(htsparms[k]).split())
+        cmds.append("%(tempilab_file)s")
 
         fd1, tempwav_file = mkstemp(prefix="ttslab_", suffix=".wav")
         fd2, tempilab_file = mkstemp(prefix="ttslab_")
         fd3, tempolab_file = mkstemp(prefix="ttslab_")
 
-        cmds = cmds % {'models_dir': self.models_dir,
-                       'tempwav_file': tempwav_file,
-                       'tempilab_file': tempilab_file,
-                       'tempolab_file': tempolab_file}
+        files = {'models_dir': self.models_dir,
+                 'tempwav_file': tempwav_file,
+                 'tempilab_file': tempilab_file,
+                 'tempolab_file': tempolab_file}
+        cmds = [arg % files for arg in cmds] #paths may contain spaces
         #print(cmds)
         with codecs.open(tempilab_file, "w", encoding="utf-8") as outfh:
             outfh.write("\n".join(utt["hts_label"]))
 
-        os.system(cmds)
-
-        #load seg endtimes into utt:
-        with open(tempolab_file) as infh:
-            lines = infh.readlines()
-            segs = utt.get_relation("Segment").as_list()
-            assert len(segs) == len(lines)
-            for line, seg in zip(lines, segs):
-                seg["end"] = htk_int_to_float(line.split()[1])
-
-        #load audio:
-        utt["waveform"] = Waveform(tempwav_file)
-
-        #cleanup tempfiles:
-        os.close(fd1)
-        os.close(fd2)
-        os.close(fd3)
-        os.remove(tempwav_file)
-        os.remove(tempolab_file)
-        os.remove(tempilab_file)
+        try:
+            call_before_deadline(cmds, utt)
+
+            #load seg endtimes into utt:
+            with open(tempolab_file) as infh:
+                lines = infh.readlines()
+                segs = utt.get_relation("Segment").as_list()
+                assert len(segs) == len(lines)
+                for line, seg in zip(lines, segs):
+                    seg["end"] = htk_int_to_float(line.split()[1])
+
+            #load audio:
+            utt["waveform"] = Waveform(tempwav_file)
+        finally:
+            #cleanup tempfiles:
+            os.close(fd1)
+            os.close(fd2)
+            os.close(fd3)
+            os.remove(tempwav_file)
+            os.remove(tempolab_file)
+            os.remove(tempilab_file)
 
         return utt
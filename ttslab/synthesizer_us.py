@@ -153,6 +153,7 @@ class SynthesizerUS(UttProcessor):
         unit_item = unit_item.next_item
         #viterbi
         while unit_item is not None:
+            check_deadline(utt)
             # #feedback:
             # stime = time.time()
             # print(unit_item["name"],
@@ -15,11 +15,94 @@ from collections import OrderedDict
 from uttprocessor import *
 
 
+_charsets = {}
+
+def charset(stemplate):
+    """ Cached frozenset of the characters in stemplate...
+    """
+    try:
+        return _charsets[stemplate]
+    except KeyError:
+        return _charsets.setdefault(stemplate, frozenset(stemplate))
+
 def anycharsin(s, stemplate):
-    for c in s:
-        if c in stemplate:
-            return True
-    return False
+    return not charset(stemplate).isdisjoint(s)
+
+
+_tokenpatterns = {}
+
+def tokenpattern(punctuation):
+    """ Compiled regex matching whitespace delimited tokens, with
+        leading and trailing punctuation in the groups "prepunc" and
+        "postpunc" and the remainder (if any) in "name"...
+    """
+    try:
+        return _tokenpatterns[punctuation]
+    except KeyError:
+        pass
+    if punctuation:
+        p = "".join([re.escape(c) for c in punctuation])
+        pattern = re.compile(r"(?<!\S)(?=\S)(?P<prepunc>[%s]*)(?P<name>[^\s%s](?:\S*[^\s%s])?)?(?P<postpunc>[%s]*)(?!\S)" % (p, p, p, p),
+                             re.UNICODE)
+    else:
+        pattern = re.compile(r"(?P<prepunc>)(?P<name>\S+)(?P<postpunc>)", re.UNICODE)
+    return _tokenpatterns.setdefault(punctuation, pattern)
+
+
+SENTENCE_FINAL_PUNCTUATION = ".!?"
+DEF_MAXTOKENS = 100
+
+def _endpunc(rawtoken, punctuation):
+    """ The trailing punctuation of a whitespace delimited token...
+    """
+    return rawtoken[len(rawtoken.rstrip(punctuation)):]
+
+def sentences(source, punctuation, breakpunctuation="", maxtokens=DEF_MAXTOKENS,
+              finalpunctuation=SENTENCE_FINAL_PUNCTUATION):
+    """ Splits text from 'source' (a string, file handle or any
+        iterable of strings) into sentences, generating them one at a
+        time without reading all the input first. A sentence ends at a
+        token whose trailing punctuation (characters in 'punctuation')
+        contains any of 'finalpunctuation'. Sentences longer than
+        'maxtokens' are split after the last token ending in any of
+        'breakpunctuation' (or simply after 'maxtokens' tokens)...
+    """
+    if isinstance(source, (type(""), type(b""))):
+        source = [source]
+    pending = ""
+    chunks = iter(source)
+    done = False
+    while not done:
+        try:
+            pending += next(chunks)
+        except StopIteration:
+            done = True
+        rawtokens = list(re.finditer(r"\S+", pending, re.UNICODE))
+        if not done and rawtokens and rawtokens[-1].end() == len(pending):
+            rawtokens.pop() #may continue in next chunk
+        start = 0     #in pending
+        first = 0     #first token of current sentence
+        lastbreak = None
+        i = 0
+        while i < len(rawtokens):
+            endpunc = _endpunc(rawtokens[i].group(), punctuation)
+            end = None
+            if anycharsin(endpunc, finalpunctuation):
+                end = i
+            elif maxtokens and i - first + 1 >= maxtokens:
+                end = lastbreak if lastbreak is not None else i
+            elif breakpunctuation and anycharsin(endpunc, breakpunctuation):
+                lastbreak = i
+            if end is not None:
+                yield pending[start:rawtokens[end].end()].strip()
+                start = rawtokens[end].end()
+                i = first = end + 1
+                lastbreak = None
+            else:
+                i += 1
+        pending = pending[start:]
+        if done and pending.strip():
+            yield pending.strip()
 
 
 class DefaultTokenizer(UttProcessor):
@@ -53,29 +136,22 @@ class DefaultTokenizer(UttProcessor):
         return utt
 
     def tokenizer(self, utt, processname):
+        """ Tokens are separated by whitespace, leading and trailing
+            punctuation is stripped (only the first/last punctuation
+            character is kept as pre-/postpunc). The span of each token
+            name in "text" is kept as "textstart"/"textend"...
+        """
         text = utt["text"]
-        rawtokens = text.split()  #simply splitting on whitespace...
         token_rel = utt.new_relation("Token")
-        for rawtoken in rawtokens: 
-            #adding only single char to pre- or post-punctuation...
-            if rawtoken[0] in self.punctuation:
-                prepunctuation = rawtoken[0]
-            else:
-                prepunctuation = None
-            if rawtoken[-1] in self.punctuation:
-                postpunctuation = rawtoken[-1]
-            else:
-                postpunctuation = None
-            #strip all punctuation...
-            rawtoken = rawtoken.strip(self.punctuation)
-            #if anything left, add to token_rel:
-            if rawtoken:
+        for m in tokenpattern(self.punctuation).finditer(text):
+            #if anything left after stripping punctuation, add to token_rel:
+            if m.group("name"):
                 item = token_rel.append_item()
-                item["name"] = rawtoken
-                if prepunctuation:
-                    item["prepunc"] = prepunctuation
-                if postpunctuation:
-                    item["postpunc"] = postpunctuation
+                item["name"] = m.group("name")
+                #adding only single char to pre- or post-punctuation...
+                if m.group("prepunc"):
+                    item["prepunc"] = m.group("prepunc")[0]
+                if m.group("postpunc"):
+                    item["postpunc"] = m.group("postpunc")[-1]
+                item["textstart"], item["textend"] = m.span("name")
         return utt
-
-
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Batch versions of tfuncs_praat.get_f0 and get_intensity: a single
+    Praat invocation processes a whole list of wavefiles (optionally
+    split over a number of concurrent Praat processes) and results
+    can be cached on disk (keyed by file content and parameters)...
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+import re
+import codecs
+import zipfile
+import hashlib
+import subprocess
+from tempfile import NamedTemporaryFile, TemporaryFile
+
+import numpy as np
+
+from .. trackfile import Track
+from . import tfuncs_praat
+from . tfuncs_praat import DEF_MINPITCH, DEF_MAXPITCH, DEF_TIMESTEP, DEF_INT_MINPITCH
+
+PRAAT_BATCH = \
+"""#
+form Fill attributes
+   text input_list_file_name
+endform
+
+Read Strings from raw text file... 'input_list_file_name$'
+filelist = selected("Strings")
+num_files = Get number of strings
+for ifile from 1 to num_files
+    select filelist
+    wav_file_name$ = Get string... ifile
+    Read from file... 'wav_file_name$'
+    sound = selected("Sound")
+%(analysis)s
+    analysis = selected()
+
+    starttime = Get start time
+    endtime = Get end time
+    steptime= Get time step
+
+    printline FILE 'ifile'
+    printline 'starttime'
+    printline 'endtime'
+    printline 'steptime'
+
+    num_frames = Get number of frames
+    for i from 1 to num_frames
+        time = Get time from frame number... i
+        value = Get value in frame... i%(valueunit)s
+        printline 'time:7' 'value:7'
+    endfor
+
+    select sound
+    plus rawanalysis
+    plus analysis
+    Remove
+endfor
+"""
+
+F0_ANALYSIS = \
+"""    To Pitch... %(timestep)s %(minpitch)s %(maxpitch)s
+    rawanalysis = selected()
+    %(smoothing)sSmooth... %(smoothingbandwidth)s"""
+
+INTENSITY_ANALYSIS = \
+"""    To Intensity... %(minpitch)s %(timestep)s yes
+    rawanalysis = selected()"""
+
+FILE_MARKER_PAT = re.compile(r"^FILE (\d+)\s*$", re.MULTILINE)
+HASH_BLOCKSIZE = 2**20
+
+def _filehash(filelocation):
+    h = hashlib.sha1()
+    with open(filelocation, "rb") as infh:
+        while True:
+            block = infh.read(HASH_BLOCKSIZE)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cachelocation(cachedir, wavfilelocation, kind, parms):
+    h = hashlib.sha1(_filehash(wavfilelocation).encode("ascii"))
+    h.update(repr([kind] + sorted(parms.items())).encode("utf-8"))
+    return os.path.join(cachedir, h.hexdigest() + ".npz")
+
+
+def _cacheload(cachefn):
+    """ Returns None if not cached or if the cache file is unreadable
+        (e.g. truncated by a killed run)...
+    """
+    try:
+        with open(cachefn, "rb") as infh:
+            d = np.load(infh)
+            starttime, endtime, timestep = d["header"]
+            return starttime, endtime, timestep, d["times"], d["values"]
+    except (IOError, OSError, EOFError, ValueError, KeyError, zipfile.BadZipfile):
+        return None
+
+
+def _cachesave(cachefn, parsed):
+    starttime, endtime, timestep, times, values = parsed
+    tempfn = cachefn + ".%s.tmp" % os.getpid()
+    with open(tempfn, "wb") as outfh:
+        np.savez(outfh, header=np.array([starttime, endtime, timestep]), times=times, values=values)
+    os.rename(tempfn, cachefn) #atomic, in case of concurrent runs
+
+
+def run_batch(script, wavfilelocations, workers=1):
+    """ Run Praat 'script' (see PRAAT_BATCH) over wavfilelocations
+        split into 'workers' concurrent Praat processes, returns list
+        of parsed outputs (see tfuncs_praat._parse_praat_output) in
+        the same order...
+    """
+    chunksize = -(-len(wavfilelocations) // max(1, workers))
+    chunks = [wavfilelocations[i:i+chunksize] for i in range(0, len(wavfilelocations), chunksize)]
+    scriptfh = NamedTemporaryFile(suffix=".praat")
+    scriptfh.write(script.encode("utf-8"))
+    scriptfh.flush()
+    running = []
+    try:
+        for chunk in chunks:
+            listfh = NamedTemporaryFile(suffix=".txt")
+            listfh.write("".join([fn + "\n" for fn in chunk]).encode("utf-8"))
+            listfh.flush()
+            outfh = TemporaryFile() #not a pipe: processes run concurrently without being read
+            p = subprocess.Popen([tfuncs_praat.PRAAT_BIN, scriptfh.name, listfh.name], stdout=outfh)
+            running.append((chunk, listfh, outfh, p))
+        results = []
+        for chunk, listfh, outfh, p in running:
+            if p.wait() != 0:
+                raise RuntimeError("Praat failed (exit status %s)" % p.returncode)
+            outfh.seek(0)
+            text = outfh.read().decode("utf-8")
+            blocks = FILE_MARKER_PAT.split(text)[1:] #[num, output, num, output, ...]
+            if len(blocks) != 2 * len(chunk):
+                raise RuntimeError("Praat output incomplete: %s of %s files" % (len(blocks) // 2, len(chunk)))
+            for output in blocks[1::2]:
+                results.append(tfuncs_praat._parse_praat_output(output))
+        return results
+    finally:
+        for chunk, listfh, outfh, p in running:
+            if p.poll() is None:
+                p.kill()
+            listfh.close()
+            outfh.close()
+        scriptfh.close()
+
+
+def _extract(kind, script, wavfilelocations, parms, workers, cachedir):
+    """ Returns dict: wavfilelocation -> parsed output...
+    """
+    wavfilelocations = [os.path.abspath(fn) for fn in wavfilelocations]
+    parsed = {}
+    if cachedir is not None:
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+        cachefns = dict([(fn, _cachelocation(cachedir, fn, kind, parms)) for fn in wavfilelocations])
+        for fn in wavfilelocations:
+            cached = _cacheload(cachefns[fn])
+            if cached is not None:
+                parsed[fn] = cached
+    todo = sorted(set([fn for fn in wavfilelocations if fn not in parsed]))
+    if todo:
+        for fn, result in zip(todo, run_batch(script, todo, workers)):
+            parsed[fn] = result
+            if cachedir is not None:
+                _cachesave(cachefns[fn], result)
+    return parsed
+
+
+def get_f0s(wavfilelocations, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH, timestep=DEF_TIMESTEP, fixocterrs=False,
+            smoothingbandwidth=None, semitones=False, workers=1, cachedir=None):
+    """ Batch tfuncs_praat.get_f0: returns dict of Tracks keyed by
+        the given wavfilelocations...
+    """
+    minpitch = float(minpitch)
+    maxpitch = float(maxpitch)
+    parms = tfuncs_praat._f0_parms(minpitch, maxpitch, timestep, fixocterrs, smoothingbandwidth)
+    script = PRAAT_BATCH % {"analysis": F0_ANALYSIS % parms, "valueunit": " Hertz"}
+    parsed = _extract("f0", script, wavfilelocations, parms, workers, cachedir)
+    tracks = {}
+    for fn in wavfilelocations:
+        t = Track()
+        tfuncs_praat._set_f0_track(t, fn, parsed[os.path.abspath(fn)], minpitch, maxpitch, fixocterrs, semitones)
+        tracks[fn] = t
+    return tracks
+
+
+def get_intensities(wavfilelocations, timestep=DEF_TIMESTEP, minpitch=DEF_INT_MINPITCH, workers=1, cachedir=None):
+    """ Batch tfuncs_praat.get_intensity: returns dict of Tracks
+        keyed by the given wavfilelocations...
+    """
+    parms = {'timestep' : timestep,
+             'minpitch': minpitch}
+    script = PRAAT_BATCH % {"analysis": INTENSITY_ANALYSIS % parms, "valueunit": ""}
+    parsed = _extract("intensity", script, wavfilelocations, parms, workers, cachedir)
+    tracks = {}
+    for fn in wavfilelocations:
+        t = Track()
+        tfuncs_praat._set_intensity_track(t, fn, parsed[os.path.abspath(fn)])
+        tracks[fn] = t
+    return tracks
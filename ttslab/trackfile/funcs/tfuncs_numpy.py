@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Provides Track methods to extract F0 and intensity contours from
+    wavefiles natively (NumPy) as a drop-in alternative to
+    tfuncs_praat (same function names, arguments and Track fields)
+    that does not need the Praat binary...
+
+    F0 is estimated with a (simplified) version of Praat's
+    autocorrelation method: Hanning windows of 3 periods of minpitch,
+    normalised by the window autocorrelation, the highest local
+    maximum (with an octave cost) in the lag range is chosen, but
+    without Praat's path finding over candidates. Intensity follows
+    Praat's "To Intensity..." (Kaiser window of 6.4 / minpitch, mean
+    subtracted, dB re 2e-5).
+"""
+from __future__ import unicode_literals, division, print_function #Py2
+
+__author__ = "Daniel van Niekerk"
+__email__ = "dvn.demitasse@gmail.com"
+
+import os
+
+import numpy as np
+
+from ttslab.waveform import Waveform
+from ttslab.funcs import wfuncs_proc
+from . tfuncs_praat import DEF_EXTRACT_MINPITCH, DEF_EXTRACT_MAXPITCH, DEF_MINPITCH, DEF_MAXPITCH, DEF_TIMESTEP, DEF_INT_MINPITCH
+from . tfuncs_praat import _set_f0_track, _set_intensity_track
+
+DEF_BATCHSIZE = 1024         #frames processed at once
+DEF_PERIODSPERWINDOW = 3.0   #pitch analysis window (periods of minpitch)
+DEF_INT_PERIODSPERWINDOW = 6.4
+DEF_VOICINGTHRESHOLD = 0.45
+DEF_SILENCETHRESHOLD = 0.03  #relative to global peak
+DEF_OCTAVECOST = 0.01        #per octave
+KAISER_BETA = 2 * np.pi ** 2 + 0.5
+INTENSITY_REF = 2e-5         #Pa
+INTENSITY_FLOOR = -300.0     #dB, for digital silence
+
+
+def _read_samples(wavfilelocation):
+    """ Returns (samplerate, samples) with samples mono float64 in
+        [-1.0, 1.0]...
+    """
+    waveform = Waveform(wavfilelocation)
+    wfuncs_proc.to_float(waveform) #also unsigned (8-bit) samples
+    samples = waveform.samples
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    return waveform.samplerate, samples
+
+
+def _frametimes(numsamples, samplerate, windowduration, timestep):
+    """ Centre times of analysis frames, as placed by Praat (frames
+        centred in the signal, all windows completely inside)...
+    """
+    duration = numsamples / samplerate
+    numframes = int(np.floor((duration - windowduration) / timestep)) + 1
+    if numframes < 1:
+        return np.zeros(0)
+    firsttime = 0.5 * duration - 0.5 * (numframes - 1) * timestep
+    return firsttime + np.arange(numframes) * timestep
+
+
+def _frames(samples, samplerate, times, framelen, start, stop):
+    """ Matrix of frames[start:stop] (one per row) centred at times...
+    """
+    starts = np.round(times[start:stop] * samplerate - framelen / 2.0).astype(np.int64)
+    starts = np.clip(starts, 0, len(samples) - framelen)
+    return samples[starts[:, np.newaxis] + np.arange(framelen)]
+
+
+def _autocorrelation(frames, fftlen):
+    """ Row-wise autocorrelation (non-negative lags) normalised to
+        r[0] == 1...
+    """
+    spec = np.fft.rfft(frames, fftlen, axis=-1)
+    r = np.fft.irfft(spec.real ** 2 + spec.imag ** 2, fftlen, axis=-1)[..., :frames.shape[-1]]
+    r0 = r[..., :1].copy()
+    r0[r0 == 0.0] = 1.0
+    return r / r0
+
+
+def _smooth_f0(values, timestep, bandwidth):
+    """ Gaussian low-pass filter the F0 contour (interpolated through
+        unvoiced frames, which remain unvoiced)...
+    """
+    voiced = values.nonzero()[0]
+    if len(voiced) < 2:
+        return values
+    indices = np.arange(len(values))
+    contour = np.interp(indices, voiced, values[voiced])
+    fftlen = 2 * len(contour)
+    freqs = np.fft.rfftfreq(fftlen, timestep)
+    spec = np.fft.rfft(contour - contour.mean(), fftlen) * np.exp(-(freqs / bandwidth) ** 2)
+    smoothed = np.fft.irfft(spec, fftlen)[:len(contour)] + contour.mean()
+    return np.where(values > 0.0, smoothed, 0.0)
+
+
+def _estimate_f0(samples, samplerate, minpitch, maxpitch, timestep, batchsize=DEF_BATCHSIZE):
+    """ Returns (times, f0values) with unvoiced frames 0.0...
+    """
+    windowduration = DEF_PERIODSPERWINDOW / minpitch
+    framelen = int(round(windowduration * samplerate))
+    times = _frametimes(len(samples), samplerate, framelen / samplerate, timestep)
+    f0values = np.zeros(len(times))
+    if len(times) == 0:
+        return times, f0values
+    window = np.hanning(framelen)
+    fftlen = 2 ** int(np.ceil(np.log2(2 * framelen)))
+    windowr = _autocorrelation(window, fftlen)
+    minlag = max(2, int(np.floor(samplerate / maxpitch)))
+    maxlag = min(int(np.ceil(samplerate / minpitch)), framelen // 2, framelen - 2)
+    if maxlag <= minlag:
+        return times, f0values
+    lags = np.arange(minlag - 1, maxlag + 2) #one extra on either side for peak picking
+    globalpeak = np.max(np.abs(samples - samples.mean())) or 1.0
+
+    for start in range(0, len(times), batchsize):
+        frames = _frames(samples, samplerate, times, framelen, start, start + batchsize)
+        frames = frames - frames.mean(axis=1)[:, np.newaxis]
+        localpeak = np.max(np.abs(frames), axis=1)
+        r = _autocorrelation(frames * window, fftlen)[:, lags] / windowr[lags]
+        #local maxima inside lag range:
+        mid = r[:, 1:-1]
+        ismax = (mid >= r[:, :-2]) & (mid > r[:, 2:])
+        #parabolic interpolation of peak position and height:
+        denom = r[:, :-2] - 2.0 * mid + r[:, 2:]
+        denom[denom == 0.0] = -1e-12
+        shift = np.clip(0.5 * (r[:, :-2] - r[:, 2:]) / denom, -0.5, 0.5)
+        peakr = mid - 0.25 * (r[:, :-2] - r[:, 2:]) * shift
+        peakf = samplerate / (lags[1:-1] + shift)
+        score = np.where(ismax, peakr - DEF_OCTAVECOST * np.log2(minpitch / peakf), -np.inf)
+        best = np.argmax(score, axis=1)
+        rows = np.arange(len(best))
+        voiced = (ismax[rows, best] &
+                  (peakr[rows, best] > DEF_VOICINGTHRESHOLD) &
+                  (localpeak / globalpeak > DEF_SILENCETHRESHOLD))
+        f0values[start:start + len(best)] = np.where(voiced, peakf[rows, best], 0.0)
+    return times, f0values
+
+
+def _estimate_intensity(samples, samplerate, minpitch, timestep, batchsize=DEF_BATCHSIZE):
+    """ Returns (times, dbvalues)...
+    """
+    windowduration = DEF_INT_PERIODSPERWINDOW / minpitch
+    framelen = int(round(windowduration * samplerate))
+    times = _frametimes(len(samples), samplerate, framelen / samplerate, timestep)
+    values = np.zeros(len(times))
+    window = np.kaiser(framelen, KAISER_BETA)
+    window /= window.sum()
+    for start in range(0, len(times), batchsize):
+        frames = _frames(samples, samplerate, times, framelen, start, start + batchsize)
+        frames = frames - frames.mean(axis=1)[:, np.newaxis]
+        power = np.dot(frames ** 2, window) / INTENSITY_REF ** 2
+        with np.errstate(divide="ignore"):
+            values[start:start + len(power)] = np.maximum(10.0 * np.log10(power), INTENSITY_FLOOR)
+    return times, values
+
+
+def get_f0(track, wavfilelocation, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH, timestep=DEF_TIMESTEP, fixocterrs=False, smoothingbandwidth=None, semitones=False):
+    """Extract pitch contour (see tfuncs_praat.get_f0)...
+    """
+    minpitch = float(minpitch)
+    maxpitch = float(maxpitch)
+
+    wavfilelocation = os.path.abspath(wavfilelocation)
+    if fixocterrs:
+        extractmin, extractmax = float(DEF_EXTRACT_MINPITCH), float(DEF_EXTRACT_MAXPITCH)
+    else:
+        extractmin, extractmax = minpitch, maxpitch
+    if not timestep:
+        timestep = 0.75 / extractmin #as Praat
+    samplerate, samples = _read_samples(wavfilelocation)
+    times, values = _estimate_f0(samples, samplerate, extractmin, extractmax, timestep)
+    if smoothingbandwidth is not None:
+        values = _smooth_f0(values, timestep, float(smoothingbandwidth))
+    _set_f0_track(track, wavfilelocation, (0.0, len(samples) / samplerate, timestep, times, values),
+                  minpitch, maxpitch, fixocterrs, semitones)
+
+
+def get_intensity(track, wavfilelocation, timestep=DEF_TIMESTEP, minpitch=DEF_INT_MINPITCH):
+    """Extract intensity contour (see tfuncs_praat.get_intensity)...
+    """
+    minpitch = float(minpitch)
+
+    wavfilelocation = os.path.abspath(wavfilelocation)
+    if not timestep:
+        timestep = 0.8 / minpitch #as Praat
+    samplerate, samples = _read_samples(wavfilelocation)
+    times, values = _estimate_intensity(samples, samplerate, minpitch, timestep)
+    _set_intensity_track(track, wavfilelocation, (0.0, len(samples) / samplerate, timestep, times, values))
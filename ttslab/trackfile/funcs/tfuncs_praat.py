@@ -16,7 +16,6 @@ import re
 import numpy as np
 import subprocess
 from tempfile import NamedTemporaryFile
-from scipy.interpolate import InterpolatedUnivariateSpline, UnivariateSpline
 
 from .. trackfile import Track
 
@@ -27,6 +26,7 @@ DEF_MINPITCH = 50
 DEF_MAXPITCH = 350
 DEF_TIMESTEP = 0.005     #0.0 -> calc from pitch
 DEF_INT_MINPITCH = 100.0    #Hz (Bandwidth parameter)
+PRAAT_UNDEFINED = "--undefined--"
 
 PRAAT_GET_F0 = \
 """#
@@ -83,13 +83,35 @@ endfor
 
 
 
-def get_f0(track, wavfilelocation, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH, timestep=DEF_TIMESTEP, fixocterrs=False, smoothingbandwidth=None, semitones=False):
-    """Use "praat" to extract pitch contour...
+def _parse_praat_output(text):
+    """ Parse the output of the PRAAT_GET_* scripts: returns
+        (starttime, endtime, timestep, times, values), lines without
+        exactly two fields are skipped and unparseable values
+        (e.g. "--undefined--") set to 0.0...
     """
-    minpitch = float(minpitch)
-    maxpitch = float(maxpitch)
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    lines = text.lstrip().splitlines()
+    starttime, endtime, timestep = [float(line) for line in lines[:3]]
+    frames = [fields for fields in (line.split() for line in lines[3:]) if len(fields) == 2]
+    frames = np.array(frames, dtype="U").reshape((-1, 2))
+    times = frames[:, 0].astype(np.float64)
+    values = np.where(frames[:, 1] == PRAAT_UNDEFINED, "0.0", frames[:, 1])
+    try:
+        values = values.astype(np.float64)
+    except ValueError:
+        values = np.array([_float_or_zero(value) for value in values])
+    return starttime, endtime, timestep, times, values
 
-    wavfilelocation = os.path.abspath(wavfilelocation)
+
+def _float_or_zero(s):
+    try:
+        return float(s)
+    except ValueError:
+        return 0.0
+
+
+def _f0_parms(minpitch, maxpitch, timestep, fixocterrs, smoothingbandwidth):
     if fixocterrs:
         parms = {'minpitch' : DEF_EXTRACT_MINPITCH,
                  'maxpitch' : DEF_EXTRACT_MAXPITCH,
@@ -103,37 +125,11 @@ def get_f0(track, wavfilelocation, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH,
     else:
         parms["smoothing"] = ""
     parms["smoothingbandwidth"] = smoothingbandwidth
+    return parms
 
-    #write temp file - Praat script
-    tempfh = NamedTemporaryFile()
-    tempfh.write(PRAAT_GET_F0 % parms)
-    tempfh.flush()
-
-    p = subprocess.Popen([PRAAT_BIN,
-                          tempfh.name,
-                          wavfilelocation],
-                         stdout=subprocess.PIPE)
-    stdout_text = p.communicate()[0]
-    tempfh.close()
-
-    lines = stdout_text.splitlines()
-
-    starttime = float(lines[0])
-    endtime = float(lines[1])
-    timestep = float(lines[2])
-    times = []
-    values = []
-    for line in lines[3:]:
-        try:
-            time, value = line.split()
-        except ValueError:
-            continue
-        try:
-            values.append(float(value))
-        except ValueError:
-            values.append(0.0)
-        times.append(float(time))
 
+def _set_f0_track(track, wavfilelocation, parsed, minpitch, maxpitch, fixocterrs, semitones):
+    starttime, endtime, timestep, times, values = parsed
     track.minpitch = minpitch
     track.maxpitch = maxpitch
     track.times = np.array(times)
@@ -150,54 +146,57 @@ def get_f0(track, wavfilelocation, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH,
         track.values[track.values.nonzero()] = 12.0 * np.log2(track.values[track.values.nonzero()]) # 12 * log2 (F0 / F0reference) where F0reference = 1
         track.minpitch = 12.0 * np.log2(track.minpitch)
         track.maxpitch = 12.0 * np.log2(track.maxpitch)
-        
 
-def get_intensity(track, wavfilelocation, timestep=DEF_TIMESTEP, minpitch=DEF_INT_MINPITCH):
-    """Use "praat" to extract intensity contour, minpitch determines
-       windowsize in order to minimize ripple expected from periodic
-       energy...
-    """
 
-    wavfilelocation = os.path.abspath(wavfilelocation)
-    parms = {'timestep' : timestep,
-             'minpitch': minpitch}
+def _set_intensity_track(track, wavfilelocation, parsed):
+    starttime, endtime, timestep, times, values = parsed
+    track.times = np.array(times)
+    track.values = np.array(values).reshape(-1, 1)
+    track.praattype = "IntensityTier"
+    track._starttime = starttime
+    track._endtime = endtime
+    track.name = os.path.splitext(os.path.basename(wavfilelocation))[0]
+
 
-    #write temp file - Praat script
+def _run_praat_script(script, *args):
+    """ Write script to temp file and run with args, returns stdout...
+    """
     tempfh = NamedTemporaryFile()
-    tempfh.write(PRAAT_GET_INTENSITY % parms)
+    tempfh.write(script)
     tempfh.flush()
 
     p = subprocess.Popen([PRAAT_BIN,
-                          tempfh.name,
-                          wavfilelocation],
+                          tempfh.name] + list(args),
                          stdout=subprocess.PIPE)
     stdout_text = p.communicate()[0]
     tempfh.close()
+    return stdout_text
 
-    lines = stdout_text.splitlines()
-
-    starttime = float(lines[0])
-    endtime = float(lines[1])
-    timestep = float(lines[2])
-    times = []
-    values = []
-    for line in lines[3:]:
-        try:
-            time, value = line.split()
-        except ValueError:
-            continue
-        try:
-            values.append(float(value))
-        except ValueError:
-            values.append(0.0)
-        times.append(float(time))
 
-    track.times = np.array(times)
-    track.values = np.array(values).reshape(-1, 1)
-    track.praattype = "IntensityTier"
-    track._starttime = starttime
-    track._endtime = endtime
-    track.name = os.path.splitext(os.path.basename(wavfilelocation))[0]
+def get_f0(track, wavfilelocation, minpitch=DEF_MINPITCH, maxpitch=DEF_MAXPITCH, timestep=DEF_TIMESTEP, fixocterrs=False, smoothingbandwidth=None, semitones=False):
+    """Use "praat" to extract pitch contour...
+    """
+    minpitch = float(minpitch)
+    maxpitch = float(maxpitch)
+
+    wavfilelocation = os.path.abspath(wavfilelocation)
+    parms = _f0_parms(minpitch, maxpitch, timestep, fixocterrs, smoothingbandwidth)
+    stdout_text = _run_praat_script(PRAAT_GET_F0 % parms, wavfilelocation)
+    _set_f0_track(track, wavfilelocation, _parse_praat_output(stdout_text),
+                  minpitch, maxpitch, fixocterrs, semitones)
+        
+
+def get_intensity(track, wavfilelocation, timestep=DEF_TIMESTEP, minpitch=DEF_INT_MINPITCH):
+    """Use "praat" to extract intensity contour, minpitch determines
+       windowsize in order to minimize ripple expected from periodic
+       energy...
+    """
+
+    wavfilelocation = os.path.abspath(wavfilelocation)
+    parms = {'timestep' : timestep,
+             'minpitch': minpitch}
+    stdout_text = _run_praat_script(PRAAT_GET_INTENSITY % parms, wavfilelocation)
+    _set_intensity_track(track, wavfilelocation, _parse_praat_output(stdout_text))
 
 
 def trim_zeros(track, front=True, back=True):
@@ -219,31 +218,18 @@ def trim_zeros(track, front=True, back=True):
 
 
 def _calc_ispline(track, ignore_zeros=False):
-    """ 1-d cubic spline from track...
+    """ 1-d cubic spline from track (first channel, see Track.spline)...
     """
     if ignore_zeros:
-        validindices = np.nonzero(track.values)
-        track._ispline_nonzero = InterpolatedUnivariateSpline(track.times[validindices[0]], track.values[validindices])
+        track._ispline_nonzero = track.spline(0, "interpolating", ignore_zeros=True)
     else:
-        track._ispline = InterpolatedUnivariateSpline(track.times, track.values)
+        track._ispline = track.spline(0, "interpolating")
 
 
 def newtrack_from_ispline(track, times, ignore_zeros=False):
-    try:
-        if ignore_zeros:
-            spline = track._ispline_nonzero
-        else:
-            spline = track._ispline
-    except AttributeError:
-        track._calc_ispline(ignore_zeros)
-        if ignore_zeros:
-            spline = track._ispline_nonzero
-        else:
-            spline = track._ispline
-
     t = Track()
     t.times = np.array(times)
-    t.values = spline(t.times).reshape(-1, 1)
+    t.values = track.eval_splines(t.times, "interpolating", ignore_zeros=ignore_zeros)
     return t
 
 def newtrack_from_linearinterp(track, times, ignore_zeros=False):
@@ -259,32 +245,19 @@ def newtrack_from_linearinterp(track, times, ignore_zeros=False):
 
 
 def _calc_sspline(track, s, ignore_zeros=False):
-    """ 1-d cubic smoothing spline from track...
+    """ 1-d cubic smoothing spline from track (first channel, see
+        Track.spline)...
     """
     if ignore_zeros:
-        validindices = np.nonzero(track.values)
-        track._sspline_nonzero = UnivariateSpline(track.times[validindices[0]], track.values[validindices], s=s)
+        track._sspline_nonzero = track.spline(0, "smoothing", s, ignore_zeros=True)
     else:
-        track._sspline = UnivariateSpline(track.times, track.values, s=s)
+        track._sspline = track.spline(0, "smoothing", s)
 
 
 def newtrack_from_sspline(track, times, s=500, ignore_zeros=False):
-    #DEMITASSE: FIXME_MUST RECALC SPLINE IF PARM (s) CHANGED!
-    # try:
-    #     if ignore_zeros:
-    #         spline = track._sspline_nonzero
-    #     else:
-    #         spline = track._sspline
-    # except AttributeError:
-    track._calc_sspline(s, ignore_zeros)
-    if ignore_zeros:
-        spline = track._sspline_nonzero
-    else:
-        spline = track._sspline
-
     t = Track()
     t.times = np.array(times)
-    t.values = spline(t.times).reshape(-1, 1)
+    t.values = track.eval_splines(t.times, "smoothing", s, ignore_zeros)
     return t
 
 # def resample_n_1dspline(self, numsamples):
@@ -2,11 +2,11 @@
 """
     Reads and writes to and from HTK format feature files...
 """
+from __future__ import print_function
 
 __author__      = "Daniel van Niekerk (dvniekerk@csir.co.za)"
 __date__        = "2009/01/30 14:13:00"
 
-
 import os
 import sys
 import struct
@@ -105,23 +105,27 @@ class HTKFeatureFile(object):
         self.parm_kind = self._readheader()
         self.parm_kind_str = self._interpret_kind()
 
-        #Check whether possible to do read:
-        for quali in HTKFeatureFile.UNSUPPORTED_QUALIFIERS:
-            if quali[1] in self.parm_kind_str:
-                print "%s, qualifier unsupported" % (quali[1])
-                self.display_headerinfo()
-                sys.exit(1)
+        self._checkqualifiers()
 
         self.observations = self._readvectors()
         if len(self.observations) != self.nsamples:
-            print "WARNING: Missmatch between number samples read (%s) and header info (%s)...." % \
-                  (len(self.observations), self.nsamples)
+            print("WARNING: Missmatch between number samples read (%s) and header info (%s)...." % \
+                  (len(self.observations), self.nsamples))
         self.nsamples = len(self.observations)
         self.dimensions = len(self.observations[0])   #Assuming all vectors are the same size
 
         #self.componentstats = self._stats_per_component()
         
 
+    def _checkqualifiers(self):
+        """ Check whether possible to do read...
+        """
+        for quali in HTKFeatureFile.UNSUPPORTED_QUALIFIERS:
+            if quali[1] in self.parm_kind_str:
+                print("%s, qualifier unsupported" % (quali[1]))
+                self.display_headerinfo()
+                sys.exit(1)
+
     def _readheader(self):
         """ Read file header information...
         """
@@ -155,7 +159,7 @@ class HTKFeatureFile(object):
         """ Reads all observation vectors into a list...
             Assumes 32bit floats....
         """
-        fmt = ">" + "f" * (self.sample_size / HTKFeatureFile.BYTES_PER_VAL)
+        fmt = ">" + "f" * (self.sample_size // HTKFeatureFile.BYTES_PER_VAL)
 
         fh = open(self.path, "rb")
         fh.seek(12 + 0*self.sample_size)
@@ -165,7 +169,7 @@ class HTKFeatureFile(object):
         for i in range(0, self.nsamples):
             rawvector = fh.read(self.sample_size)
             if len(rawvector) != self.sample_size:
-                print "Unexpected end of file...."
+                print("Unexpected end of file....")
                 sys.exit(1)
             vector = struct.unpack(fmt, rawvector)
             observations.append(list(vector))
@@ -269,12 +273,12 @@ class HTKFeatureFile(object):
         """ Prints header info...
         """
 
-        print "PATH:", self.path
-        print "NAME:", self.name
-        print "NUM SAMPLES:", self.nsamples
-        print "SAMPLE PERIOD (100ns):", self.sample_period
-        print "SAMPLE SIZE (bytes):", self.sample_size
-        print "SAMPLE KIND:", self.parm_kind_str
+        print("PATH:", self.path)
+        print("NAME:", self.name)
+        print("NUM SAMPLES:", self.nsamples)
+        print("SAMPLE PERIOD (100ns):", self.sample_period)
+        print("SAMPLE SIZE (bytes):", self.sample_size)
+        print("SAMPLE KIND:", self.parm_kind_str)
     
 
     def display_observations(self):
@@ -282,7 +286,7 @@ class HTKFeatureFile(object):
         """
 
         for i in range(len(self.observations)):
-            print str(i).zfill(len(str(len(self.observations)))), ":"
+            print(str(i).zfill(len(str(len(self.observations)))), ":")
             for val in self.observations[i]:
                 sys.stdout.write("%.3f " % (val))
             sys.stdout.write("\n")
@@ -294,12 +298,12 @@ class HTKFeatureFile(object):
 
         counter = 0
         for c in self.componentstats:
-            print counter, ":"
-            print "MEAN:", c["mean"]
-            print "STD:", c["std"]
-            print "MIN:", c["min"]
-            print "MAX:", c["max"]
-            print "RANGE:", c["range"]
+            print(counter, ":")
+            print("MEAN:", c["mean"])
+            print("STD:", c["std"])
+            print("MIN:", c["min"])
+            print("MAX:", c["max"])
+            print("RANGE:", c["range"])
             counter += 1
 
 
@@ -308,7 +312,7 @@ class HTKFeatureFile(object):
         """
         
         if self.dimensions == 0:
-            print "Isn't it silly to try and write an empty file...?"
+            print("Isn't it silly to try and write an empty file...?")
             return
 
         fh = open(outputpath, "wb")
@@ -317,12 +321,8 @@ class HTKFeatureFile(object):
         header = struct.pack(">IIHH", self.nsamples, self.sample_period, self.sample_size, self.parm_kind)
         fh.write(header)
         
-        #write observations
-        for obs in self.observations:
-            obsstring = ""
-            for value in obs:
-                obsstring += struct.pack(">f", value)
-            fh.write(obsstring)
+        #write observations (big-endian 32bit floats)
+        N.asarray(self.observations, dtype=">f4").tofile(fh)
 
         fh.close()
 
@@ -332,59 +332,182 @@ class HTKFeatureFile(object):
             one vector per line...
         """
         for obs in self.observations:
-            print ",".join([str(s) for s in obs])
+            print(",".join([str(s) for s in obs]))
+
+
+class HTKFeatureArray(HTKFeatureFile):
+    """ HTKFeatureFile with observations in a NumPy array (nsamples x
+        dimensions) of big-endian 32bit floats memory mapped from the
+        file, no values are read or converted until used...
+
+        The default mode "c" (copy-on-write) allows modifying the
+        observations in memory without changing the file (see
+        numpy.memmap for other modes).
+    """
+    DTYPE = N.dtype(">f4")
+
+    def __init__(self, filepath, mode="c"):
+        """ Constructor maps file...
+        """
+        self.path = filepath
+        self.name = parse_path(filepath)[2]
+
+        self.nsamples, \
+        self.sample_period, \
+        self.sample_size, \
+        self.parm_kind = self._readheader()
+        self.parm_kind_str = self._interpret_kind()
+        self._checkqualifiers()
+
+        self.dimensions = self.sample_size // HTKFeatureFile.BYTES_PER_VAL
+        available = (os.path.getsize(filepath) - 12) // self.sample_size
+        if available != self.nsamples:
+            print("WARNING: Missmatch between number samples read (%s) and header info (%s)...." % \
+                  (min(available, self.nsamples), self.nsamples))
+            self.nsamples = min(available, self.nsamples)
+        if self.nsamples > 0:
+            self.observations = N.memmap(filepath, dtype=HTKFeatureArray.DTYPE, mode=mode,
+                                         offset=12, shape=(self.nsamples, self.dimensions))
+        else:
+            self.observations = N.zeros((0, self.dimensions), dtype=HTKFeatureArray.DTYPE)
+
+    def _stats_per_component(self):
+        """ Stats per component...
+        """
+        return [{"mean": mean, "std": std, "min": mn, "max": mx, "range": mx - mn}
+                for mean, std, mn, mx in zip(self.observations.mean(0),
+                                             self.observations.std(0),
+                                             self.observations.min(0),
+                                             self.observations.max(0))]
+
+    def append_observations(self, observations):
+        """ Takes observations (nobs x dimensions) and appends to
+            current feature set...
+        """
+        observations = N.asarray(observations, dtype=HTKFeatureArray.DTYPE)
+        assert observations.ndim == 2 and observations.shape[1] == self.dimensions, "Dimensionality missmatch..."
+        self.observations = N.vstack((self.observations, observations))
+        self.nsamples = len(self.observations)
+
+    def append_component(self, component):
+        """ Takes a sequence of values (time series) and appends each
+            value to existing vectors...
+        """
+        component = N.asarray(component, dtype=HTKFeatureArray.DTYPE)
+        assert component.shape == (self.nsamples,), "Num samples missmatch..."
+        self.observations = N.hstack((self.observations, component.reshape((-1, 1))))
+        self.sample_size += HTKFeatureFile.BYTES_PER_VAL
+        self.parm_kind = 9
+        self.parm_kind_str = self._interpret_kind()
+        self.dimensions = self.observations.shape[1]
+
+    def remove_component(self, index=-1):
+        """ Takes an index, removing this component from all
+            observation vectors...
+        """
+        assert (index in range(self.dimensions)) or (index == -1), "Invalid index value..."
+        assert self.dimensions > 0, "No observations left..."
+        self.observations = N.delete(self.observations, index, axis=1)
+        self.sample_size -= HTKFeatureFile.BYTES_PER_VAL
+        self.parm_kind = 9
+        self.parm_kind_str = self._interpret_kind()
+        self.dimensions = self.observations.shape[1]
+
+
+def _frameindices(filetimes, times):
+    """ Indices of 'times' in (sorted) 'filetimes' and a boolean
+        array indicating which times were found exactly...
+    """
+    times = N.asarray(times)
+    indices = N.searchsorted(filetimes, times)
+    found = indices < len(filetimes)
+    found[found] = filetimes[indices[found]] == times[found]
+    return indices, found
 
 
 def extractSuperVec(htkfeatfile, centralpoint, eff_numframes, eff_stepsize, windowsize):
     """Returns a supervector (see Labbook 2008-12-18) around
        'centralpoint' all parms in HTK format...
        Note: 'centralpoint' is floored based on sample_period...
+
+       The supervector is a list if htkfeatfile.observations is a
+       list (HTKFeatureFile) else an array (HTKFeatureArray).
     """
 
     assert eff_numframes % 2 != 0, "eff_numframes not odd!"
 
     realcentralpoint = centralpoint - (centralpoint % htkfeatfile.sample_period)
     
-    extracttimes = N.arange(realcentralpoint - ((eff_numframes - 1) / 2) * eff_stepsize,
-                            realcentralpoint + ((eff_numframes - 1) / 2) * eff_stepsize + eff_stepsize,
+    extracttimes = N.arange(realcentralpoint - ((eff_numframes - 1) // 2) * eff_stepsize,
+                            realcentralpoint + ((eff_numframes - 1) // 2) * eff_stepsize + eff_stepsize,
                             eff_stepsize)
 
     filetimes = htkfeatfile.central_times(windowsize)
 
     assert len(filetimes) == len(htkfeatfile.observations)
 
-    indices = []
-    for time in extracttimes:
-        try:
-            indices.append(filetimes.tolist().index(time))
-        except ValueError:
-            pass
-
-    if len(indices) != len(extracttimes):
+    indices, found = _frameindices(filetimes, extracttimes)
+    if not found.all():
         raise SuperVecExtractError()
 
-    supervector = []
-    for obs_index in indices:
-        try:
-            supervector.extend(htkfeatfile.observations[obs_index])
-        except IndexError:
-            raise SuperVecExtractError("This should not be possible though....")
+    supervector = N.asarray(htkfeatfile.observations)[indices].ravel()
+    if isinstance(htkfeatfile.observations, list):
+        supervector = supervector.tolist()
 
     return realcentralpoint, supervector
 
 
+def extractSuperVecs(htkfeatfile, centralpoints, eff_numframes, eff_stepsize, windowsize, skipinvalid=False):
+    """Batched extractSuperVec: returns an array of the (floored)
+       central points and a 2-D array with a supervector per row. If
+       'skipinvalid' then central points for which not all frames are
+       available are left out (else SuperVecExtractError is raised)...
+    """
+
+    assert eff_numframes % 2 != 0, "eff_numframes not odd!"
+
+    centralpoints = N.asarray(centralpoints)
+    realcentralpoints = centralpoints - (centralpoints % htkfeatfile.sample_period)
+    offsets = N.arange(-((eff_numframes - 1) // 2), (eff_numframes - 1) // 2 + 1) * eff_stepsize
+    extracttimes = realcentralpoints.reshape((-1, 1)) + offsets #ncentres x eff_numframes
+
+    filetimes = htkfeatfile.central_times(windowsize)
+    observations = N.asarray(htkfeatfile.observations)
+
+    assert len(filetimes) == len(observations)
+
+    indices, found = _frameindices(filetimes, extracttimes.ravel())
+    indices = indices.reshape(extracttimes.shape)
+    valid = found.reshape(extracttimes.shape).all(axis=1)
+    if not valid.all():
+        if not skipinvalid:
+            raise SuperVecExtractError()
+        indices = indices[valid]
+        realcentralpoints = realcentralpoints[valid]
+
+    supervectors = observations[indices].reshape((len(indices), eff_numframes * observations.shape[1]))
+    return realcentralpoints, supervectors
+
+
 def extractObservationsInsideRange(htkfeatfile, starttime, endtime, windowsize):
     """Returns sequence of observations with: 
        starttime < centralpoints < endtime
-       
+
+       Returns lists if htkfeatfile.observations is a list
+       (HTKFeatureFile) else arrays (HTKFeatureArray).
     """
 
     filetimes = htkfeatfile.central_times(windowsize)
 
     assert len(filetimes) == len(htkfeatfile.observations)
 
-    observations = [obs for ftime, obs in zip(filetimes, htkfeatfile.observations) if ftime > starttime and ftime < endtime]
-    times = [ftime for ftime in filetimes if ftime > starttime and ftime < endtime]
+    inside = (filetimes > starttime) & (filetimes < endtime)
+    times = filetimes[inside]
+    if isinstance(htkfeatfile.observations, list):
+        observations = [obs for obs, isinside in zip(htkfeatfile.observations, inside) if isinside]
+        times = times.tolist()
+    else:
+        observations = htkfeatfile.observations[inside]
 
     assert len(times) == len(observations)
 
@@ -405,10 +528,10 @@ def test(inputpath):
 
 if __name__ == "__main__":
 
-    print "import HTKFeatureFile and use...."
+    print("import HTKFeatureFile and use....")
     sys.exit(0)
 
     try:
         test(sys.argv[1])
     except IndexError:
-        print "USAGE: htkparmfile2.py [InputFilePath]"
+        print("USAGE: htkparmfile2.py [InputFilePath]")
@@ -22,7 +22,6 @@
 
     OTHER TODO: 
           Track:
-             Fix binary loading...
              Fix Praat loading...
 """
 from __future__ import unicode_literals, division, print_function #Py2
@@ -31,20 +30,48 @@ __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
 import os
+import sys
 
 import numpy as np
 import scipy.io.wavfile
+from scipy.interpolate import InterpolatedUnivariateSpline, UnivariateSpline
+
+from ttslab.waveform import mmapread
 
 #from trackfile package:
 import io.htk
 
+SPLINE_KINDS = ("interpolating", "smoothing")
+
 #recognised file extensions:
 WAV_EXT = "wav"
 EST_EXT = "est"
 
+EST_BYTEORDERS = {"10": ">", #MSB first
+                  "01": "<"} #LSB first
+EST_BYTEORDER_NATIVE = "01" if sys.byteorder == "little" else "10"
+
 class FileFormatError(Exception):
     pass
 
+def _read_est_header(fh):
+    """ Reads EST header lines from binary file handle (leaving it at
+        the start of the data), returns dict of header fields...
+    """
+    if fh.readline().split() != [b"EST_File", b"Track"]:
+        raise FileFormatError("File is not an EST_Track file...")
+    header = {}
+    while True:
+        line = fh.readline()
+        if not line:
+            raise FileFormatError("No EST_Header_End...")
+        linelist = line.decode("latin-1").split(None, 1)
+        if not linelist:
+            continue
+        if linelist[0] == "EST_Header_End":
+            return header
+        header[linelist[0]] = linelist[1].strip() if len(linelist) > 1 else ""
+
 class Track(object):
     """ assert len(self.times) == self.values.shape[0]
     """
@@ -58,6 +85,14 @@ class Track(object):
     def __len__(self):
         return len(self.times)
 
+    def __getstate__(self):
+        """ Don't pickle cached splines...
+        """
+        state = self.__dict__.copy()
+        state.pop("_splinecache", None)
+        state.pop("_splinecachedata", None)
+        return state
+
     def __str__(self):
         return "\n".join(["name:        " + self.name,
                           "numchannels: " + str(self.numchannels),
@@ -106,10 +141,14 @@ class Track(object):
 
 ######################################## FILE IO METHODS
 
-    def load_wave(self, filepath):
-        """ loads a RIFF wave file...
+    def load_wave(self, filepath, mmap=False):
+        """ loads a RIFF wave file (samples memory-mapped if
+            'mmap')...
         """
-        sr, s = scipy.io.wavfile.read(filepath)
+        if mmap:
+            sr, s = mmapread(filepath)
+        else:
+            sr, s = scipy.io.wavfile.read(filepath)
         if len(s.shape) == 1:
             self.values = s.reshape(-1, 1)
         else:
@@ -127,72 +166,153 @@ class Track(object):
         self.name = os.path.basename(filepath)
 
     
-    def load_htk(self, filepath, windowsize):
+    def load_htk(self, filepath, windowsize, mmap=False):
         """ DEMITASSE: I need to review io.htk.HTKFeatureFile
         implementation...
+
+        If 'mmap', values are the file's big-endian float32 samples
+        memory mapped (copy-on-write) instead of a float64 array.
         """
-        h = io.htk.HTKFeatureFile(filepath)
-        self.times = np.array(map(io.htk.htk_int_to_float, h.central_times(io.htk.float_to_htk_int(windowsize))))
-        self.values = np.array(h.observations)
+        h = io.htk.HTKFeatureArray(filepath)
+        self.times = h.central_times(io.htk.float_to_htk_int(windowsize)) / 10000000.0 #see io.htk.htk_int_to_float
+        if mmap:
+            self.values = h.observations
+        else:
+            self.values = np.asarray(h.observations, dtype=np.float64)
         self.name = os.path.basename(filepath)
         #DEMITASSE remove this when code reviewed:
         assert len(self.values.shape) == 2
         
 
     def load_track(self, filepath):
-        """Reads an Edinburgh Speech Tools ASCII Track file (ignores
-        'Breaks')...
+        """Reads an Edinburgh Speech Tools Track file in ASCII or
+        binary format (ignores 'Breaks')...
+        """
+        with open(filepath, "rb") as infh:
+            header = _read_est_header(infh)
+            numframes = int(header["NumFrames"])
+            numchannels = int(header["NumChannels"])
+            numcols = numchannels + 1 #time
+            if header.get("BreaksPresent", "").lower() == "true":
+                numcols += 1
+            datatype = header.get("DataType", "ascii")
+            if datatype == "ascii":
+                data = np.fromstring(infh.read(), dtype=np.float64, sep=" ")
+            elif datatype == "binary":
+                try:
+                    dtype = np.dtype(str(EST_BYTEORDERS[header.get("ByteOrder", EST_BYTEORDER_NATIVE)] + "f4"))
+                except KeyError:
+                    raise FileFormatError("Unknown ByteOrder: %s" % header["ByteOrder"])
+                data = np.fromfile(infh, dtype=dtype, count=numframes * numcols)
+            else:
+                raise FileFormatError("Unsupported DataType: %s" % datatype)
+
+        if len(data) != numframes * numcols:
+            raise FileFormatError("Data does not match header info...")
+        data = data.reshape((numframes, numcols))
+        self.times = data[:, 0].astype(np.float64)
+        self.values = data[:, numcols - numchannels:].astype(np.float64)
+        self.name = os.path.basename(filepath)
+
+
+    def save_track(self, filepath, binary=False, fmt="%.9g"):
+        """Writes an Edinburgh Speech Tools Track file (ASCII or binary
+        in native byte order, single precision)...
+        """
+        numframes, numchannels = self.values.shape
+        header = ["EST_File Track",
+                  "DataType %s" % ("binary" if binary else "ascii"),
+                  "NumFrames %s" % numframes,
+                  "NumChannels %s" % numchannels,
+                  "NumAuxChannels 0",
+                  "EqualSpace 0",
+                  "BreaksPresent true",
+                  "CommentChar ;"]
+        if binary:
+            header.insert(2, "ByteOrder %s" % EST_BYTEORDER_NATIVE)
+        header.append("EST_Header_End")
+        data = np.hstack((self.times.reshape((-1, 1)),
+                          np.ones((numframes, 1)), #breaks
+                          self.values))
+        with open(filepath, "wb") as outfh:
+            outfh.write(("\n".join(header) + "\n").encode("ascii"))
+            if binary:
+                data.astype(np.float32).tofile(outfh)
+            else:
+                rowfmt = " ".join(["%.6f", "%d"] + [fmt] * numchannels) + "\n"
+                outfh.write("".join([rowfmt % tuple(row) for row in data]).encode("ascii"))
+
+
+######################################## SPLINES
+
+    def spline(self, channel=0, kind="interpolating", s=None, ignore_zeros=False):
+        """ Returns a 1-d cubic spline fitted to a channel: kind is
+            "interpolating" (InterpolatedUnivariateSpline) or
+            "smoothing" (UnivariateSpline with smoothing factor
+            's'). If 'ignore_zeros', zero values are left out of the
+            fit.
+
+            Splines are cached until self.times or self.values is
+            replaced or modified by a Track method (call
+            clear_splines() after modifying these arrays in place
+            elsewhere)...
+        """
+        if kind not in SPLINE_KINDS:
+            raise Exception("Unsupported spline kind: %s" % kind)
+        try:
+            cachedtimes, cachedvalues, cachedversion = self._splinecachedata
+            if (cachedtimes is not self.times or cachedvalues is not self.values or
+                cachedversion != getattr(self, "_version", 0)):
+                self.clear_splines()
+        except AttributeError:
+            self.clear_splines()
+        key = (channel, kind, s if kind == "smoothing" else None, ignore_zeros)
+        try:
+            return self._splinecache[key]
+        except KeyError:
+            pass
+        times = self.times
+        values = self._channelvalues()[:, channel]
+        if ignore_zeros:
+            nonzero = np.nonzero(values)
+            times = times[nonzero]
+            values = values[nonzero]
+        if kind == "interpolating":
+            spline = InterpolatedUnivariateSpline(times, values)
+        else:
+            spline = UnivariateSpline(times, values, s=s)
+        self._splinecache[key] = spline
+        return spline
 
-        DEMITASSE: need to review this...
+    def eval_splines(self, times, kind="interpolating", s=None, ignore_zeros=False):
+        """ Evaluate the (cached) splines of all channels at 'times',
+            returns array (len(times) x numchannels)...
         """
+        times = np.asarray(times)
+        numchannels = self._channelvalues().shape[1]
+        values = np.empty((len(times), numchannels), dtype=np.float64)
+        for channel in range(numchannels):
+            values[:, channel] = self.spline(channel, kind, s, ignore_zeros)(times)
+        return values
+
+    def _channelvalues(self):
+        """ Values as (numframes x numchannels), also if 1-d (e.g. after
+            trim_zeros)...
+        """
+        return self.values.reshape(len(self.values), -1)
+
+    def clear_splines(self):
+        self._splinecache = {}
+        self._splinecachedata = (self.times, self.values, getattr(self, "_version", 0))
+
+    def _modified(self):
+        """ Called by methods that modify times or values in place:
+            bumps the version (checked against cached data) and drops
+            cached splines...
+        """
+        self._version = getattr(self, "_version", 0) + 1
+        self.clear_splines()
 
-        firstline = True
-        headerend = False
-        breakspresent = False
-        breakvals = []
-        values = []
-        times = []
-
-        with open(filepath) as infh:
-            for line in infh:
-                if firstline:
-                    firstline = False
-                    if line.split() != ["EST_File", "Track"]:
-                        raise FileFormatError("File is not an EST_Track file...")
-                else:
-                    if not headerend:
-                        linelist = line.split()
-                        if linelist[0] == "DataType" and linelist[1] != "ascii":
-                            raise FileFormatError("File is not in ASCII format...")
-                        if linelist[0] == "NumFrames":
-                            numframes = int(linelist[1])
-                        if linelist[0] == "NumChannels":
-                            numchannels = int(linelist[1])
-                        if linelist[0] == "BreaksPresent" and linelist[1].lower() == "true":
-                            breakspresent = True
-                        if linelist[0] == "EST_Header_End":
-                            headerend = True
-                    else:
-                        linelist = line.split()
-                        if breakspresent:
-                            time, breakval, vals = float(linelist[0]), float(linelist[1]), map(float, linelist[2:])
-                            times.append(time)
-                            breakvals.append(breakval)
-                            values.append(vals)
-                        else:
-                            time, vals = float(linelist[0]), map(float, linelist[1:])
-                            times.append(time)
-                            values.append(vals)
-
-        self.times = np.array(times)
-        self.values = np.array(values)
-        #sanity check...
-        if self.values.shape != (numframes, numchannels):
-            raise FileFormatError("Data does not match header info...")  
-        self.name = os.path.basename(filepath)
-        #DEMITASSE remove this when reviewed:
-        assert len(self.values.shape) == 2
-        
 
 ######################################## EDIT METHODS
 
@@ -202,6 +322,7 @@ class Track(object):
             self._endtime -= self.starttime
         if hasattr(self, "_starttime"):
             self._starttime = 0.0
+        self._modified()
 
     def slice(self, idxa, idxb, copy=True):
         """ returns a new track sliced using provided indices (like
@@ -218,41 +339,64 @@ class Track(object):
         return t
 
     def index_at(self, time, method="round"):
-        """ Returns the index of the closest sample to 'time'...
+        """ Returns the index of the closest sample to 'time' (or an
+            array of indices if 'time' is an array)...
             method in ['round', 'ceil', 'floor']
+
+            'round': nearest sample (lower index on ties)
+            'ceil': first sample after time (len(self) if none)
+            'floor': last sample before time (0 if none)
+
+            Assumes self.times is sorted (binary search).
         """
-        diffs = self.times - time        
+        times = self.times
         if method == "round":
-            return np.abs(diffs).argmin()
+            if len(times) == 0:
+                raise ValueError("Track is empty...")
+            i = np.searchsorted(times, time)
+            upper = np.minimum(i, len(times) - 1)
+            lower = np.maximum(i - 1, 0)
+            lower = np.searchsorted(times, times[lower]) #first of duplicate times
+            lowerdiffs = np.abs(times[lower] - time)
+            upperdiffs = np.abs(times[upper] - time)
+            return np.where(lowerdiffs <= upperdiffs, lower, upper)[()]
         elif method == "ceil":
-            pdiffi = np.flatnonzero(diffs > 0.0)
-            try:
-                return pdiffi[0]
-            except IndexError:
-                return len(diffs)
+            return np.searchsorted(times, time, side="right")
         elif method == "floor":
-            ndiffi = np.flatnonzero(diffs < 0.0)
-            try:
-                return ndiffi[-1]
-            except IndexError:
-                return 0
+            return np.maximum(np.searchsorted(times, time, side="left") - 1, 0)[()]
         else:
             raise Exception("Unsupported method: %s" % method)
 
-    # INCLUDE WHEN UNITTESTS IMPLEMENTED
-    # def index_at(self, time):
-    #     """ Returns the index of the closest sample to time... faster
-    #         due to taking into account ordering of time (TEST LATER).
-    #     """
-    #     from bisect import bisect_left #move out when using this function...
-    #     if time < self.starttime:
-    #         return 0
-    #     elif time > self.endtime:
-    #         return len(self) - 1
-    #     else:
-    #         i = bisect_left(self.times, time)
-    #         if self.times[i] - time > 0.5:
-    #             i -= 1
-    #         return i
+    def time_slice(self, starttime, endtime, copy=False):
+        """ Returns a new track with samples where starttime <= time <
+            endtime, by default sharing data with this track (Numpy
+            views, see slice)...
+        """
+        idxa, idxb = np.searchsorted(self.times, [starttime, endtime])
+        return self.slice(idxa, idxb, copy=copy)
+
+    def resample(self, timestep, starttime=None, endtime=None, method="linear"):
+        """ Returns a new track with samples on a uniform time grid
+            (starttime + n * timestep <= endtime), values are linearly
+            interpolated or taken from the nearest sample
+            (method="nearest")...
+        """
+        if starttime is None:
+            starttime = self.times[0]
+        if endtime is None:
+            endtime = self.times[-1]
+        t = Track()
+        t.name = self.name
+        t.times = starttime + np.arange(int(np.floor((endtime - starttime) / timestep + 1e-9)) + 1) * timestep
+        if method == "linear":
+            values = self._channelvalues()
+            t.values = np.empty((len(t.times), values.shape[1]), dtype=np.float64)
+            for j in range(values.shape[1]):
+                t.values[:, j] = np.interp(t.times, self.times, values[:, j])
+        elif method == "nearest":
+            t.values = self.values[self.index_at(t.times, method="round")]
+        else:
+            raise Exception("Unsupported method: %s" % method)
+        return t
 
     
@@ -9,6 +9,8 @@ from __future__ import unicode_literals, division, print_function #Py2
 __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
+import time
+import subprocess
 from collections import OrderedDict
 
 class ProcessNotDefined(Exception):
@@ -17,6 +19,40 @@ class ProcessNotDefined(Exception):
 class UttProcessorError(Exception):
     pass
 
+class DeadlineExceeded(UttProcessorError):
+    pass
+
+DEADLINE_POLL_INTERVAL = 0.005 #seconds
+
+
+def check_deadline(utt):
+    """ Raises DeadlineExceeded if the Utterance has a "deadline"
+        feature (absolute time in seconds since the epoch, as returned
+        by time.time()) which has passed...
+    """
+    deadline = utt["deadline"]
+    if deadline is not None and time.time() > deadline:
+        raise DeadlineExceeded("Deadline expired %.3f seconds ago..." % (time.time() - deadline))
+
+
+def call_before_deadline(args, utt):
+    """ Runs an external program (like subprocess.call) but kills it
+        and raises DeadlineExceeded if the Utterance deadline expires
+        before the program completes...
+    """
+    p = subprocess.Popen(args)
+    deadline = utt["deadline"]
+    if deadline is None:
+        return p.wait()
+    while p.poll() is None:
+        if time.time() > deadline:
+            p.kill()
+            p.wait()
+            raise DeadlineExceeded("Killed '%s': deadline expired..." % args[0])
+        time.sleep(DEADLINE_POLL_INTERVAL)
+    return p.returncode
+
+
 class UttProcessor(object):
     """ This is the base UttProcessor class.. An UttProcessor is
         instantiated at voice instantiation time and subsequently used
@@ -35,10 +71,12 @@ class UttProcessor(object):
 
     def __call__(self, utt, processname):
         """ Apply the pipeline of methods associated with processname
-            and return the resulting Utterance...
+            and return the resulting Utterance... The Utterance
+            deadline (if any) is checked before each step.
         """
         if processname in self.processes:
             for procname in self.processes[processname]:
+                check_deadline(utt)
                 proc = getattr(self, procname)
                 utt = proc(utt, self.processes[processname][procname])
         else:
@@ -13,10 +13,11 @@ __email__ = "dvn.demitasse@gmail.com"
 
 import re
 from collections import OrderedDict
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, GLIDE
 from .. defaultvoice import LwaziHTSVoice, LwaziPromHTSVoice
 
 from .. synthesizer_htsme import SynthesizerHTSME
+from .. uttprocessor import check_deadline
 import ttslab.hts_labels_prom as hts_labels_prom
 
 
@@ -176,8 +177,12 @@ class LwaziAfrikaansPhoneset(Phoneset):
         return "manner_nasal" in self.phones[phonename]
 
     def sonority_level(self, phonename):
-        """ Assigns levels of sonority to phones based on their nature...
+        """ Assigns levels of sonority to phones based on their nature
+            (precomputed in the phoneset table)...
         """
+        return self.table().sonority_levels[phonename]
+
+    def _sonority_level(self, phonename):
         if self.is_vowel(phonename):
             if "height_low" in self.phones[phonename]:
                 return 9
@@ -272,6 +277,7 @@ class LwaziAfrikaansPhoneset(Phoneset):
         if cluster == "VV":   #not described in the Hall paper...
             return "V.V"
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Classes:
                C -> Consonant,
@@ -283,10 +289,10 @@ class LwaziAfrikaansPhoneset(Phoneset):
 
         #first construct string representing relevant classes...
         classstr = ""
-        for phone in plist:
-            if self.is_vowel(phone):
+        for phoneclass in self.phoneclasses(plist):
+            if phoneclass & VOWEL:
                 classstr += "V"
-            elif self.is_glide(phone):
+            elif phoneclass & GLIDE:
                 classstr += "G"
             else:
                 classstr += "C"
@@ -305,8 +311,8 @@ class LwaziAfrikaansPhoneset(Phoneset):
 
         #find syllable_clusters in order and apply syllabification 
         #process on each...this should be redone... FIXME!!!
-        for cluster in self.features["syllable_clusters"]:
-            match = re.search(cluster, classstr)
+        for cluster, pattern in self.compiled_clusters():
+            match = pattern.search(classstr)
             while match:
                 #syllabify cluster
                 clustersylstr = self._process_cluster(cluster, plist, match)
@@ -316,7 +322,7 @@ class LwaziAfrikaansPhoneset(Phoneset):
                 plist = (plist[:match.start() + clustersylstr.index(".")] +
                              [""] + plist[match.start() + clustersylstr.index("."):])
                 #next match...
-                match = re.search(cluster, classstr)
+                match = pattern.search(classstr)
         sylls = [[]]
         index = 0
         for char in classstr:
@@ -399,6 +405,7 @@ class SynthesizerHTSME_Prominence(SynthesizerHTSME):
 
         starttime = 0
         for phone_item in utt.get_relation("Segment"):
+            check_deadline(utt)
             if "end" in phone_item:
                 endtime = hts_labels_prom.float_to_htk_int(phone_item["end"])
             else:
@@ -9,7 +9,7 @@ __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
 import re
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, GLIDE
 
 class LwaziEnglishPhoneset(Phoneset):
     """ Based on MRPA...
@@ -169,8 +169,12 @@ class LwaziEnglishPhoneset(Phoneset):
         return "manner_nasal" in self.phones[phonename]
 
     def sonority_level(self, phonename):
-        """ Assigns levels of sonority to phones based on their nature...
+        """ Assigns levels of sonority to phones based on their nature
+            (precomputed in the phoneset table)...
         """
+        return self.table().sonority_levels[phonename]
+
+    def _sonority_level(self, phonename):
         
         if self.is_vowel(phonename):
             if "height_low" in self.phones[phonename]:
@@ -267,6 +271,7 @@ class LwaziEnglishPhoneset(Phoneset):
             return "V.V"
 
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Classes:
                C -> Consonant,
@@ -278,10 +283,10 @@ class LwaziEnglishPhoneset(Phoneset):
 
         #first construct string representing relevant classes...
         classstr = ""
-        for phone in plist:
-            if self.is_vowel(phone):
+        for phoneclass in self.phoneclasses(plist):
+            if phoneclass & VOWEL:
                 classstr += "V"
-            elif self.is_glide(phone):
+            elif phoneclass & GLIDE:
                 classstr += "G"
             else:
                 classstr += "C"
@@ -300,8 +305,8 @@ class LwaziEnglishPhoneset(Phoneset):
 
         #find syllable_clusters in order and apply syllabification 
         #process on each...this should be redone... FIXME!!!
-        for cluster in self.features["syllable_clusters"]:
-            match = re.search(cluster, classstr)
+        for cluster, pattern in self.compiled_clusters():
+            match = pattern.search(classstr)
             while match:
                 #syllabify cluster
                 clustersylstr = self._process_cluster(cluster, plist, match)
@@ -311,7 +316,7 @@ class LwaziEnglishPhoneset(Phoneset):
                 plist = (plist[:match.start() + clustersylstr.index(".")] +
                              [""] + plist[match.start() + clustersylstr.index("."):])
                 #next match...
-                match = re.search(cluster, classstr)
+                match = pattern.search(classstr)
 
         sylls = [[]]
         index = 0
@@ -8,7 +8,7 @@ __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
 import re
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, SYLLABIC_CONSONANT
 
 class LwaziPediPhoneset(Phoneset):
     """ Developed for the Lwazi project...
@@ -123,44 +123,43 @@ class LwaziPediPhoneset(Phoneset):
         return "class_syllabic" in self.phones[phonename] and "consonant" in self.phones[phonename]
 
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Basic Pedi syllabification, based on the
             syllabification scheme devised by Etienne Barnard for
             isiZulu (Nguni language).
         """
         sylls = [[]]
-        phlist = phonelist[:]
-
-        while phlist:
-            phone = phlist[0]
-
-            if self.is_syllabicconsonant(phone):
+        classes = self.phoneclasses(phonelist)
+        n = len(phonelist)
+        i = 0
+        while i < n:
+            if classes[i] & SYLLABIC_CONSONANT:
                 #sC.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
                 continue
 
-            try:
-                nphone = phlist[1]
-                nnphone = phlist[2]
-                #If there is a three phone cluster:
-                if (self.is_vowel(phone) and
-                    not self.is_vowel(nphone) and
-                    not self.is_vowel(nnphone)):
-                    #VC.C
-                    sylls[-1].append(phlist.pop(0))#phone
-                    sylls[-1].append(phlist.pop(0))#nphone
-                    if phlist: sylls.append([])
-                    continue
-            except IndexError:
-                pass
-            
-            if self.is_vowel(phone):
+            #If there is a three phone cluster:
+            if (i + 2 < n and
+                classes[i] & VOWEL and
+                not classes[i+1] & VOWEL and
+                not classes[i+2] & VOWEL):
+                #VC.C
+                sylls[-1].extend(phonelist[i:i+2])
+                i += 2
+                if i < n: sylls.append([])
+                continue
+
+            if classes[i] & VOWEL:
                 #V.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
                 continue
-            
+
             #anything not caught above is added to current syl...
-            sylls[-1].append(phlist.pop(0))
+            sylls[-1].append(phonelist[i])
+            i += 1
         return sylls
@@ -8,7 +8,7 @@ __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
 import re
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, CONSONANT, SYLLABIC_CONSONANT
 
 class LwaziSothoPhoneset(Phoneset):
     """ Developed for project Lwazi...
@@ -124,45 +124,42 @@ class LwaziSothoPhoneset(Phoneset):
         """
         return "L" * len(syllables)
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Basic Sotho syllabification...
         """
         sylls = [[]]
-        phlist = phonelist[:]
+        classes = self.phoneclasses(phonelist)
+        n = len(phonelist)
+        i = 0
+        while i < n:
+            #syllabicC.C
+            if (classes[i] & SYLLABIC_CONSONANT and
+                i + 1 < n and
+                classes[i+1] & CONSONANT):
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
+                continue
 
-        while phlist:
-            phone = phlist[0]
+            #If there is a three phone cluster:
+            if (i + 2 < n and
+                classes[i] & VOWEL and
+                not classes[i+1] & VOWEL and
+                not classes[i+2] & VOWEL):
+                #VC.C
+                sylls[-1].extend(phonelist[i:i+2])
+                i += 2
+                if i < n: sylls.append([])
+                continue
 
-            if self.is_syllabicconsonant(phone):
-                try:
-                    nphone = phlist[1]
-                    #syllabicC.C
-                    if self.is_consonant(nphone):
-                        sylls[-1].append(phlist.pop(0))
-                        if phlist: sylls.append([])
-                        continue
-                except IndexError:
-                    pass
-            try:
-                nphone = phlist[1]
-                nnphone = phlist[2]
-                #If there is a three phone cluster:
-                if (self.is_vowel(phone) and
-                    not self.is_vowel(nphone) and
-                    not self.is_vowel(nnphone)):
-                    #VC.C
-                    sylls[-1].append(phlist.pop(0))#phone
-                    sylls[-1].append(phlist.pop(0))#nphone
-                    if phlist: sylls.append([])
-                    continue
-            except IndexError:
-                pass
-            
-            if self.is_vowel(phone):
+            if classes[i] & VOWEL:
                 #V.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
                 continue
             #anything not caught above is added to current syl...
-            sylls[-1].append(phlist.pop(0))
+            sylls[-1].append(phonelist[i])
+            i += 1
         return sylls
@@ -15,11 +15,13 @@ from tempfile import mkstemp
 
 import numpy as np
 
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, CONSONANT, SYLLABIC_CONSONANT
 from .. g2p import G2P_Rewrites_Semicolon, GraphemeNotDefined, NoRuleFound
 from .. defaultvoice import LwaziMultiHTSVoice
+from .. tokenizers import anycharsin
 import ttslab.hts_labels_tone as hts_labels_tone
 from .. synthesizer_htsme import SynthesizerHTSME
+from .. uttprocessor import check_deadline, call_before_deadline
 from . yoruba_orth2tones import word2tones
 from ttslab.waveform import Waveform
 from ttslab.trackfile import Track
@@ -125,44 +127,47 @@ class YorubaPhoneset(Phoneset):
         return "class_syllabic" in self.phones[phonename] and "consonant" in self.phones[phonename]
 
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Basic syllabification, based on the syllabification scheme
             devised by Etienne Barnard for isiZulu (Nguni language).
         """
         sylls = [[]]
-        phlist = list(phonelist)
-        while phlist:
-            phone = phlist[0]
-            try:
-                nphone = phlist[1]
-                nnphone = phlist[2]
+        classes = self.phoneclasses(phonelist)
+        n = len(phonelist)
+        i = 0
+        while i < n:
+            if i + 2 < n:
                 #Syllabic consonant followed by C:
-                if (self.is_syllabicconsonant(phone) and
-                    self.is_consonant(nphone)):
+                if (classes[i] & SYLLABIC_CONSONANT and
+                    classes[i+1] & CONSONANT):
                     #sC.C
-                    sylls[-1].append(phlist.pop(0))
-                    if phlist: sylls.append([])
+                    sylls[-1].append(phonelist[i])
+                    i += 1
+                    if i < n: sylls.append([])
                     continue
                 ##DEMITASSE: Yoruba doesn't seem to have these:
                 ##########
                 # #If there is a three phone cluster:
-                if (self.is_vowel(phone) and
-                    not self.is_vowel(nphone) and
-                    not self.is_vowel(nnphone)):
+                if (classes[i] & VOWEL and
+                    not classes[i+1] & VOWEL and
+                    not classes[i+2] & VOWEL):
                     #VC.C
-                    sylls[-1].append(phlist.pop(0))#phone
-                    sylls[-1].append(phlist.pop(0))#nphone
-                    if phlist: sylls.append([])
+                    sylls[-1].extend(phonelist[i:i+2])
+                    i += 2
+                    if i < n: sylls.append([])
                     continue
-            except IndexError:
-                pass
-            if self.is_vowel(phone):
+
+            if classes[i] & VOWEL:
                 #V.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
                 continue
+
             #anything not caught above is added to current syl...
-            sylls[-1].append(phlist.pop(0))
+            sylls[-1].append(phonelist[i])
+            i += 1
         return sylls
 
 
@@ -172,6 +177,7 @@ class SynthesizerHTSME_Tone(SynthesizerHTSME):
 
         starttime = 0
         for phone_item in utt.get_relation("Segment"):
+            check_deadline(utt)
             if "end" in phone_item:
                 endtime = hts_labels_tone.float_to_htk_int(phone_item["end"])
             else:
@@ -205,61 +211,64 @@ class SynthesizerHTSME_Tone(SynthesizerHTSME):
         if "htsparms" in utt:
             htsparms.update(utt["htsparms"])   #parm overrides for this utt...
 
-        #build command string and execute:
-        cmds = self.hts_bin
+        #build command (argument list, a parm value may hold
+        #repeated options e.g. "-dm") and execute:
+        cmds = [self.hts_bin]
         for k in htsparms:
             if htsparms[k]:
                 if htsparms[k] is True:
-                    cmds += " " + k
+                    cmds.append(k)
                 else:
-                    cmds += " " + k + " " + str(htsparms[k])
-        cmds += " %(tempilab_file)s"
+                    cmds.extend([k] + str(htsparms[k]).split())
+        cmds.append("%(tempilab_file)s")
 
         fd1, tempwav_file = mkstemp(prefix="ttslab_", suffix=".wav")
         fd2, tempilab_file = mkstemp(prefix="ttslab_")
         fd3, tempolab_file = mkstemp(prefix="ttslab_")
         fd4, tempolf0_file = mkstemp(prefix="ttslab_")
 
-        cmds = cmds % {'models_dir': self.models_dir,
-                       'tempwav_file': tempwav_file,
-                       'tempilab_file': tempilab_file,
-                       'tempolab_file': tempolab_file,
-                       'tempolf0_file': tempolf0_file}
+        files = {'models_dir': self.models_dir,
+                 'tempwav_file': tempwav_file,
+                 'tempilab_file': tempilab_file,
+                 'tempolab_file': tempolab_file,
+                 'tempolf0_file': tempolf0_file}
+        cmds = [arg % files for arg in cmds] #paths may contain spaces
         #print(cmds)
         with codecs.open(tempilab_file, "w", encoding="utf-8") as outfh:
             outfh.write("\n".join(utt["hts_label"]))
 
-        os.system(cmds)
-
-        #load seg endtimes into utt:
-        with open(tempolab_file) as infh:
-            lines = infh.readlines()
-            segs = utt.get_relation("Segment").as_list()
-            assert len(segs) == len(lines)
-            for line, seg in zip(lines, segs):
-                seg["end"] = hts_labels_tone.htk_int_to_float(line.split()[1])
-
-        #load audio:
-        utt["waveform"] = Waveform(tempwav_file)
-
-        #load lf0:
-        f0 = np.exp(np.fromfile(tempolf0_file, "float32")) #load and lf0 to hertz
-        #to semitones relative to 1Hz:
-        f0[f0.nonzero()] = 12.0 * np.log2(f0[f0.nonzero()]) # 12 * log2 (F0 / F0reference) where F0reference = 1
-        f0t = Track()
-        f0t.values = f0
-        f0t.times = np.arange(len(f0), dtype=np.float64) * 0.005
-        utt["f0"] = f0t
-
-        #cleanup tempfiles:
-        os.close(fd1)
-        os.close(fd2)
-        os.close(fd3)
-        os.close(fd4)
-        os.remove(tempwav_file)
-        os.remove(tempolab_file)
-        os.remove(tempilab_file)
-        os.remove(tempolf0_file)
+        try:
+            call_before_deadline(cmds, utt)
+
+            #load seg endtimes into utt:
+            with open(tempolab_file) as infh:
+                lines = infh.readlines()
+                segs = utt.get_relation("Segment").as_list()
+                assert len(segs) == len(lines)
+                for line, seg in zip(lines, segs):
+                    seg["end"] = hts_labels_tone.htk_int_to_float(line.split()[1])
+
+            #load audio:
+            utt["waveform"] = Waveform(tempwav_file)
+
+            #load lf0:
+            f0 = np.exp(np.fromfile(tempolf0_file, "float32")) #load and lf0 to hertz
+            #to semitones relative to 1Hz:
+            f0[f0.nonzero()] = 12.0 * np.log2(f0[f0.nonzero()]) # 12 * log2 (F0 / F0reference) where F0reference = 1
+            f0t = Track()
+            f0t.values = f0
+            f0t.times = np.arange(len(f0), dtype=np.float64) * 0.005
+            utt["f0"] = f0t
+        finally:
+            #cleanup tempfiles:
+            os.close(fd1)
+            os.close(fd2)
+            os.close(fd3)
+            os.close(fd4)
+            os.remove(tempwav_file)
+            os.remove(tempolab_file)
+            os.remove(tempilab_file)
+            os.remove(tempolf0_file)
 
         return utt
 
@@ -269,6 +278,7 @@ class SynthesizerHTSME_Tone2(SynthesizerHTSME_Tone):
 
         starttime = 0
         for phone_item in utt.get_relation("Segment"):
+            check_deadline(utt)
             if "end" in phone_item:
                 endtime = hts_labels_tone.float_to_htk_int(phone_item["end"])
             else:
@@ -303,6 +313,7 @@ class SynthesizerHTSME_Tone_NoTone(SynthesizerHTSME_Tone): #no tone labels but l
 
         starttime = 0
         for phone_item in utt.get_relation("Segment"):
+            check_deadline(utt)
             if "end" in phone_item:
                 endtime = hts_labels_tone.float_to_htk_int(phone_item["end"])
             else:
@@ -410,10 +421,10 @@ class LwaziYorubaMultiHTSVoice(LwaziMultiHTSVoice):
                     syllables = phoneset.syllabify(phones)
             else:
                 try:
-                    wordpronun = pronundict.lookup(word["pronunform"], word["pos"])
+                    wordpronun = pronundict.lookup(word["pronunform"], word["pos"], frozen=True)
                 except PronunLookupError as e:
                     if e.value == "no_pos":
-                        wordpronun = self.pronundict.lookup(word_item["name"])
+                        wordpronun = self.pronundict.lookup(word_item["name"], frozen=True)
                     else:
                         wordpronun = None
                 except AttributeError:
@@ -423,7 +434,7 @@ class LwaziYorubaMultiHTSVoice(LwaziMultiHTSVoice):
                         syllables = wordpronun["syllables"]
                         syltones = wordpronun["syltones"] #None if doesn't exist
                     else:
-                        phones = wordpronun["phones"]
+                        phones = list(wordpronun["phones"])
                         syllables = phoneset.syllabify(phones)
                 else:
                     try:
@@ -448,19 +459,23 @@ class LwaziYorubaMultiHTSVoice(LwaziMultiHTSVoice):
                         syltones = "N" * len(syllables)
             return syllables, syltones
 
+        pronuncache = self.get_pronuncache()
         word_rel = utt.get_relation("Word")
         syl_rel = utt.new_relation("Syllable")
         sylstruct_rel = utt.new_relation("SylStructure")
         seg_rel = utt.new_relation("Segment")
         for word_item in word_rel:
-            if word_item["lang"] == "eng":
-                syllables, syltones = g2p(word_item, self.engphoneset, self.engpronundict, self.engpronunaddendum, self.engg2p)
-                #rename phones:
-                for syl in syllables:
-                    for i in range(len(syl)):
-                        syl[i] = "eng_" + syl[i]
-            else:
-                syllables, syltones = g2p(word_item, self.phoneset, self.pronundict, self.pronunaddendum, self.g2p)
+            key = (word_item["lang"], word_item["name"], word_item["pronunform"], word_item["pos"])
+            try:
+                syllables, syltones = pronuncache[key]
+            except KeyError:
+                if word_item["lang"] == "eng":
+                    syllables, syltones = g2p(word_item, self.engphoneset, self.engpronundict, self.engpronunaddendum, self.engg2p)
+                    #rename phones:
+                    syllables = [["eng_" + phone for phone in syl] for syl in syllables]
+                else:
+                    syllables, syltones = g2p(word_item, self.phoneset, self.pronundict, self.pronunaddendum, self.g2p)
+                syllables, syltones = pronuncache.add(key, syllables, syltones)
 
             word_item_in_sylstruct = sylstruct_rel.append_item(word_item)
             for syl, syltone in zip(syllables, syltones):
@@ -478,12 +493,6 @@ class LwaziYorubaMultiHTSVoice(LwaziMultiHTSVoice):
     def phrasifier(self, utt, processname):
         """ Determine phrases/phrase breaks in the utterance...
         """
-        def anycharsin(s, stemplate):
-            for c in s:
-                if c in stemplate:
-                    return True
-            return False
-
         word_rel = utt.get_relation("Word")
         punctuation = self.PHRASING_PUNCTUATION
         phrase_rel = utt.new_relation("Phrase")
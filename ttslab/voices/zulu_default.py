@@ -9,8 +9,9 @@ __email__ = "dvn.demitasse@gmail.com"
 
 import re
 import unicodedata
-from .. phoneset import Phoneset
+from .. phoneset import Phoneset, cachedsyllabification, VOWEL, SYLLABIC_CONSONANT
 from .. defaultvoice import LwaziMultiHTSVoice
+from .. tokenizers import anycharsin
 
 class LwaziZuluPhoneset(Phoneset):
     """ Developed for the Lwazi project...
@@ -128,47 +129,44 @@ class LwaziZuluPhoneset(Phoneset):
     def is_syllabicconsonant(self, phonename):
         return "class_syllabic" in self.phones[phonename] and "consonant" in self.phones[phonename]
 
+    @cachedsyllabification
     def syllabify(self, phonelist):
         """ Basic Zulu syllabification, based on the syllabification
             scheme by Etienne Barnard for Zulu (Nguni language).
         """
         sylls = [[]]
-        phlist = phonelist[:]
-
-        while phlist:
-            phone = phlist[0]
-
-            if self.is_syllabicconsonant(phone):
+        classes = self.phoneclasses(phonelist)
+        n = len(phonelist)
+        i = 0
+        while i < n:
+            if classes[i] & SYLLABIC_CONSONANT:
                 #sC.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
                 continue
 
-            try:
-                nphone = phlist[1]
-                nnphone = phlist[2]
-                #If there is a three phone cluster:
-                if (self.is_vowel(phone) and
-                    not self.is_vowel(nphone) and
-                    not self.is_vowel(nnphone)):
-                    #VC.C
-                    sylls[-1].append(phlist.pop(0))#phone
-                    sylls[-1].append(phlist.pop(0))#nphone
-                    if phlist: sylls.append([])
-                    continue
-            except IndexError:
-                pass
-            
-            if self.is_vowel(phone):
-                #V.Any
-                sylls[-1].append(phlist.pop(0))
-                if phlist: sylls.append([])
+            #If there is a three phone cluster:
+            if (i + 2 < n and
+                classes[i] & VOWEL and
+                not classes[i+1] & VOWEL and
+                not classes[i+2] & VOWEL):
+                #VC.C
+                sylls[-1].extend(phonelist[i:i+2])
+                i += 2
+                if i < n: sylls.append([])
                 continue
-            
-            #anything not caught above is added to current syl...
-            sylls[-1].append(phlist.pop(0))
 
+            if classes[i] & VOWEL:
+                #V.Any
+                sylls[-1].append(phonelist[i])
+                i += 1
+                if i < n: sylls.append([])
+                continue
 
+            #anything not caught above is added to current syl...
+            sylls[-1].append(phonelist[i])
+            i += 1
         return sylls
 
 
@@ -248,12 +246,6 @@ class LwaziZuluMultiHTSVoice(LwaziMultiHTSVoice):
     def phrasifier(self, utt, processname):
         """ Determine phrases/phrase breaks in the utterance...
         """
-        def anycharsin(s, stemplate):
-            for c in s:
-                if c in stemplate:
-                    return True
-            return False
-
         word_rel = utt.get_relation("Word")
         punctuation = self.PHRASING_PUNCTUATION
         phrase_rel = utt.new_relation("Phrase")
@@ -7,57 +7,229 @@ __author__ = "Daniel van Niekerk"
 __email__ = "dvn.demitasse@gmail.com"
 
 import os
+import sys
+import struct
 
 import numpy as np
-import wave
 try:
     import scikits.audiolab as AL
 except ImportError:
     AL = None
     import scipy.io.wavfile as wavfile
-try:
-    import cStringIO as StringIO
-except ImportError:
-    import io.StringIO as StringIO
+
+#canonical 44-byte header of a PCM RIFF wave file:
+RIFF_HEADER = struct.Struct(str("<4sI4s4sIHHIIHH4sI"))
+RIFF_PCM = 1
+RIFF_SAMPLEWIDTH = 2 #bytes (int16)
+DEF_WRITEBLOCKSIZE = 65536 #frames
+RIFF_CHUNK = struct.Struct(str("<4sI"))
+RIFF_FMT = struct.Struct(str("<HHIIHH"))
+RIFF_FLOAT = 3
+RIFF_UNSETSIZES = (0, 0xFFFFFFFF)
+RIFF_EXTENSIBLE = 0xFFFE
+RIFF_DTYPES = {(RIFF_PCM, 8): "u1",
+               (RIFF_PCM, 16): "<i2",
+               (RIFF_PCM, 32): "<i4",
+               (RIFF_FLOAT, 32): "<f4",
+               (RIFF_FLOAT, 64): "<f8"}
 
 def normrange(values, minval=-1.0, maxval=1.0):
-    values = values.astype(np.float64)
-    if len(values.shape) == 1:
-        newvalues = values / (np.max(values) - np.min(values)) * (maxval - minval)
-        newvalues = newvalues - np.min(newvalues) + minval
-    else:
-        for i in range(values.shape[1]):
-            newvalues[:,i] = values[:,i] / (np.max(values[:,i]) - np.min(values[:,i])) * (maxval - minval)
-            newvalues[:,i] = newvalues[:,i] - np.min(newvalues[:,i]) + minval
+    """ Linearly map values (per channel if 2-D) onto [minval, maxval]...
+    """
+    newvalues = values.astype(np.float64)
+    minvalues = newvalues.min(axis=0)
+    span = newvalues.max(axis=0) - minvalues
+    newvalues -= minvalues
+    newvalues *= (maxval - minval) / np.where(span == 0, 1.0, span)
+    newvalues += minval
     return newvalues
 
-def riffstring(waveform):
-    f = StringIO.StringIO()
-    if waveform.samples.dtype == np.int16:
-        s = waveform.samples.tostring()
+def riffinfo(filename):
+    """ Parse the chunks of a RIFF wave file, returns (samplerate,
+        channels, dtype, dataoffset, numframes)...
+    """
+    with open(filename, "rb") as infh:
+        riff, size, wave = struct.unpack(str("<4sI4s"), infh.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError("Not a RIFF wave file: %s" % filename)
+        fmt = None
+        while True:
+            chunkheader = infh.read(RIFF_CHUNK.size)
+            if len(chunkheader) < RIFF_CHUNK.size:
+                raise ValueError("No data chunk in: %s" % filename)
+            chunkid, chunksize = RIFF_CHUNK.unpack(chunkheader)
+            if chunkid == b"fmt ":
+                chunk = infh.read(chunksize)
+                fmt = RIFF_FMT.unpack(chunk[:RIFF_FMT.size])
+                if fmt[0] == RIFF_EXTENSIBLE:
+                    fmt = (struct.unpack(str("<H"), chunk[24:26])[0],) + fmt[1:]
+                if chunksize % 2:
+                    infh.seek(1, os.SEEK_CUR)
+            elif chunkid == b"data":
+                if fmt is None:
+                    raise ValueError("No fmt chunk before data in: %s" % filename)
+                dataoffset = infh.tell()
+                break
+            else:
+                infh.seek(chunksize + chunksize % 2, os.SEEK_CUR)
+        infh.seek(0, os.SEEK_END)
+        filesize = infh.tell()
+    formattag, channels, samplerate, byterate, blockalign, bitspersample = fmt
+    try:
+        dtype = np.dtype(RIFF_DTYPES[(formattag, bitspersample)])
+    except KeyError:
+        raise ValueError("Unsupported format (%s, %s bits) in: %s" % (formattag, bitspersample, filename))
+    #streamed, sizes not known when header written: a data size of 0
+    #only counts as unset if the RIFF size is also unset or ends at
+    #the data chunk (else it is an empty data chunk, e.g. followed by
+    #a LIST chunk)
+    if chunksize == 0xFFFFFFFF or (chunksize == 0 and (size in RIFF_UNSETSIZES or size + 8 <= dataoffset)):
+        datasize = filesize - dataoffset
     else:
-        s = (waveform.samples * 32767).astype(np.int16).tostring()
-    wf = wave.open(f, "w")
-    wf.setparams((1, 2, waveform.samplerate, len(waveform.samples), "NONE", "No compression"))
-    wf.writeframes(s)            
-    wf.close()
-    return f.getvalue()
+        datasize = min(chunksize, filesize - dataoffset)
+    return samplerate, channels, dtype, dataoffset, datasize // (dtype.itemsize * channels)
+
+def mmapread(filename):
+    """ Memory-map the samples of a RIFF wave file (read-only, in
+        the file's sample format), returns (samplerate, samples)...
+    """
+    samplerate, channels, dtype, dataoffset, numframes = riffinfo(filename)
+    shape = (numframes,) if channels == 1 else (numframes, channels)
+    if numframes == 0:
+        return samplerate, np.zeros(shape, dtype=dtype)
+    return samplerate, np.memmap(filename, dtype=dtype, mode="r", offset=dataoffset, shape=shape)
+
+def iterblocks(samples, blocksize, overlap=0, partial=True):
+    """ Yield successive blocks (views, not copies) of 'blocksize'
+        frames advancing by blocksize - overlap, including a shorter
+        final block if 'partial'...
+    """
+    hop = blocksize - overlap
+    if hop < 1:
+        raise ValueError("overlap must be less than blocksize")
+    for i in range(0, max(len(samples) - overlap, 1), hop):
+        block = samples[i:i+blocksize]
+        if len(block) < blocksize and (not partial or len(block) == 0):
+            break
+        yield block
+
+def blocks(waveform, blocksize, overlap=0, partial=True):
+    """ Iterate over blocks of samples (see iterblocks)...
+    """
+    return iterblocks(waveform.samples, blocksize, overlap, partial)
+
+def intscale(dtype):
+    """ (offset, scale) mapping samples onto float (full scale 1.0)
+        as (samples - offset) / scale, e.g. int16: (0, 32768), uint8:
+        (128, 128), float: (0, 1.0)...
+    """
+    if not np.issubdtype(dtype, np.integer):
+        return 0, 1.0
+    info = np.iinfo(dtype)
+    scale = (int(info.max) - int(info.min) + 1) // 2
+    return int(info.min) + scale, scale
+
+def fullscale(dtype):
+    """ Largest (positive) sample value relative to the offset (see
+        intscale), e.g. int16: 32767, uint8: 127, float: 1.0...
+    """
+    if not np.issubdtype(dtype, np.integer):
+        return 1.0
+    offset, scale = intscale(dtype)
+    return scale - 1
+
+def writable_samples(waveform):
+    """ Returns waveform.samples, first replaced by an in-memory copy
+        if read-only (memory mapped)...
+    """
+    if not waveform.samples.flags.writeable:
+        waveform.samples = np.array(waveform.samples)
+    return waveform.samples
+
+def riffheader(waveform):
+    """ The 44-byte RIFF header for 'waveform' as 16-bit PCM...
+    """
+    channels = 1 if waveform.samples.ndim == 1 else waveform.samples.shape[1]
+    datasize = waveform.samples.size * RIFF_SAMPLEWIDTH
+    return RIFF_HEADER.pack(b"RIFF", 36 + datasize, b"WAVE",
+                            b"fmt ", 16, RIFF_PCM, channels, waveform.samplerate,
+                            waveform.samplerate * channels * RIFF_SAMPLEWIDTH,
+                            channels * RIFF_SAMPLEWIDTH, RIFF_SAMPLEWIDTH * 8,
+                            b"data", datasize)
+
+def topcm16(samples, out, blocksize=DEF_WRITEBLOCKSIZE):
+    """ Write samples into 'out' (int16 array of the same shape, any
+        byte order) converting float (full scale 1.0) or other integer
+        samples (see intscale) by scaling to 32768, rounding and
+        clipping...
+    """
+    if samples.dtype == np.int16:
+        out[...] = samples
+        return
+    offset, scale = intscale(samples.dtype)
+    info = np.iinfo(np.int16)
+    factor = intscale(np.int16)[1] / scale
+    for block, outblock in zip(iterblocks(samples, blocksize), iterblocks(out, blocksize)):
+        scaled = block - float(offset)
+        scaled *= factor
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, info.min, info.max, out=scaled)
+        outblock[...] = scaled
+
+def riffstring(waveform):
+    """ Encode as RIFF wave (16-bit PCM), returns a bytearray: samples
+        are copied (and converted if not int16) once, directly into
+        the output buffer...
+    """
+    samples = waveform.samples
+    buf = bytearray(RIFF_HEADER.size + samples.size * RIFF_SAMPLEWIDTH)
+    buf[:RIFF_HEADER.size] = riffheader(waveform)
+    out = np.frombuffer(buf, dtype="<i2", offset=RIFF_HEADER.size).reshape(samples.shape)
+    topcm16(samples, out)
+    return buf
+
+def writeriff(waveform, outfh, blocksize=DEF_WRITEBLOCKSIZE):
+    """ Stream as RIFF wave (16-bit PCM) to a file or socket: header
+        then blocks of samples, int16 (native little-endian) samples
+        are written without copying...
+    """
+    write = getattr(outfh, "sendall", None) or outfh.write
+    write(riffheader(waveform))
+    samples = waveform.samples
+    nocopy = samples.dtype == np.int16 and sys.byteorder == "little"
+    for i in range(0, len(samples), blocksize):
+        block = samples[i:i+blocksize]
+        if nocopy:
+            block = np.ascontiguousarray(block)
+        else:
+            pcm = np.empty(block.shape, dtype="<i2")
+            topcm16(block, pcm)
+            block = pcm
+        write(block.data)
 
 if AL:
     class Waveform(object):
         """ Simply holds waveforms in numpy arrays...
         """
-        def __init__(self, filename=None):
+        def __init__(self, filename=None, mmap=False):
             self.samplerate = None
             self.samples = None
             self.channels = None
             if filename:
-                self.read(filename)
+                self.read(filename, mmap=mmap)
 
         def __len__(self):
             return len(self.samples)
 
-        def read(self, filename, dtype=np.float64):
+        def read(self, filename, dtype=np.int16, mmap=False):
+            """ Load samples (int16 by default) or with 'mmap' map the
+                samples of a RIFF wave file without loading (see
+                mmapread)...
+            """
+            if mmap:
+                self.samplerate, self.samples = mmapread(filename)
+                self.channels = 1 if self.samples.ndim == 1 else self.samples.shape[1]
+                return
             f = AL.Sndfile(filename, 'r')
             self.samplerate = f.samplerate
             self.samples = f.read_frames(f.nframes, dtype=dtype)
@@ -82,22 +254,30 @@ if AL:
                 samples = self.samples
             AL.play(samples, self.samplerate)
     Waveform.riffstring = riffstring
+    Waveform.writeriff = writeriff
+    Waveform.blocks = blocks
 else:
     class Waveform(object):
         """ Simply holds waveforms in numpy arrays...
         """
-        def __init__(self, filename=None):
+        def __init__(self, filename=None, mmap=False):
             self.samplerate = None
             self.samples = None
             self.channels = None
             if filename:
-                self.read(filename)
+                self.read(filename, mmap=mmap)
 
         def __len__(self):
             return len(self.samples)
 
-        def read(self, filename):
-            self.samplerate, self.samples = wavfile.read(filename)
+        def read(self, filename, mmap=False):
+            """ Load samples or with 'mmap' map the samples of a RIFF
+                wave file without loading (see mmapread)...
+            """
+            if mmap:
+                self.samplerate, self.samples = mmapread(filename)
+            else:
+                self.samplerate, self.samples = wavfile.read(filename)
             try:
                 numsamples, self.channels = self.samples.shape
             except ValueError:
@@ -109,3 +289,5 @@ else:
         def play(self):
             raise NotImplementedError
     Waveform.riffstring = riffstring
+    Waveform.writeriff = writeriff
+    Waveform.blocks = blocks